@@ -0,0 +1,254 @@
+"""
+סיכומי האימונים מתעדכנים בהדרגה, במקום חישוב מלא אחרי כל שמירה.
+
+TrainingAggregator מחזיק את אותו מצב ש-analytics.training_state מחשב מכל הטבלה:
+- סכום משוקלל ומספר אימונים לכל יום ברצף (מערכי numpy לפי ימים),
+- העצימות הדועכת של כל יום,
+- רשימה ממוינת של העצימויות של הימים הפעילים, שממנה נלקחים האחוזונים (bisect),
+- טבלת האימונים הבודדים לנקודות בגרף.
+
+שורה שנוספה או נערכה משנה רק את הימים שלה ואת 7 הימים שאחריהם (חלון הדעיכה),
+ולכן העלות של שמירה לא גדלה עם אורך ההיסטוריה. המטמון מודיע על כל שינוי
+(WorksheetCache.subscribe); כשמגיעה טעינה מלאה המצב מסומן כלא מעודכן
+ונבנה מחדש בבקשה הבאה (sync).
+"""
+import threading
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+import analytics
+
+SESSION_COLUMNS = ['FullDate', 'Date', 'Duration', 'Stress', 'Weighted_Duration']
+ACTIVE_THRESHOLD = 0.1  # כמו intensity_bands: ימים מעל הסף נחשבים פעילים
+
+
+def _quantile(ordered, q):
+    # כמו pandas quantile (אינטרפולציה לינארית) על רשימה ממוינת
+    position = (len(ordered) - 1) * q
+    low = int(np.floor(position))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class TrainingAggregator:
+    def __init__(self, window=analytics.INTENSITY_WINDOW, decay=analytics.INTENSITY_DECAY,
+                 quantiles=(0.33, 0.90), defaults=(0.5, 2.0)):
+        self.window = window
+        self.kernel = decay ** np.arange(window)
+        self.quantiles = quantiles
+        self.defaults = defaults
+        self.version = None           # גרסת המטמון שהמצב משקף (None = צריך לבנות מחדש)
+        self.archived_version = None  # גרסת סיכום הארכיון שנכלל במצב
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._clear_days()
+        self._sessions = pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if 'Date' in c else float)
+                                       for c in SESSION_COLUMNS})
+
+    # --- בנייה וסנכרון ---
+
+    def reset(self, df, archived=None, version=None, archived_version=None):
+        """בנייה מלאה מטבלת האימונים (ומסיכום הארכיון, אם יש)"""
+        with self._lock:
+            self._clear()
+            if archived is not None and not archived.empty:
+                days = archived.dropna(subset=['Date'])
+                self._add_days(days['Date'], days['Weighted_Duration'].fillna(0),
+                               days['Sessions'].fillna(0).astype(int))
+            if df is not None and not df.empty:
+                sessions = analytics.training_sessions(df)
+                self._add_days(sessions['Date'], sessions['Weighted_Duration'],
+                               np.ones(len(sessions), dtype=int))
+                self._sessions = sessions[SESSION_COLUMNS].reset_index(drop=True)
+            self.version = version
+            self.archived_version = archived_version
+
+    def sync(self, cache, worksheet_name="Training", archived=None, archived_version=None):
+        """
+        בונה מחדש רק אם פספסנו שינוי (גרסה אחרת במטמון או סיכום ארכיון חדש).
+        הקריאה מהמטמון נעשית מחוץ לנעילה שלנו: המטמון קורא ל-on_cache_event בתוך
+        הנעילה שלו, ושתי נעילות בסדר הפוך היו יכולות להיתקע.
+        """
+        current = cache.version(worksheet_name)
+        with self._lock:
+            if self.version == current and self.archived_version == archived_version:
+                return
+        frame, version = cache.get_with_version(worksheet_name)
+        self.reset(frame, archived, version, archived_version)
+
+    def on_cache_event(self, event):
+        with self._lock:
+            if event.kind == "reset" or self.version is None or event.previous != self.version:
+                self.version = None
+                return
+            if event.removed is not None and not event.removed.empty:
+                self.remove(event.removed)
+            if event.added is not None and not event.added.empty:
+                self.add(event.added)
+            self.version = event.version
+
+    # --- עדכון בהדרגה ---
+
+    def add(self, rows):
+        """שורות חדשות (טבלה מוקלדת של Training)"""
+        with self._lock:
+            sessions = analytics.training_sessions(rows)
+            if sessions.empty:
+                return
+            self._add_days(sessions['Date'], sessions['Weighted_Duration'],
+                           np.ones(len(sessions), dtype=int))
+            new = sessions[SESSION_COLUMNS]
+            in_order = self._sessions.empty or new['FullDate'].min() >= self._sessions['FullDate'].iloc[-1]
+            self._sessions = pd.concat([self._sessions, new], ignore_index=True)
+            if not in_order:
+                self._sessions = self._sessions.sort_values('FullDate', kind='stable', ignore_index=True)
+
+    def remove(self, rows):
+        """שורות שנמחקו, או הערכים הישנים של שורות שנערכו"""
+        with self._lock:
+            sessions = analytics.training_sessions(rows)
+            if sessions.empty:
+                return
+            self._add_days(sessions['Date'], -sessions['Weighted_Duration'],
+                           -np.ones(len(sessions), dtype=int))
+            keep = np.ones(len(self._sessions), dtype=bool)
+            for full_date, duration, stress in sessions[['FullDate', 'Duration', 'Stress']].itertuples(index=False):
+                match = np.flatnonzero(keep
+                                       & (self._sessions['FullDate'] == full_date).to_numpy()
+                                       & (self._sessions['Duration'] == duration).to_numpy()
+                                       & (self._sessions['Stress'] == stress).to_numpy())
+                if len(match):
+                    keep[match[0]] = False
+            self._sessions = self._sessions[keep].reset_index(drop=True)
+
+    def _add_days(self, dates, weights, counts):
+        per_day = pd.DataFrame({'Date': pd.to_datetime(dates).to_numpy(),
+                                'w': np.asarray(weights, dtype=float),
+                                'n': np.asarray(counts, dtype=int)}).groupby('Date').sum()
+        if per_day.empty:
+            return
+        # ימים ריקים שנוספו בסוף הרצף מקבלים את הדעיכה של הימים שלפניהם
+        padded_from = self._extend(per_day.index.min(), per_day.index.max())
+        idx = (per_day.index - self._start).days.to_numpy()
+        self._values[idx] += per_day['w'].to_numpy()
+        self._counts[idx] += per_day['n'].to_numpy()
+        # יום שלא נשאר בו אף אימון חוזר בדיוק ל-0 (בלי שאריות של חיסור)
+        empty = idx[self._counts[idx] <= 0]
+        self._values[empty] = 0.0
+        self._counts[empty] = 0
+
+        first = self._start
+        self._trim()
+        if self._start is None:
+            return
+        shift = (self._start - first).days
+        lo = min(idx.min(), padded_from if padded_from is not None else idx.min())
+        self._refresh(max(0, lo - shift), idx.max() - shift + self.window)
+
+    def _extend(self, first, last):
+        """
+        הרצף מתרחב בימים ריקים לפני היום הראשון או אחרי האחרון.
+        מחזיר את המיקום של היום הראשון שנוסף בסוף (או None).
+        """
+        if self._start is None:
+            size = (last - first).days + 1
+            self._start = first
+            self._values, self._counts, self._intensity = np.zeros(size), np.zeros(size, dtype=int), np.zeros(size)
+            return None
+        before = max(0, (self._start - first).days)
+        after = max(0, (last - self._start).days + 1 - len(self._values))
+        if not (before or after):
+            return None
+        padded_from = before + len(self._values) if after else None
+        self._values = np.pad(self._values, (before, after))
+        self._counts = np.pad(self._counts, (before, after))
+        self._intensity = np.pad(self._intensity, (before, after))
+        self._start -= pd.Timedelta(days=before)
+        return padded_from
+
+    def _trim(self):
+        # כמו resample: הרצף מתחיל ונגמר בימים שיש בהם אימונים
+        active_days = np.flatnonzero(self._counts)
+        if not len(active_days):
+            self._clear_days()
+            return
+        first, last = active_days[0], active_days[-1] + 1
+        if first == 0 and last == len(self._counts):
+            return
+        for value in np.concatenate([self._intensity[:first], self._intensity[last:]]):
+            self._forget(value)
+        self._values = self._values[first:last]
+        self._counts = self._counts[first:last]
+        self._intensity = self._intensity[first:last]
+        self._start += pd.Timedelta(days=int(first))
+
+    def _clear_days(self):
+        self._start = None  # היום הראשון ברצף
+        self._values = np.zeros(0)
+        self._counts = np.zeros(0, dtype=int)
+        self._intensity = np.zeros(0)
+        self._active = []   # עצימויות הימים הפעילים, ממוינות
+
+    def _refresh(self, lo, hi):
+        """מחשב מחדש את העצימות של הימים [lo, hi) ומעדכן את הרשימה הממוינת"""
+        hi = min(hi, len(self._values))
+        if lo >= hi:
+            return
+        seg_start = max(0, lo - self.window + 1)
+        segment = self._values[seg_start:hi]
+        fresh = np.convolve(segment, self.kernel)[:len(segment)][lo - seg_start:]
+        old = self._intensity[lo:hi]
+        for before, after in zip(old, fresh):
+            if before != after:
+                self._forget(before)
+                if after > ACTIVE_THRESHOLD:
+                    insort(self._active, after)
+        self._intensity[lo:hi] = fresh
+
+    def _forget(self, value):
+        if value > ACTIVE_THRESHOLD:
+            i = bisect_left(self._active, value)
+            if i < len(self._active) and self._active[i] == value:
+                del self._active[i]
+
+    # --- קריאה ---
+
+    def bands(self):
+        with self._lock:
+            if not self._active:
+                return self.defaults
+            return tuple(_quantile(self._active, q) for q in self.quantiles)
+
+    def daily(self):
+        """כמו analytics.daily_load: Date, Weighted_Duration, Intensity"""
+        with self._lock:
+            if self._start is None:
+                return analytics.daily_load(self._sessions)
+            return pd.DataFrame({
+                'Date': pd.date_range(self._start, periods=len(self._values), freq='D'),
+                'Weighted_Duration': self._values.copy(),
+                'Intensity': self._intensity.copy(),
+            })
+
+    def state(self, extra=None):
+        """
+        TrainingState לגרף. extra: שורות שעוד ממתינות בתור הכתיבה - נכללות בתוצאה
+        בלי להישאר במצב (מוסיפים, קוראים ומחסירים).
+        """
+        with self._lock:
+            if extra is None or extra.empty:
+                return analytics.TrainingState(self._sessions, self.daily(), self.bands())
+            sessions = analytics.training_sessions(extra)
+            ones = np.ones(len(sessions), dtype=int)
+            self._add_days(sessions['Date'], sessions['Weighted_Duration'], ones)
+            try:
+                daily, bands = self.daily(), self.bands()
+            finally:
+                self._add_days(sessions['Date'], -sessions['Weighted_Duration'], -ones)
+            all_sessions = pd.concat([self._sessions, sessions[SESSION_COLUMNS]], ignore_index=True)
+            return analytics.TrainingState(all_sessions.sort_values('FullDate', kind='stable'),
+                                           daily, bands)
@@ -0,0 +1,140 @@
+"""
+חישובי העומס של גרף האימונים, בלי תלות ב-Streamlit.
+
+כל החישובים וקטוריים (pandas/numpy) במקום apply שורה-שורה:
+- ניקוי השעה ובניית תאריך מלא (FullDate) לכל אימון,
+- משך משוקלל לפי מדד הלחץ (Weighted_Duration),
+- סכום יומי רציף (resample לימים),
+- עצימות: סכום 7 הימים האחרונים עם דעיכה של חצי בכל יום (קונבולוציה),
+- אחוזונים 33 ו-90 של הימים הפעילים, לצביעת הרקע.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TIME = "12:00"
+INTENSITY_WINDOW = 7
+INTENSITY_DECAY = 0.5
+
+
+def stress_column(df):
+    # בגיליונות ישנים העמודה נקראת Stress
+    return 'StressLevel' if 'StressLevel' in df.columns else 'Stress'
+
+
+def parse_time(t):
+    # פונקציה חכמה לניקוי השעה שמגיעה מגוגל שיטס
+    t = str(t).strip().split('.')[0] # מסיר מילי-שניות (14:43:46.217 -> 14:43:46)
+    if t.lower() in ['nan', 'none', 'null', '', '<na>', 'nat']: return DEFAULT_TIME # אם אין שעה
+    if len(t) >= 5 and ':' in t: return t[:5] # פורמט תקין (14:43)
+    if len(t) == 4 and t.isdigit(): return f"{t[:2]}:{t[2:]}" # פורמט רציף (1100 -> 11:00)
+    return DEFAULT_TIME # ברירת מחדל לכל שגיאה אחרת
+
+
+def parse_times(times):
+    """
+    parse_time לכל העמודה: מנקים כל ערך שונה פעם אחת בלבד ומפזרים חזרה לפי קודים.
+    ביום יש לכל היותר 1440 שעות שונות, כך שהעלות לא גדלה עם אורך ההיסטוריה.
+    """
+    codes, uniques = pd.factorize(times.astype(str), use_na_sentinel=False)
+    parsed = np.array([parse_time(t) for t in uniques], dtype=object)
+    return pd.Series(parsed[codes], index=times.index)
+
+
+def _minutes(t):
+    # 'HH:MM' -> דקות מתחילת היום; שעה לא חוקית (למשל 25:00) -> NaN, והאימון יסונן כמו קודם
+    hours, sep, minutes = t.partition(':')
+    if sep and hours.isdigit() and minutes.isdigit() and int(hours) < 24 and int(minutes) < 60:
+        return int(hours) * 60 + int(minutes)
+    return np.nan
+
+
+def time_offsets(times):
+    """השעה של כל אימון כ-Timedelta מתחילת היום, לפי אותם כללי ניקוי"""
+    codes, uniques = pd.factorize(times.astype(str), use_na_sentinel=False)
+    minutes = np.array([_minutes(parse_time(t)) for t in uniques], dtype=float)
+    return pd.Series(pd.to_timedelta(minutes[codes], unit='m'), index=times.index)
+
+
+def training_sessions(df):
+    """
+    טבלת האימונים הבודדים, ממוינת לפי זמן:
+    FullDate (תאריך + שעה), Date (יום), Duration, Stress ו-Weighted_Duration.
+    """
+    sessions = df.copy()
+    stress_col = stress_column(df)
+
+    # היום בלבד (בלי שעה), ואליו מוסיפים את שעת האימון - כך אימונים באותו יום נפרדים
+    day = sessions['Date']
+    if not pd.api.types.is_datetime64_any_dtype(day):
+        day = pd.to_datetime(day, errors='coerce')
+    day = day.dt.normalize()
+    if 'Time' in sessions.columns:
+        offset = time_offsets(sessions['Time'])
+    else:
+        offset = pd.Timedelta(minutes=_minutes(DEFAULT_TIME))
+    sessions['FullDate'] = day + offset
+    sessions['Date'] = day
+    sessions['Duration'] = pd.to_numeric(sessions['Duration'], errors='coerce')
+    if stress_col in sessions.columns:
+        sessions['Stress'] = pd.to_numeric(sessions[stress_col], errors='coerce')
+    else:
+        sessions['Stress'] = np.nan
+
+    sessions = sessions.dropna(subset=['FullDate', 'Duration']).sort_values('FullDate')
+    sessions['Stress'] = sessions['Stress'].fillna(3)
+    sessions['Weighted_Duration'] = sessions['Duration'] * (sessions['Stress'] / 3.0)
+    return sessions
+
+
+def decayed_intensity(values, window=INTENSITY_WINDOW, decay=INTENSITY_DECAY):
+    """
+    לכל יום: היום עצמו במשקל 1, אתמול 0.5, שלשום 0.25... עד window ימים אחורה.
+    זהה ל-rolling(window, min_periods=1) עם משקלים דועכים, אבל בקונבולוציה אחת.
+    """
+    values = np.asarray(values, dtype=float)
+    kernel = decay ** np.arange(window)
+    return np.convolve(values, kernel)[:len(values)]
+
+
+def daily_load(sessions, archived=None):
+    """
+    סכום משוקלל לכל יום ברצף (ימים בלי אימון = 0) ועמודת Intensity.
+    archived: סיכום יומי של הארכיון (Date, Weighted_Duration) שמצטרף לפני האימונים החיים.
+    """
+    daily = sessions.groupby('Date')['Weighted_Duration'].sum()
+    if archived is not None and not archived.empty:
+        old = archived.dropna(subset=['Date']).groupby('Date')['Weighted_Duration'].sum()
+        daily = pd.concat([old, daily]).groupby(level=0).sum().sort_index()
+    if daily.empty:
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'),
+                             'Weighted_Duration': pd.Series(dtype=float),
+                             'Intensity': pd.Series(dtype=float)})
+    daily = daily.resample('D').sum().fillna(0).to_frame()
+    daily['Intensity'] = decayed_intensity(daily['Weighted_Duration'].to_numpy())
+    return daily.reset_index()
+
+
+def intensity_bands(intensity, low=0.33, high=0.90, defaults=(0.5, 2.0)):
+    """האחוזונים של הימים הפעילים (עצימות מעל 0.1) - הגבולות בין כחול/ירוק/אדום"""
+    active = intensity[intensity > 0.1]
+    if active.empty:
+        return defaults
+    return active.quantile(low), active.quantile(high)
+
+
+# כל מה שגרף האימונים צריך: האימונים הבודדים, העומס היומי וגבולות הצבעים
+TrainingState = namedtuple("TrainingState", "sessions daily bands")
+
+
+def training_state(df, archived=None):
+    """חישוב מלא מכל הטבלה (TrainingAggregator מחזיק את אותו מצב ומעדכן אותו בהדרגה)"""
+    sessions = training_sessions(df)
+    daily = daily_load(sessions, archived=archived)
+    return TrainingState(sessions, daily, intensity_bands(daily['Intensity']))
+
+
+def peak_sessions(sessions):
+    # אימונים ארוכים (מעל חצי שעה) או לחוצים (4 ומעלה) - לקו המגמה המקווקו
+    return sessions[(sessions['Duration'] > 0.5) | (sessions['Stress'] >= 4)]
@@ -0,0 +1,188 @@
+"""
+ארכיון חודשי וסיכומים יומיים לגיליונות שרק גדלים (Training, Feeding, TaskLogs).
+
+שורות ישנות מ"אופק" שנקבע בהגדרות (archive_horizon_days) עוברות בחודשים שלמים
+לגיליונות ארכיון לפי חודש (למשל Training_2023_05), ונמחקות מהגיליון החי.
+לכל גיליון נשמרת גם טבלת סיכום יומית קטנה של מה שבארכיון (Training_Daily וכו'),
+והגרפים קוראים סיכומים + הזנב החי - כך שעלות הטעינה לא גדלה עם השנים.
+
+הסדר בכל העברה: קודם כותבים לארכיון, אחר כך מעדכנים סיכומים, ורק בסוף מוחקים
+מהגיליון החי. אם ההעברה נקטעה באמצע, בהרצה הבאה שורות שכבר נמצאות בגיליון
+הארכיון של החודש לא נכתבות שוב - רק נמחקות מהגיליון החי.
+"""
+import logging
+from collections import Counter
+
+import pandas as pd
+
+import analytics
+import schema
+from cache import _fit, _trim, rows_to_frame
+from storage import to_cell
+
+log = logging.getLogger(__name__)
+
+# גיליון חי -> טבלת הסיכום היומית של הארכיון שלו
+AGGREGATES = {
+    "Training": "Training_Daily",
+    "Feeding": "Feeding_Daily",
+    "TaskLogs": "TaskLogs_Daily",
+}
+
+
+def aggregate_header(worksheet_name):
+    return [column.name for column in schema.SCHEMAS[AGGREGATES[worksheet_name]]]
+
+
+def month_sheet(worksheet_name, month):
+    # month בפורמט YYYY_MM
+    return f"{worksheet_name}_{month}"
+
+
+# --- סיכומים יומיים (מקבלים טבלה מוקלדת, מחזירים טבלה בעמודות של הסיכום) ---
+
+def training_daily(df):
+    sessions = analytics.training_sessions(df)
+    return sessions.groupby('Date').agg(
+        Sessions=('Duration', 'size'),
+        Duration=('Duration', 'sum'),
+        Weighted_Duration=('Weighted_Duration', 'sum'),
+    ).reset_index()
+
+
+def feeding_daily(df):
+    df = df.dropna(subset=['Date']).assign(Amount=df['Amount'].fillna(0))
+    return df.groupby(['Date', 'Finished'], observed=True).agg(
+        Meals=('Amount', 'size'),
+        Amount=('Amount', 'sum'),
+    ).reset_index()
+
+
+def task_logs_daily(df):
+    df = df.dropna(subset=['Date'])
+    return df.groupby(['Date', 'TaskName'], observed=True).agg(
+        Logs=('Success', 'size'),
+        Success=('Success', 'mean'),
+    ).reset_index()
+
+
+DAILY = {
+    "Training": training_daily,
+    "Feeding": feeding_daily,
+    "TaskLogs": task_logs_daily,
+}
+
+
+def daily_rows(worksheet_name, rows):
+    """שורות טקסט של גיליון (כולל כותרות) -> שורות טקסט של הסיכום היומי, בלי כותרות"""
+    width = len(rows[0])
+    frame = schema.normalize(worksheet_name, rows_to_frame([_fit(row, width) for row in rows]))
+    if frame.empty:
+        return []
+    daily = DAILY[worksheet_name](frame)[aggregate_header(worksheet_name)]
+    return [schema.to_cells(row) for _, row in daily.iterrows()]
+
+
+def _not_yet_archived(rows, archived):
+    # שורות שכבר בגיליון הארכיון (מהעברה שנקטעה) לא נכתבות שוב
+    remaining = Counter(tuple(_trim(row)) for row in archived)
+    missing = []
+    for row in rows:
+        key = tuple(_trim(row))
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            missing.append(row)
+    return missing
+
+
+class Archiver:
+    """
+    cache: מטמון היומן, אם כבר נטען. לפיו מחליטים בלי קריאות נוספות אם יש בכלל מה
+    להעביר (ברוב ההפעלות אין - ההעברה קורית פעם בחודש), ואחרי העברה הגיליון החי
+    וטבלת הסיכום שלו נזרקים ממנו כדי שייקראו מחדש.
+    """
+
+    def __init__(self, backend, horizon_days, worksheet_names=tuple(AGGREGATES), today=None, cache=None):
+        self.backend = backend
+        self.horizon_days = int(horizon_days)
+        self.worksheet_names = list(worksheet_names)
+        self.today = today
+        self.cache = cache
+
+    def cutoff(self):
+        """שורות מלפני התאריך הזה עוברות לארכיון: תחילת החודש שבו מתחיל האופק"""
+        today = pd.Timestamp(self.today or pd.Timestamp.now()).normalize()
+        return (today - pd.Timedelta(days=self.horizon_days)).replace(day=1)
+
+    def prepare(self):
+        # טבלאות הסיכום נוצרות אם אין. טבלה שכבר נטענה למטמון עם כותרות קיימת - לא בודקים שוב
+        for name in self.worksheet_names:
+            if self.cache is not None and len(self.cache.get(AGGREGATES[name]).columns):
+                continue
+            self.backend.ensure_worksheet(AGGREGATES[name], aggregate_header(name))
+            if self.cache is not None:
+                self.cache.invalidate(AGGREGATES[name])
+
+    def due(self, worksheet_name):
+        """יש במטמון שורות מלפני cutoff (בלי מטמון: תמיד בודקים בגיליון)"""
+        if self.cache is None:
+            return True
+        frame = self.cache.get(worksheet_name)
+        return 'Date' in frame.columns and bool((frame['Date'] < self.cutoff()).any())
+
+    def run(self):
+        self.prepare()
+        moved = {}
+        for name in self.worksheet_names:
+            moved[name] = self.rollover(name) if self.due(name) else 0
+            if moved[name] and self.cache is not None:
+                self.cache.invalidate(name)
+                self.cache.invalidate(AGGREGATES[name])
+        return moved
+
+    def rollover(self, worksheet_name):
+        """מעביר לארכיון את השורות הישנות של גיליון אחד; מחזיר כמה שורות הועברו"""
+        rows = self.backend.read_all(worksheet_name)
+        if len(rows) < 2:
+            return 0
+        header = list(rows[0])
+        data = [_fit(row, len(header)) for row in rows[1:]]
+        frame = schema.normalize(worksheet_name, rows_to_frame([header] + data))
+        if 'Date' not in frame.columns:
+            return 0
+        # שורה בלי תאריך תקין נשארת בגיליון החי
+        old = (frame['Date'] < self.cutoff()).fillna(False).to_numpy()
+        if not old.any():
+            return 0
+
+        months = frame['Date'][old].dt.strftime('%Y_%m')
+        daily_by_month = {}
+        for month, positions in months.groupby(months).groups.items():
+            month_rows = [data[i] for i in positions]
+            name = month_sheet(worksheet_name, month)
+            self.backend.ensure_worksheet(name, header)
+            archived = self.backend.read_all(name)[1:]
+            new_rows = _not_yet_archived(month_rows, archived)
+            if new_rows:
+                self.backend.append_rows(name, new_rows)
+            daily_by_month[month] = daily_rows(worksheet_name, [header] + archived + new_rows)
+
+        self._update_aggregate(worksheet_name, daily_by_month)
+
+        # בסוף: מחיקה מהגיליון החי (מספר שורה = מיקום + 2), מהסוף להתחלה
+        deletes = sorted((int(i) + 2 for i in frame.index[old]), reverse=True)
+        self.backend.apply_changes(worksheet_name, [], deletes)
+        log.info("%d שורות מ-%s הועברו לארכיון (%s)", len(deletes), worksheet_name,
+                 ", ".join(sorted(daily_by_month)))
+        return len(deletes)
+
+    def _update_aggregate(self, worksheet_name, daily_by_month):
+        # החודשים שהועברו מחושבים מחדש מכל גיליון הארכיון שלהם; שאר הסיכום נשאר כמו שהוא
+        name = AGGREGATES[worksheet_name]
+        header = aggregate_header(worksheet_name)
+        kept = [row for row in self.backend.read_all(name)[1:]
+                if row and row[0][:7].replace('-', '_') not in daily_by_month]
+        rows = kept + [row for month_rows in daily_by_month.values() for row in month_rows]
+        rows.sort(key=lambda row: row[0])
+        self.backend.replace_all(name, [header] + [[to_cell(v) for v in row] for row in rows])
@@ -0,0 +1,118 @@
+"""
+מדידת זמני החישוב של גרף האימונים על היסטוריה סינתטית של כמה שנים.
+
+משווה את analytics.py לגרסה הישנה (apply שורה-שורה ו-rolling.apply),
+מוודא ששתיהן מחזירות את אותן תוצאות, ומדפיס את הזמנים.
+
+הרצה:
+    python benchmarks/bench_analytics.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+
+
+def synthetic_training(years, sessions_per_day=2, seed=0):
+    """טבלת אימונים כמו בגיליון (הכל טקסט), כמה אימונים ביום לאורך כמה שנים"""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2022-01-01", periods=365 * years, freq="D")
+    dates = np.repeat(days, sessions_per_day)
+    n = len(dates)
+    hours = rng.integers(6, 23, n)
+    minutes = rng.integers(0, 60, n)
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Time": [f"{h:02d}:{m:02d}" for h, m in zip(hours, minutes)],
+        "Duration": np.round(rng.gamma(2.0, 0.5, n), 2).astype(str),
+        "StressLevel": rng.integers(1, 6, n).astype(str),
+        "Notes": "",
+    })
+
+
+# --- הגרסה הקודמת, כפי שהייתה בתוך maple_app.py ---
+def legacy_pipeline(df_all):
+    df_chart = df_all.copy()
+    df_chart['Duration'] = pd.to_numeric(df_chart['Duration'], errors='coerce')
+    df_chart['CleanDate'] = pd.to_datetime(df_chart['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    def parse_time(t):
+        t = str(t).strip().split('.')[0]
+        if t.lower() in ['nan', 'none', 'null', '']: return '12:00'
+        if len(t) >= 5 and ':' in t: return t[:5]
+        if len(t) == 4 and t.isdigit(): return f"{t[:2]}:{t[2:]}"
+        return '12:00'
+
+    time_series = df_chart['Time'].apply(parse_time)
+    df_chart['FullDate'] = pd.to_datetime(df_chart['CleanDate'] + ' ' + time_series, errors='coerce')
+    df_chart['Date'] = pd.to_datetime(df_chart['CleanDate'], errors='coerce')
+    df_chart = df_chart.dropna(subset=['FullDate', 'Duration']).sort_values('FullDate')
+    stress_col = 'StressLevel'
+    df_chart['Weighted_Duration'] = df_chart['Duration'] * (pd.to_numeric(df_chart[stress_col], errors='coerce').fillna(3) / 3.0)
+
+    daily = df_chart.groupby('Date')['Weighted_Duration'].sum().reset_index()
+    daily.set_index('Date', inplace=True)
+    daily = daily.resample('D').sum().fillna(0)
+
+    def calculate_intensity(window):
+        length = len(window)
+        weights = [0.5**(length - 1 - i) for i in range(length)]
+        return sum(w * val for w, val in zip(weights, window))
+
+    daily['Intensity'] = daily['Weighted_Duration'].rolling(window=7, min_periods=1).apply(calculate_intensity)
+    daily = daily.reset_index()
+    active_intensity = daily['Intensity'][daily['Intensity'] > 0.1]
+    q33 = active_intensity.quantile(0.33)
+    q90 = active_intensity.quantile(0.90)
+    return df_chart, daily, (q33, q90)
+
+
+def vectorized_pipeline(df_all):
+    sessions = analytics.training_sessions(df_all)
+    daily = analytics.daily_load(sessions)
+    return sessions, daily, analytics.intensity_bands(daily['Intensity'])
+
+
+def best_of(fn, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def check_same(legacy, vectorized):
+    (old_sessions, old_daily, old_bands), (new_sessions, new_daily, new_bands) = legacy, vectorized
+    assert old_sessions['FullDate'].tolist() == new_sessions['FullDate'].tolist()
+    np.testing.assert_allclose(old_sessions['Weighted_Duration'], new_sessions['Weighted_Duration'])
+    assert old_daily['Date'].tolist() == new_daily['Date'].tolist()
+    np.testing.assert_allclose(old_daily['Intensity'], new_daily['Intensity'], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(old_bands, new_bands, rtol=1e-9)
+
+
+def run(years_list=(1, 3, 5), repeat=5, include_legacy=True):
+    results = []
+    for years in years_list:
+        df = synthetic_training(years)
+        vec_ms, vec_result = best_of(vectorized_pipeline, df, repeat)
+        row = {"benchmark": "training_pipeline", "years": years, "rows": len(df),
+               "vectorized_ms": round(vec_ms, 2)}
+        if include_legacy:
+            legacy_ms, legacy_result = best_of(legacy_pipeline, df, 1)
+            check_same(legacy_result, vec_result)
+            row["legacy_ms"] = round(legacy_ms, 2)
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'years':>5} {'rows':>7} {'legacy ms':>10} {'vectorized ms':>14}")
+    for row in run():
+        print(f"{row['years']:>5} {row['rows']:>7} {row['legacy_ms']:>10.1f} {row['vectorized_ms']:>14.1f}")
@@ -0,0 +1,282 @@
+"""
+מדידת המסלולים החשובים של האפליקציה על יומן סינתטי - בלי גוגל ובלי st.secrets.
+
+גוגל שיטס מוחלף ב-fake_gspread (השהיה ו-429 מדומים), והנתונים מגיעים מ-synthetic.py.
+נמדדים:
+- get_data: טעינה ראשונה (cold), מהמטמון (warm), רענון דלתא אחרי שורה חדשה,
+  ובדיקת סימן השינוי כשאף אחד לא כתב (validate),
+- גרף האימונים: חישוב + בניית הגרף + המרה ל-JSON (מה שנשלח לדפדפן),
+- סיכומי התרגילים (task_analytics) וגרף המגמה השבועי,
+- smart_update עם N עריכות (השוואה + בקשת batch אחת + עדכון המטמון),
+- ריצה מלאה של הסקריפט דרך AppTest של Streamlit (על SQLite זמני).
+
+התוצאות יוצאות כ-JSON, כדי שאפשר יהיה להשוות בין גרסאות:
+    python benchmarks/bench_app.py --output results.json
+    python benchmarks/bench_app.py --sizes 1000 10000 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import figures  # noqa: E402
+import synthetic  # noqa: E402
+import task_analytics  # noqa: E402
+from cache import WorksheetCache, WorksheetSnapshot  # noqa: E402
+from fake_gspread import FakeGoogle  # noqa: E402
+from ratelimit import RetryPolicy, SheetsCaller, TokenBucket  # noqa: E402
+from sheet_diff import diff_frames  # noqa: E402
+from storage import SheetsBackend, SQLiteBackend  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "maple_app.py")
+WORKSHEETS = list(synthetic.HEADERS)
+SIZES = (1000, 10000, 100000)
+
+
+def make_backend(sheets, latency=0.0, error_rate=0.0):
+    """
+    SheetsBackend אמיתי מעל גוגל מדומה. המכסה גבוהה וההמתנות בין ניסיונות קצרות,
+    כדי שהמדידה תראה את עלות הקוד ולא את ההמתנה למכסה.
+    """
+    google = FakeGoogle(sheets, latency=latency, error_rate=error_rate)
+    caller = SheetsCaller(TokenBucket(rate_per_minute=60000),
+                          RetryPolicy(max_attempts=8, base_delay=0.01, max_delay=0.1))
+    return SheetsBackend(google.client, "https://fake/spreadsheet", caller=caller), google
+
+
+def best_of(fn, repeat, setup=None):
+    """הזמן הטוב ביותר (מילי-שניות) מתוך repeat ריצות; setup רץ לפני כל ריצה ולא נמדד"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        result = fn(arg) if setup else fn()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 2), result
+
+
+def record(benchmark, case, rows, ms, **extra):
+    return {"benchmark": benchmark, "case": case, "rows": rows, "ms": ms, **extra}
+
+
+# --- get_data ---
+
+def bench_get_data(rows, sheets, repeat, latency, error_rate):
+    results = []
+
+    def fresh():
+        google_backend = make_backend(sheets, latency, error_rate)
+        return WorksheetCache(google_backend[0], WORKSHEETS), google_backend[1]
+
+    def cold(arg):
+        cache, google = arg
+        cache.get("Training")
+        return google
+
+    ms, google = best_of(cold, repeat, setup=fresh)
+    results.append(record("get_data", "cold", rows, ms,
+                          api_calls=google.total_calls(), retries=google.errors))
+
+    cache, google = fresh()
+    cache.get("Training")
+    google.reset_counters()
+    ms, _ = best_of(lambda: cache.get("Training"), repeat)
+    results.append(record("get_data", "warm", rows, ms, api_calls=google.total_calls()))
+
+    # מכשיר אחר הוסיף שורה והמטמון פג תוקף: קוראים רק מהשורה האחרונה הידועה
+    def expire():
+        google.sheets["Training"].append(list(sheets["Training"][-1]))
+        cache.ttl = 0
+        google.reset_counters()
+
+    ms, _ = best_of(lambda _: cache.get("Training"), repeat, setup=expire)
+    results.append(record("get_data", "delta", rows, ms, api_calls=google.total_calls()))
+
+    # דשבורד שאף אחד לא נוגע בו: פג הזמן, אבל modifiedTime לא השתנה
+    backend, google = make_backend(sheets, latency)
+    cache = WorksheetCache(backend, WORKSHEETS, poll=10)
+    cache.get("Training")
+
+    def poll_expired():
+        for snap in cache._snapshots.values():
+            snap.loaded_at -= cache.poll
+        google.reset_counters()
+
+    ms, _ = best_of(lambda _: cache.get("Training"), repeat, setup=poll_expired)
+    results.append(record("get_data", "validate", rows, ms, api_calls=google.total_calls()))
+    return results
+
+
+# --- גרף האימונים ---
+
+def bench_chart(rows, sheets, repeat):
+    results = []
+    frame = WorksheetSnapshot("Training", sheets["Training"], 0).frame
+    for window in ("הכל", "חודש"):
+        ms, fig = best_of(lambda: figures.training_figure(frame, window), repeat)
+        json_ms, payload = best_of(fig.to_json, repeat)
+        results.append(record("training_chart", f"build:{window}", rows, ms))
+        results.append(record("training_chart", f"to_json:{window}", rows, json_ms,
+                              payload_kb=round(len(payload) / 1024, 1)))
+    return results
+
+
+# --- סיכומי התרגילים ---
+
+def bench_task_progress(rows, sheets, repeat):
+    tasks = WorksheetSnapshot("Tasks", sheets["Tasks"], 0).frame
+    logs = WorksheetSnapshot("TaskLogs", sheets["TaskLogs"], 0).frame
+    ms, progress = best_of(lambda: task_analytics.task_progress(tasks, logs), repeat)
+    fig_ms, fig = best_of(lambda: figures.task_trend_figure(progress.weekly, "הכל"), repeat)
+    return [
+        record("task_progress", "summary", rows, ms, tasks=len(progress.summary)),
+        record("task_progress", "trend_chart", rows, fig_ms,
+               payload_kb=round(len(fig.to_json()) / 1024, 1)),
+    ]
+
+
+# --- smart_update ---
+
+def bench_smart_update(rows, sheets, repeat, latency, edits=(1, 10, 100)):
+    results = []
+    backend, google = make_backend(sheets, latency)
+    cache = WorksheetCache(backend, WORKSHEETS)
+    for n in edits:
+        original = cache.get("Training").tail(n)
+        edited = original.assign(Notes=[f"עריכה {i}" for i in range(len(original))])
+
+        def save():
+            # כמו smart_update באפליקציה
+            diff = diff_frames(original, edited)
+            backend.apply_changes("Training", diff.updates, diff.deletes)
+            cache.apply_changes("Training", diff.updates, diff.deletes)
+
+        backend.worksheet("Training")  # ה-handle כבר שמור, כמו באפליקציה שרצה
+        google.reset_counters()
+        ms, _ = best_of(save, repeat)
+        results.append(record("smart_update", f"{n} edits", rows, ms,
+                              api_calls=google.total_calls() // max(1, repeat)))
+    return results
+
+
+# --- ריצה מלאה דרך AppTest ---
+
+def bench_apptest(rows, sheets, repeat):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "maple.db")
+        backend = SQLiteBackend(db_path)
+        for name, values in sheets.items():
+            backend.replace_all(name, values)
+
+        # המשאבים של האפליקציה (מנוע, מטמון, תור) נשמרים ברמת התהליך - מתחילים נקי
+        st.cache_resource.clear()
+        at = AppTest.from_file(APP, default_timeout=600)
+        at.secrets["storage"] = {"backend": "sqlite", "path": db_path,
+                                 "queue_path": os.path.join(tmp, "queue.db")}
+
+        start = time.perf_counter()
+        at.run()
+        cold_ms = round((time.perf_counter() - start) * 1000, 2)
+        if at.exception:
+            raise RuntimeError(f"האפליקציה נכשלה: {at.exception[0].value}")
+        results.append(record("apptest", "first run", rows, cold_ms))
+
+        ms, _ = best_of(at.run, repeat)
+        results.append(record("apptest", "rerun", rows, ms))
+
+        def switch_tab():
+            at.session_state["active_tab"] = "🦴 האכלות"
+            at.run()
+            at.session_state["active_tab"] = "🏃 הישארות לבד"
+            at.run()
+
+        ms, _ = best_of(switch_tab, repeat)
+        results.append(record("apptest", "tab switch x2", rows, ms))
+        st.cache_resource.clear()
+    return results
+
+
+def run(sizes=SIZES, repeat=3, latency=0.0, error_rate=0.0, apptest=True):
+    results = []
+    for rows in sizes:
+        sheets = synthetic.journal(rows)
+        results += bench_get_data(rows, sheets, repeat, latency, error_rate)
+        results += bench_chart(rows, sheets, repeat)
+        results += bench_task_progress(rows, sheets, repeat)
+        results += bench_smart_update(rows, sheets, repeat, latency)
+        if apptest:
+            results += bench_apptest(rows, sheets, repeat)
+    return results
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+    }
+
+
+def compare(results, baseline):
+    """מדפיס את היחס לתוצאות קודמות (מעל 1 = איטי יותר עכשיו)"""
+    before = {(r["benchmark"], r["case"], r["rows"]): r["ms"] for r in baseline["results"]}
+    print(f"{'benchmark':<16} {'case':<18} {'rows':>7} {'before':>10} {'now':>10} {'ratio':>6}",
+          file=sys.stderr)
+    for r in results:
+        old = before.get((r["benchmark"], r["case"], r["rows"]))
+        if old:
+            print(f"{r['benchmark']:<16} {r['case']:<18} {r['rows']:>7} {old:>10.1f} "
+                  f"{r['ms']:>10.1f} {r['ms'] / old:>6.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="השהיה מדומה לכל קריאת API")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="חלק הקריאות שמחזירות 429")
+    parser.add_argument("--no-apptest", action="store_true")
+    parser.add_argument("--output", help="קובץ JSON לתוצאות (ברירת מחדל: stdout)")
+    parser.add_argument("--compare", help="קובץ JSON מריצה קודמת להשוואה")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.latency_ms / 1000, args.error_rate,
+                  apptest=not args.no_apptest)
+    report = {"meta": metadata(args), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+תחליף בזיכרון ל-gspread, למדידות בלי חיבור לגוגל ובלי st.secrets.
+
+מממש רק את מה ש-SheetsBackend משתמש בו (open_by_url, worksheets, values_batch_get,
+batch_update, get_lastUpdateTime, get_all_values, get_values, append_rows, update,
+delete_rows, batch_clear, clear),
+ומדמה את מה שחשוב למדידה:
+- השהיה קבועה לכל קריאת API (latency),
+- 429 לחלק מהקריאות (error_rate), עם APIError אמיתי של gspread,
+- ספירת קריאות לפי סוג, כדי לראות כמה בקשות עולה כל פעולה.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from gspread.exceptions import APIError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import to_cell  # noqa: E402
+
+
+class FakeResponse:
+    """מספיק מתשובת requests כדי ש-APIError ו-ratelimit.status_code יעבדו"""
+
+    def __init__(self, status_code, message, status="RESOURCE_EXHAUSTED"):
+        self.status_code = status_code
+        self.text = message
+        self._error = {"code": status_code, "message": message, "status": status}
+
+    def json(self):
+        return {"error": self._error}
+
+
+def _column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+_A1 = re.compile(r"^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$")
+
+
+def parse_range(a1):
+    """
+    'Training'!A5:ZZZ / 'Training' / A2:F11 -> (שם גיליון או None, שורה ראשונה, שורה אחרונה, עמודה אחרונה).
+    שורה או עמודה אחרונה None = עד הסוף.
+    """
+    title, _, cells = a1.rpartition("!")
+    if not title:
+        title, cells = (a1, "") if a1.startswith("'") else (None, a1)
+    title = title.strip("'") if title else None
+    if not cells:
+        return title, 1, None, None
+    match = _A1.match(cells)
+    if match is None:
+        raise ValueError(f"טווח לא נתמך: {a1}")
+    _, first, last_col, last = match.groups()
+    return (title, int(first or 1), int(last) if last else None,
+            _column_number(last_col) if last_col else None)
+
+
+def _trim(row):
+    # כמו ה-API: תאים ריקים בסוף שורה לא חוזרים
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+class FakeGoogle:
+    """ה"שרת": מחזיק את הגיליונות, מונה קריאות ומדמה השהיה ושגיאות 429"""
+
+    def __init__(self, sheets, latency=0.0, error_rate=0.0, seed=0):
+        self.sheets = {name: [list(row) for row in rows] for name, rows in sheets.items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.errors = 0
+        self.modified = 0  # עולה בכל כתיבה, במקום modifiedTime של Drive
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def request(self, method):
+        with self._lock:
+            self.calls[method] += 1
+            fail = self.error_rate and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise APIError(FakeResponse(429, "Quota exceeded for quota metric 'Read requests'"))
+
+    def touch(self):
+        self.modified += 1
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors = 0
+
+    def client(self):
+        return FakeClient(self)
+
+
+class FakeClient:
+    def __init__(self, google):
+        self.google = google
+
+    def open_by_url(self, url):
+        self.google.request("open_by_url")
+        return FakeSpreadsheet(self.google)
+
+
+class FakeSpreadsheet:
+    def __init__(self, google):
+        self.google = google
+
+    def worksheets(self):
+        self.google.request("worksheets")
+        return [FakeWorksheet(self.google, title, i) for i, title in enumerate(self.google.sheets)]
+
+    def values_batch_get(self, ranges):
+        self.google.request("values_batch_get")
+        value_ranges = []
+        for a1 in ranges:
+            title, first, last, width = parse_range(a1)
+            if title not in self.google.sheets:
+                # כמו גוגל: לשונית אחת שלא קיימת מפילה את כל הבקשה
+                raise APIError(FakeResponse(400, f"Unable to parse range: {a1}", "INVALID_ARGUMENT"))
+            rows = self.google.sheets[title][first - 1:last]
+            value_ranges.append({"range": a1, "values": [_trim(row[:width]) for row in rows]})
+        return {"valueRanges": value_ranges}
+
+    def get_lastUpdateTime(self):
+        self.google.request("get_lastUpdateTime")
+        return f"2024-01-01T00:00:00.{self.google.modified:06d}Z"
+
+    def batch_update(self, body):
+        self.google.request("batch_update")
+        self.google.touch()
+        titles = list(self.google.sheets)
+        for request in body["requests"]:
+            if "updateCells" in request:
+                update = request["updateCells"]
+                rows = self.google.sheets[titles[update["start"]["sheetId"]]]
+                row_index = update["start"]["rowIndex"]
+                column = update["start"].get("columnIndex", 0)
+                values = [_cell_text(cell) for cell in update["rows"][0]["values"]]
+                while len(rows) <= row_index:
+                    rows.append([])
+                # כמו ה-API: רק התאים שבבקשה, מהעמודה שבה היא מתחילה
+                target = rows[row_index]
+                target.extend([""] * (column + len(values) - len(target)))
+                target[column:column + len(values)] = values
+            elif "deleteDimension" in request:
+                span = request["deleteDimension"]["range"]
+                del self.google.sheets[titles[span["sheetId"]]][span["startIndex"]:span["endIndex"]]
+            else:
+                raise ValueError(f"בקשה לא נתמכת: {list(request)}")
+        return {}
+
+
+def _cell_text(cell):
+    value = cell.get("userEnteredValue", {})
+    if "boolValue" in value:
+        return "TRUE" if value["boolValue"] else "FALSE"
+    if "numberValue" in value:
+        return to_cell(value["numberValue"])
+    return value.get("stringValue", "")
+
+
+class FakeWorksheet:
+    def __init__(self, google, title, sheet_id):
+        self.google = google
+        self.title = title
+        self.id = sheet_id
+
+    @property
+    def _rows(self):
+        return self.google.sheets[self.title]
+
+    def get_all_values(self):
+        self.google.request("get_all_values")
+        width = max((len(row) for row in self._rows), default=0)
+        return [(list(row) + [""] * width)[:width] for row in self._rows]
+
+    def get_values(self, range_name=None):
+        self.google.request("get_values")
+        _, first, last, width = parse_range(range_name or self.title)
+        rows = self._rows[first - 1:last]
+        # כמו ה-API: לא יותר עמודות ממה שיש בהן נתונים
+        extent = max((len(_trim(row)) for row in rows), default=0)
+        width = min(width or extent, extent)
+        return [(list(row) + [""] * width)[:width] for row in rows]
+
+    def append_row(self, values):
+        self.google.request("append_row")
+        self.google.touch()
+        self._rows.append([to_cell(v) for v in values])
+
+    def append_rows(self, values):
+        self.google.request("append_rows")
+        self.google.touch()
+        self._rows.extend([to_cell(v) for v in row] for row in values)
+
+    def update(self, values=None, range_name=None):
+        self.google.request("update")
+        self.google.touch()
+        # gspread 6: update(values, range_name) / update(range_name=..., values=...)
+        # כמו ה-API: נכתבים רק התאים שבטווח, מהעמודה הראשונה שלו
+        first = parse_range(range_name)[1] if range_name else 1
+        column = _column_number(_A1.match(range_name).group(1)) - 1 if range_name else 0
+        rows = self._rows
+        for offset, row in enumerate(values):
+            while len(rows) < first + offset:
+                rows.append([])
+            target = rows[first - 1 + offset]
+            target.extend([""] * (column + len(row) - len(target)))
+            target[column:column + len(row)] = [to_cell(v) for v in row]
+
+    def delete_rows(self, start_index, end_index=None):
+        self.google.request("delete_rows")
+        self.google.touch()
+        del self._rows[start_index - 1:end_index or start_index]
+
+    def batch_clear(self, ranges):
+        self.google.request("batch_clear")
+        self.google.touch()
+        rows = self._rows
+        for a1 in ranges:
+            match = _A1.match(a1)
+            first_col, first, _, last = match.groups()
+            first_col = _column_number(first_col)
+            for row in rows[int(first or 1) - 1:int(last) if last else None]:
+                del row[first_col - 1:]
+        # כמו ה-API: שורות ריקות בסוף לא חוזרות בקריאה
+        while rows and not _trim(rows[-1]):
+            rows.pop()
+
+    def clear(self):
+        self.google.request("clear")
+        self.google.touch()
+        self._rows.clear()
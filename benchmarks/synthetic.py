@@ -0,0 +1,106 @@
+"""
+מחולל יומן סינתטי: כל ארבעת הגיליונות, כטקסט, כמו שהם חוזרים מגוגל שיטס.
+
+הנתונים "מלוכלכים" כמו בגיליון האמיתי: שעות בפורמטים שונים (1100, 14:43:46.217,
+ריק), מדד לחץ חסר לפעמים, סוגי ארוחות ושמות תרגילים בעברית, ותדירויות בטקסט חופשי.
+"""
+import numpy as np
+import pandas as pd
+
+HEADERS = {
+    "Training": ["Date", "Time", "Duration", "StressLevel", "Notes"],
+    "Feeding": ["Date", "Time", "Type", "Amount", "Finished", "Notes"],
+    "Tasks": ["TaskName", "Frequency", "Description", "Status"],
+    "TaskLogs": ["Date", "TaskName", "Success", "Notes"],
+}
+
+TASKS = [
+    ("שב", "פעמיים ביום", "לחכות לשחרור", "Active"),
+    ("ארצה", "פעם ביום", "", "Active"),
+    ("הישאר", "3 פעמים בשבוע", "להגדיל מרחק בהדרגה", "Active"),
+    ("בוא", "כל יום", "", "Active"),
+    ("מקום", "פעם בשבוע", "על השטיח בסלון", "Active"),
+    ("עזוב", "פעמיים בשבוע", "", "Active"),
+    ("הליכה ברצועה", "פעמיים ביום", "", "Active"),
+    ("תן כף", "פעם ביום", "", "Inactive"),
+]
+
+NOTES = ["", "", "", "", "רגועה", "נבחה קצת", "שכבה ליד הדלת", "אכלה לאט"]
+
+
+def _dates(rows, per_day, start):
+    days = pd.date_range(start, periods=max(1, -(-rows // per_day)), freq="D")
+    return np.repeat(days, per_day)[:rows].strftime("%Y-%m-%d")
+
+
+def _times(rng, rows):
+    hours = rng.integers(6, 23, rows)
+    minutes = rng.integers(0, 60, rows)
+    times = np.array([f"{h:02d}:{m:02d}" for h, m in zip(hours, minutes)], dtype=object)
+    # כמה פורמטים שמופיעים בגיליון האמיתי
+    kinds = rng.random(rows)
+    compact = kinds < 0.03
+    times[compact] = [t.replace(":", "") for t in times[compact]]
+    with_seconds = (kinds >= 0.03) & (kinds < 0.05)
+    times[with_seconds] = [t + ":46.217" for t in times[with_seconds]]
+    times[(kinds >= 0.05) & (kinds < 0.06)] = ""
+    return times
+
+
+def training(rows, rng, start="2020-01-01"):
+    stress = rng.integers(1, 6, rows).astype(str).astype(object)
+    stress[rng.random(rows) < 0.05] = ""
+    return [HEADERS["Training"]] + [
+        list(row) for row in zip(
+            _dates(rows, 2, start),
+            _times(rng, rows),
+            np.round(rng.gamma(2.0, 0.5, rows), 2).astype(str),
+            stress,
+            rng.choice(NOTES, rows),
+        )
+    ]
+
+
+def feeding(rows, rng, start="2020-01-01"):
+    return [HEADERS["Feeding"]] + [
+        list(row) for row in zip(
+            _dates(rows, 2, start),
+            _times(rng, rows),
+            rng.choice(["בוקר", "ערב", "אחר"], rows, p=[0.48, 0.48, 0.04]),
+            rng.choice(["0.75", "1", "1.25"], rows),
+            rng.choice(["כן", "לא"], rows, p=[0.85, 0.15]),
+            rng.choice(NOTES, rows),
+        )
+    ]
+
+
+def tasks():
+    return [HEADERS["Tasks"]] + [list(task) for task in TASKS]
+
+
+def task_logs(rows, rng, start="2020-01-01"):
+    names = [task[0] for task in TASKS]
+    return [HEADERS["TaskLogs"]] + [
+        list(row) for row in zip(
+            _dates(rows, 3, start),
+            rng.choice(names, rows),
+            rng.integers(1, 6, rows).astype(str),
+            rng.choice(NOTES, rows),
+        )
+    ]
+
+
+def journal(rows, seed=0):
+    """
+    יומן שלם: שם גיליון -> שורות (כותרות + נתונים).
+    rows שורות באימונים, בהאכלות וביומן הביצועים; רשימת התרגילים קבועה.
+    """
+    rng = np.random.default_rng(seed)
+    sheets = {
+        "Training": training(rows, rng),
+        "Feeding": feeding(rows, rng),
+        "Tasks": tasks(),
+        "TaskLogs": task_logs(rows, rng),
+    }
+    # טקסט פייתון רגיל (לא numpy.str_), כמו שחוזר מה-API
+    return {name: [[str(v) for v in row] for row in values] for name, values in sheets.items()}
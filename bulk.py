@@ -0,0 +1,240 @@
+"""
+ייבוא וייצוא בכמויות, בלי שורה-שורה ובלי לנקות גיליון.
+
+ייבוא (BulkImport):
+- כל שורה נבדקת מול הסכמה של הגיליון (validate): תאריך חובה, מספרים תקינים,
+  והעמודות מסודרות לפי הסדר של הגיליון. שורה לא תקינה לא נכתבת, וחוזרת ברשימת השגיאות.
+- הכתיבה ב-append_rows בנתחים לפי מספר תאים לבקשה, כך ש-50 אלף שורות הן עשרות בקשות
+  ולא עשרות אלפים. ההמתנה למכסה ו-429 מטופלים במנוע האחסון (ratelimit.py).
+- ההתקדמות נשמרת בקובץ קטן אחרי כל נתח. ייבוא שנקטע ממשיך מאותו מקום, ושורות
+  שכבר נכתבו לא נכתבות שוב: המזהה (ID) של כל שורה נגזר מהקובץ ומהמיקום בו,
+  ולפני הכתיבה בודקים אילו מזהים כבר קיימים בגיליון.
+
+ייצוא (export_csv / export_parquet): הגיליון נקרא בעמודים של read_range ונכתב
+לקובץ תוך כדי, כך שגם גיליון גדול לא נטען לזיכרון בבת אחת.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+import schema
+from cache import _fit
+from rowids import KEYED
+from schema import ID_COLUMN
+from storage import to_cell
+
+log = logging.getLogger(__name__)
+
+CELLS_PER_REQUEST = 10000  # תאים לבקשת append_rows אחת
+EXPORT_PAGE_ROWS = 5000
+
+
+def source_id(data):
+    """טביעת אצבע של קובץ המקור (bytes), לזיהוי ייבוא שנקטע"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def chunk_rows(width, cells=CELLS_PER_REQUEST):
+    return max(1, cells // max(1, width))
+
+
+# --- בדיקה מול הסכמה ---
+
+class RowError:
+    def __init__(self, line, message):
+        self.line = line  # מספר השורה בקובץ (1 = הכותרות)
+        self.message = message
+
+    def __repr__(self):
+        return f"RowError({self.line}, {self.message!r})"
+
+
+def header_of(worksheet_name):
+    return [column.name for column in schema.SCHEMAS[worksheet_name]]
+
+
+def validate(worksheet_name, frame, source=""):
+    """
+    טבלת טקסט (למשל מ-CSV) -> (שורות לכתיבה לפי סדר העמודות בגיליון, [RowError...]).
+    עמודה חסרה נכתבת ריקה; עמודה שלא בסכמה לא נכתבת.
+    """
+    frame = schema.resolve_aliases(worksheet_name, frame.fillna("").astype(str))
+    header = header_of(worksheet_name)
+    missing = [c.name for c in schema.SCHEMAS[worksheet_name]
+               if c.kind == schema.DATE and c.name not in frame.columns]
+    if missing:
+        return [], [RowError(1, f"חסרה עמודה: {', '.join(missing)}")]
+
+    raw = frame.reindex(columns=header, fill_value="")
+    typed = schema.normalize(worksheet_name, raw.copy())
+    bad = pd.Series("", index=frame.index)
+    for column in schema.SCHEMAS[worksheet_name]:
+        filled = raw[column.name].str.strip() != ""
+        if column.kind == schema.DATE:
+            bad = bad.mask(typed[column.name].isna() & (bad == ""), f"תאריך לא תקין ב-{column.name}")
+        elif column.kind in (schema.FLOAT, schema.SMALL_INT):
+            bad = bad.mask(filled & typed[column.name].isna() & (bad == ""),
+                           f"מספר לא תקין ב-{column.name}")
+
+    # תאריך תמיד כ-YYYY-MM-DD; שאר התאים כמו שהם בקובץ
+    cells = raw.apply(lambda c: c.str.strip())
+    for column in schema.SCHEMAS[worksheet_name]:
+        if column.kind == schema.DATE:
+            cells[column.name] = typed[column.name].dt.strftime('%Y-%m-%d').fillna("")
+    if worksheet_name in KEYED and ID_COLUMN in header:
+        positions = pd.Series(range(len(cells)), index=cells.index)
+        no_id = cells[ID_COLUMN] == ""
+        cells.loc[no_id, ID_COLUMN] = [_stable_id(source, p) for p in positions[no_id]]
+
+    ok = (bad == "").to_numpy()
+    errors = [RowError(line, message)
+              for line, message in zip(range(2, len(bad) + 2), bad) if message]
+    return cells[ok].to_numpy().tolist(), errors
+
+
+def _stable_id(source, position):
+    # אותו קובץ ואותה שורה -> אותו מזהה, כדי שייבוא חוזר לא ייצור כפילויות
+    return hashlib.sha1(f"{source}:{position}".encode()).hexdigest()[:12]
+
+
+# --- ייבוא ---
+
+class BulkImport:
+    """
+    rows: שורות שעברו validate. progress_path: קובץ JSON עם ההתקדמות.
+    on_chunk(rows): נקרא אחרי כל נתח שנכתב (למשל cache.apply_append).
+    """
+
+    def __init__(self, backend, worksheet_name, rows, source, progress_path,
+                 chunk_size=None, on_chunk=None):
+        self.backend = backend
+        self.worksheet_name = worksheet_name
+        self.rows = rows
+        self.source = source
+        self.progress_path = progress_path
+        width = max((len(row) for row in rows), default=1)
+        self.chunk_size = chunk_size or chunk_rows(width)
+        self.on_chunk = on_chunk
+
+    def _load_progress(self):
+        try:
+            with open(self.progress_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if saved.get("source") != self.source or saved.get("worksheet") != self.worksheet_name:
+            return 0
+        return int(saved.get("done", 0))
+
+    def _save_progress(self, done):
+        tmp = f"{self.progress_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "worksheet": self.worksheet_name,
+                       "done": done, "total": len(self.rows)}, f)
+        os.replace(tmp, self.progress_path)  # אטומי: אין קובץ התקדמות חצי-כתוב
+
+    def _sheet(self):
+        # קריאה אחת של הגיליון: הכותרות שלו בפועל והמזהים שכבר קיימים בו
+        rows = self.backend.read_all(self.worksheet_name)
+        if not rows:
+            header = header_of(self.worksheet_name)
+            self.backend.ensure_worksheet(self.worksheet_name, header)
+            return header, set()
+        header = list(schema.resolve_aliases(self.worksheet_name, pd.DataFrame(columns=rows[0])).columns)
+        if ID_COLUMN not in header:
+            return header, set()
+        column = header.index(ID_COLUMN)
+        return header, {row[column] for row in rows[1:] if len(row) > column and row[column]}
+
+    def run(self, progress=None):
+        """כותב את מה שעוד לא נכתב; progress(done, total) אחרי כל נתח. מחזיר כמה שורות נכתבו"""
+        sheet_header, existing = self._sheet()
+        # השורות מסודרות לפי הסכמה; בגיליון ישן סדר העמודות יכול להיות אחר
+        positions = {name: i for i, name in enumerate(header_of(self.worksheet_name))}
+        order = [positions.get(name) for name in sheet_header]
+        id_position = positions.get(ID_COLUMN)
+        done = self._load_progress()
+        written = 0
+        while done < len(self.rows):
+            chunk = [row for row in self.rows[done:done + self.chunk_size]
+                     if id_position is None or row[id_position] not in existing]
+            if chunk:
+                chunk = [[row[i] if i is not None else "" for i in order] for row in chunk]
+                self.backend.append_rows(self.worksheet_name, chunk)
+                written += len(chunk)
+                if self.on_chunk:
+                    self.on_chunk(chunk)
+            done = min(len(self.rows), done + self.chunk_size)
+            self._save_progress(done)
+            if progress:
+                progress(done, len(self.rows))
+        log.info("ייבוא ל-%s הסתיים: %d שורות חדשות", self.worksheet_name, written)
+        return written
+
+
+# --- ייצוא ---
+
+def export_pages(backend, worksheet_name, page_rows=EXPORT_PAGE_ROWS):
+    """מחזיר (כותרות, מחולל של עמודי שורות) - כל עמוד בקריאת טווח אחת"""
+    first = backend.read_range(worksheet_name, 1, 1)
+    header = list(first[0]) if first else []
+
+    def pages():
+        start = 2
+        while header:
+            rows = backend.read_range(worksheet_name, start, start + page_rows - 1,
+                                      width=len(header))
+            if rows:
+                yield [_fit(row, len(header)) for row in rows]
+            if len(rows) < page_rows:
+                return
+            start += page_rows
+
+    return header, pages()
+
+
+def export_csv(backend, worksheet_name, out, page_rows=EXPORT_PAGE_ROWS):
+    """כותב את הגיליון ל-out (קובץ טקסט פתוח) כ-CSV; מחזיר מספר שורות"""
+    header, pages = export_pages(backend, worksheet_name, page_rows)
+    writer = csv.writer(out)
+    writer.writerow(header)
+    count = 0
+    for rows in pages:
+        writer.writerows([[to_cell(v) for v in row] for row in rows])
+        count += len(rows)
+    return count
+
+
+def export_parquet(backend, worksheet_name, path, page_rows=EXPORT_PAGE_ROWS):
+    """כותב את הגיליון ל-Parquet עם טיפוסים לפי הסכמה; מחזיר מספר שורות"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("לייצוא Parquet צריך את pyarrow (pip install pyarrow)")
+
+    header, pages = export_pages(backend, worksheet_name, page_rows)
+    writer, count = None, 0
+    try:
+        for rows in pages:
+            frame = schema.normalize(worksheet_name, pd.DataFrame(rows, columns=header))
+            # קטגוריות כטקסט: לכל עמוד רשימת קטגוריות אחרת, והסכמה של הקובץ חייבת להיות אחת
+            frame = frame.apply(lambda c: c.astype(str) if isinstance(c.dtype, pd.CategoricalDtype) else c)
+            table = pa.Table.from_pandas(frame, preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            count += len(rows)
+        if writer is None:
+            # גיליון ריק: קובץ עם העמודות בלבד
+            frame = schema.normalize(worksheet_name, pd.DataFrame(columns=header))
+            pq.write_table(pa.Table.from_pandas(frame.astype(str), preserve_index=False), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
@@ -0,0 +1,520 @@
+"""
+זיכרון מטמון לגיליונות של היומן.
+
+לכל גיליון נשמרת תמונת מצב: הטבלה (DataFrame), מספר השורות הידוע
+והשורה האחרונה שראינו. כשפג התוקף לא מורידים שוב את כל ההיסטוריה -
+קוראים רק מהשורה האחרונה הידועה והלאה (סנכרון דלתא).
+השורה האחרונה נקראת שוב כ"חפיפה": אם היא השתנתה או נעלמה, סימן שמחקו
+או ערכו שורות בגיליון, ורק אז טוענים את הגיליון כולו מחדש.
+עריכה של שורה באמצע הגיליון לא נראית בחפיפה, ולכן כל full_every שניות
+הגיליון נקרא במלואו. כשלמנוע יש סימן שינוי נפרד לכל גיליון (worksheet_tokens,
+למשל SQLite), סימן שזז בלי שורות חדשות הוא עריכה, והגיליון נקרא במלואו מיד.
+modifiedTime של גוגל משותף לכל הקובץ וזז בכל כתיבה (גם שלנו), ולכן שם הוא
+רק סיבה לדלתא - אחרת כל ארוחה שנשמרה הייתה מורידה מחדש את כל הלשוניות.
+
+כל הגיליונות שפג תוקפם נטענים יחד בבקשה אחת (read_many),
+כך שטעינה ראשונה של הדף עולה קריאה אחת במקום ארבע.
+
+לכל תמונת מצב יש מספר גרסה שעולה בכל שינוי בטבלה. הגרפים נשמרים לפי
+הגרסה הזו, ונבנים מחדש רק כשהנתונים באמת השתנו.
+
+כשהמנוע יודע לתת סימן שינוי זול (change_tokens - למשל modifiedTime של הקובץ
+ב-Drive), המטמון לא מסתמך רק על זמן: כל poll שניות בודקים את הסימן בקריאה
+קטנה אחת, וכל עוד הוא לא השתנה הטבלה נשארת כמו שהיא בלי הגבלת זמן.
+כשהוא משתנה (גם מעריכה בטלפון או ישירות בגיליון) קוראים מיד.
+
+מי שמחזיק חישוב שמתעדכן בהדרגה (למשל aggregates.TrainingAggregator) נרשם
+ב-subscribe ומקבל CacheEvent על כל שינוי: אילו שורות נוספו ואילו הוסרו.
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+import diagnostics
+import schema
+from storage import to_cell
+
+log = logging.getLogger(__name__)
+
+
+def rows_to_frame(rows):
+    """רשימת שורות מהגיליון (כותרות + נתונים) -> DataFrame"""
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def _trim(row):
+    # גוגל משמיט תאים ריקים בסוף שורה, לכן משווים בלי הזנב הריק
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _fit(row, width):
+    return (list(row) + [""] * width)[:width]
+
+
+# kind: "append" (added = השורות החדשות), "change" (removed = הערכים הישנים של שורות
+# שנערכו או נמחקו, added = הערכים החדשים) או "reset" (טעינה מלאה / ניקוי - צריך לבנות מחדש).
+# previous היא הגרסה שלפני השינוי, כדי שמנוי יזהה שפספס אירוע.
+CacheEvent = namedtuple("CacheEvent", "worksheet kind version previous added removed")
+
+# מונה אחד לכל הגיליונות, כך שגם תמונת מצב חדשה (טעינה מלאה) מקבלת גרסה שלא הייתה
+_versions = itertools.count(1)
+
+
+class WorksheetSnapshot:
+    """
+    הטבלה נשמרת מוקלדת (ראו schema.py): ההמרה מטקסט נעשית פעם אחת בטעינה,
+    ושורות חדשות מומרות לבד לפני שמצרפים אותן.
+    """
+
+    def __init__(self, worksheet_name, rows, loaded_at):
+        self.worksheet_name = worksheet_name
+        self.header = list(rows[0]) if rows else []
+        with diagnostics.span("cache.normalize", worksheet=worksheet_name):
+            self.frame = schema.normalize(worksheet_name, rows_to_frame(rows))
+        self.row_count = len(rows)  # כולל שורת הכותרות, כמו מספור הגיליון
+        self.last_row = list(rows[-1]) if rows else []
+        self.loaded_at = loaded_at  # מתי נטען או אומת מול סימן השינוי לאחרונה
+        self.full_loaded_at = loaded_at  # מתי נקרא במלואו (דלתא לא מזיזה את זה)
+        self.token = None           # סימן השינוי של המנוע בזמן הקריאה
+        self.version = next(_versions)
+        self._ids = None            # מזהה שורה -> מספר שורה (נבנה בפעם הראשונה שצריך)
+        self._size = (None, 0)      # (גרסה, בתים) - החישוב המדויק יקר, אז שומרים אותו
+
+    def _touch(self):
+        self.version = next(_versions)
+
+    def memory_bytes(self):
+        if self._size[0] != self.version:
+            self._size = (self.version, int(self.frame.memory_usage(index=True, deep=True).sum()))
+        return self._size[1]
+
+    def row_of(self, row_id):
+        """מספר השורה הנוכחי של מזהה (עמודת ID), או None"""
+        if self._ids is None:
+            self._ids = {}
+            if schema.ID_COLUMN in self.frame.columns:
+                column = self.frame[schema.ID_COLUMN]
+                self._ids = {row_id: int(idx) + 2 for idx, row_id in column.items() if row_id}
+        return self._ids.get(row_id)
+
+    def id_of(self, row):
+        """המזהה של שורת טקסט לפי מקום עמודת ID בכותרות (או None)"""
+        if schema.ID_COLUMN not in self.header:
+            return None
+        return _fit(row, len(self.header))[self.header.index(schema.ID_COLUMN)] or None
+
+    def _rows_frame(self, rows, first_row=None):
+        # שורות חדשות מקבלות את האינדקס שאחרי הקיימות (מספר שורה פחות 2)
+        width = len(self.header)
+        rows = [_fit(row, width) for row in rows]
+        start = (self.row_count + 1 if first_row is None else first_row) - 2
+        frame = pd.DataFrame(rows, columns=self.header,
+                             index=pd.RangeIndex(start, start + len(rows)))
+        with diagnostics.span("cache.normalize", worksheet=self.worksheet_name):
+            return schema.normalize(self.worksheet_name, frame)
+
+    def extend(self, new_rows, loaded_at=None):
+        """מצרף שורות בסוף; מחזיר אותן כטבלה מוקלדת (או None אם לא היו)"""
+        if loaded_at is not None:
+            self.loaded_at = loaded_at
+        if not new_rows:
+            return None
+        width = len(self.header)
+        new_rows = [_fit(row, width) for row in new_rows]
+        added = self._rows_frame(new_rows)
+        if self._ids is not None and schema.ID_COLUMN in added.columns:
+            # שורות חדשות לא מזיזות את הקיימות - רק מוסיפים אותן לאינדקס
+            self._ids.update((row_id, int(idx) + 2)
+                             for idx, row_id in added[schema.ID_COLUMN].items() if row_id)
+        self.frame = schema.concat([self.frame, added])
+        self.row_count += len(new_rows)
+        self.last_row = new_rows[-1]
+        self._touch()
+        return added
+
+    def frame_with(self, extra_rows):
+        """עותק של הטבלה, עם שורות שעוד לא נכתבו לגיליון (מתור הכתיבה) בסופה"""
+        if not extra_rows or not self.header:
+            return self.frame.copy()
+        extra = self._rows_frame([[to_cell(v) for v in row] for row in extra_rows])
+        return schema.concat([self.frame, extra])
+
+    def patch(self, row_num, values):
+        """
+        עורך שורה (None = התא לא השתנה); מחזיר (הערכים הישנים, החדשים) כטבלאות
+        מוקלדות, או None
+        """
+        idx = row_num - 2
+        if idx not in self.frame.index:
+            return None
+        old = self.frame.loc[[idx]]
+        if any(v is None for v in values):
+            # לשורה האחרונה יש לנו את הטקסט המקורי; לשאר - הערכים המוקלדים כטקסט
+            current = self.last_row if row_num == self.row_count else schema.to_cells(old.iloc[0])
+            values = [c if v is None else v for v, c in zip(_fit(values, len(self.header)),
+                                                             _fit(current, len(self.header)))]
+        values = _fit(values, len(self.header))
+        new = self._rows_frame([values], first_row=row_num)
+        if schema.ID_COLUMN in new.columns and self.row_of(new[schema.ID_COLUMN].iloc[0]) != row_num:
+            self._ids = None  # המזהה של השורה השתנה
+        self.frame = schema.assign_row(self.frame, idx, new)
+        if row_num == self.row_count:
+            self.last_row = values
+        self._touch()
+        return old, new
+
+    def drop(self, row_nums):
+        """מוחק שורות; מחזיר את השורות שנמחקו כטבלה מוקלדת"""
+        positions = [p for p in (row_num - 2 for row_num in row_nums) if p in self.frame.index]
+        dropped = self.frame.loc[positions]
+        self.frame = self.frame.drop(index=positions)
+        self.frame = self.frame.reset_index(drop=True)  # האינדקס נשאר "מספר שורה פחות 2"
+        self._ids = None  # השורות שאחרי המחיקה זזו
+        self.row_count = len(self.frame) + 1
+        self.last_row = schema.to_cells(self.frame.iloc[-1]) if len(self.frame) else self.header
+        self._touch()
+        return dropped
+
+
+class WorksheetCache:
+    """
+    ttl: כמה זמן טבלה נחשבת עדכנית כשאין סימן שינוי.
+    poll: כל כמה שניות לבדוק את סימן השינוי (None = לא בודקים, רק ttl).
+    full_every: אחרי כמה שניות רענון הוא קריאה מלאה ולא דלתא, כדי לתפוס עריכות
+    בשורות שלפני האחרונה.
+    """
+
+    def __init__(self, backend, worksheet_names=(), ttl=60, poll=None, full_every=600):
+        self.backend = backend
+        self.worksheet_names = list(worksheet_names)
+        self.ttl = ttl
+        self.poll = poll
+        self.full_every = full_every
+        self._lock = threading.RLock()
+        self._snapshots = {}  # שם גיליון -> WorksheetSnapshot
+        self._listeners = {}  # שם גיליון -> רשימת פונקציות שמקבלות CacheEvent
+
+    # --- מנויים לשינויים ---
+
+    def subscribe(self, worksheet_name, listener):
+        """listener(event) נקרא אחרי כל שינוי בגיליון, בתוך נעילת המטמון - צריך להיות קצר"""
+        with self._lock:
+            self._listeners.setdefault(worksheet_name, []).append(listener)
+
+    def _publish(self, worksheet_name, kind, previous, added=None, removed=None):
+        listeners = self._listeners.get(worksheet_name)
+        if not listeners:
+            return
+        snap = self._snapshots.get(worksheet_name)
+        event = CacheEvent(worksheet_name, kind, snap.version if snap is not None else 0,
+                           previous, added, removed)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                # מנוי שנכשל לא מפיל את הקריאה או את השמירה
+                log.exception("מנוי למטמון נכשל (%s)", worksheet_name)
+
+    def _replace_snapshot(self, worksheet_name, snap):
+        previous = self.version(worksheet_name)
+        self._snapshots[worksheet_name] = snap
+        self._publish(worksheet_name, "reset", previous)
+
+    def _is_fresh(self, worksheet_name, now):
+        snap = self._snapshots.get(worksheet_name)
+        if snap is None:
+            return False
+        limit = self.poll if self.poll and snap.token is not None else self.ttl
+        return now - snap.loaded_at < limit
+
+    def stale(self, worksheet_names=None):
+        now = time.monotonic()
+        with self._lock:
+            return [name for name in (worksheet_names or self.worksheet_names)
+                    if not self._is_fresh(name, now)]
+
+    def refresh(self, worksheet_names):
+        """
+        מרענן גיליונות שפג תוקפם: קודם בודקים את סימן השינוי (קריאה אחת לכולם),
+        ורק גיליונות שהסימן שלהם השתנה נקראים מחדש.
+        """
+        if not worksheet_names:
+            return
+        tokens = self.backend.change_tokens(worksheet_names) if self.poll else None
+        if tokens is None:
+            self.load(worksheet_names)
+            return
+        now = time.monotonic()
+        changed = []
+        with self._lock:
+            for name in worksheet_names:
+                snap = self._snapshots.get(name)
+                if snap is not None and snap.token is not None and snap.token == tokens.get(name):
+                    diagnostics.count("cache_validated", worksheet=name)
+                    snap.loaded_at = now
+                else:
+                    changed.append(name)
+        self.load(changed, tokens)
+
+    def load(self, worksheet_names, tokens=None):
+        """
+        מרענן את הגיליונות שביקשו בבקשה אחת:
+        גיליון שכבר יש לו תמונת מצב נקרא רק מהשורה האחרונה הידועה,
+        וגיליון חדש נקרא במלואו.
+        tokens: סימני השינוי שנקראו לפני הקריאה (נשמרים בתמונות המצב). כשהסימנים
+        נפרדים לכל גיליון, גיליון שקיבל סימן חדש והדלתא שלו ריקה נקרא במלואו.
+        """
+        if not worksheet_names:
+            return
+        now = time.monotonic()
+        with self._lock:
+            start_rows = {}
+            for name in worksheet_names:
+                snap = self._snapshots.get(name)
+                if snap is None or snap.row_count <= 0:
+                    continue
+                if now - snap.full_loaded_at >= self.full_every:
+                    diagnostics.count("cache_periodic_reload", worksheet=name)
+                    continue
+                start_rows[name] = snap.row_count
+        values = self.backend.read_many(list(worksheet_names), start_rows)
+        now = time.monotonic()
+
+        edited = bool(tokens) and self.backend.worksheet_tokens
+        full_reload = []
+        with self._lock:
+            for name, rows in values.items():
+                snap = self._snapshots.get(name)
+                if name not in start_rows or snap is None:
+                    diagnostics.count("cache_full_load", worksheet=name)
+                    self._replace_snapshot(name, WorksheetSnapshot(name, rows, now))
+                elif rows and _trim(rows[0]) == _trim(snap.last_row) and (len(rows) > 1 or not edited):
+                    # השורה האחרונה לא זזה - כל מה שאחריה הוא שורות חדשות
+                    diagnostics.count("cache_delta_load", worksheet=name)
+                    diagnostics.count("cache_delta_rows", len(rows) - 1, worksheet=name)
+                    previous = snap.version
+                    added = snap.extend(rows[1:], now)
+                    if added is not None:
+                        self._publish(name, "append", previous, added=added)
+                else:
+                    # הגיליון התקצר או שערכו בו שורה - טוענים הכל מחדש. גם סימן של הגיליון
+                    # שזז בלי שורות חדשות פירושו עריכה (אולי באמצע, שהחפיפה לא רואה)
+                    diagnostics.count("cache_full_reload", worksheet=name)
+                    full_reload.append(name)
+
+        if full_reload:
+            values = self.backend.read_many(full_reload)
+            with self._lock:
+                for name, rows in values.items():
+                    self._replace_snapshot(name, WorksheetSnapshot(name, rows, now))
+
+        if tokens:
+            # הסימן נקרא לפני הנתונים: אם מישהו כתב בינתיים, הבדיקה הבאה תראה סימן חדש
+            with self._lock:
+                for name in worksheet_names:
+                    if name in self._snapshots:
+                        self._snapshots[name].token = tokens.get(name)
+
+    def reload(self, worksheet_name):
+        """
+        קורא גיליון במלואו, בלי דלתא ובלי לבדוק סימן שינוי - כשיש סיבה לחשוד שהמטמון
+        ישן (למשל שורה שכבר לא נמצאת במקום שהמטמון מכיר, ראו rowids.keyed_diff).
+        """
+        token = None
+        with self._lock:
+            if worksheet_name in self._snapshots:
+                token = self._snapshots[worksheet_name].token
+        rows = self.backend.read_many([worksheet_name])[worksheet_name]
+        diagnostics.count("cache_full_reload", worksheet=worksheet_name)
+        with self._lock:
+            snap = WorksheetSnapshot(worksheet_name, rows, time.monotonic())
+            snap.token = token
+            self._replace_snapshot(worksheet_name, snap)
+
+    def version(self, worksheet_name):
+        """
+        מספר הגרסה של הגיליון במטמון (0 אם עוד לא נטען).
+        כדאי לקרוא אותו לפני get: אם הנתונים משתנים באמצע, הגרסה הבאה תהיה שונה
+        והגרף ייבנה מחדש, ולא יישאר גרף ישן תחת גרסה חדשה.
+        """
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            return snap.version if snap is not None else 0
+
+    def memory_bytes(self):
+        """כמה זיכרון תופסות הטבלאות שבמטמון (להגבלת הזיכרון של כמה יומנים, ראו tenants.py)"""
+        with self._lock:
+            return sum(snap.memory_bytes() for snap in self._snapshots.values())
+
+    def read_page(self, worksheet_name, page, page_size=10):
+        """
+        עמוד מההיסטוריה לעורך: עמוד 0 הוא השורות האחרונות, 1 אלה שלפניהן וכו'.
+        המיקום מחושב ממספר השורות הידוע במטמון, ומהגיליון נקרא רק הטווח של העמוד
+        (A{n}:F{m}), כך שהעורך מקבל את השורות כפי שהן עכשיו בלי להוריד את כל הגיליון.
+        מחזיר (טבלה מוקלדת שהאינדקס שלה הוא מספר השורה פחות 2, מספר העמודים).
+        """
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+        if snap is None:
+            self.refresh([worksheet_name])
+            with self._lock:
+                snap = self._snapshots[worksheet_name]
+
+        data_rows = max(0, snap.row_count - 1)
+        pages = max(1, -(-data_rows // page_size))
+        page = min(max(0, page), pages - 1)
+        end = snap.row_count - page * page_size
+        start = max(2, end - page_size + 1)
+        if not snap.header or end < start:
+            return snap.frame.iloc[0:0], pages
+        return self.read_rows(worksheet_name, start, end), pages
+
+    def read_rows(self, worksheet_name, start_row, end_row):
+        """
+        השורות start_row עד end_row ישר מהגיליון (לא מהמטמון), בקריאת טווח אחת,
+        כטבלה מוקלדת שהאינדקס שלה הוא מספר השורה פחות 2.
+        """
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+        if snap is None:
+            self.refresh([worksheet_name])
+            with self._lock:
+                snap = self._snapshots[worksheet_name]
+        rows = self.backend.read_range(worksheet_name, start_row, end_row, width=len(snap.header))
+        return snap._rows_frame(rows, first_row=start_row)
+
+    def prefetch(self, worksheet_names=None):
+        self.refresh(self.stale(worksheet_names))
+
+    def get(self, worksheet_name, pending_rows=()):
+        with diagnostics.span("cache.get", worksheet=worksheet_name):
+            with self._lock:
+                if self._is_fresh(worksheet_name, time.monotonic()):
+                    diagnostics.count("cache_hit", worksheet=worksheet_name)
+                    return self._snapshots[worksheet_name].frame_with(pending_rows)
+            diagnostics.count("cache_miss", worksheet=worksheet_name)
+            # פג תוקף: מנצלים את הבקשה כדי לרענן גם גיליונות אחרים שפג תוקפם
+            others = [name for name in self.stale() if name != worksheet_name]
+            self.refresh([worksheet_name] + others)
+            with self._lock:
+                return self._snapshots[worksheet_name].frame_with(pending_rows)
+
+    def locate(self, worksheet_name, row_ids):
+        """
+        מזהה -> (מספר השורה עכשיו, התאים שלה כטקסט) לפי המטמון, או None אם המזהה
+        כבר לא קיים. בלי קריאה לגיליון - כדאי לרענן (refresh) לפני כן.
+        """
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            found = {}
+            for row_id in row_ids:
+                row_num = snap.row_of(row_id) if snap is not None and row_id else None
+                found[row_id] = None if row_num is None else (
+                    row_num, schema.to_cells(snap.frame.loc[row_num - 2]))
+            return found
+
+    def cells_at(self, worksheet_name, row_num):
+        """התאים של שורה לפי מספר (בשביל שורות ישנות שעוד אין להן מזהה)"""
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            if snap is None or row_num - 2 not in snap.frame.index:
+                return None
+            return schema.to_cells(snap.frame.loc[row_num - 2])
+
+    def written(self, worksheet_name, rows):
+        """
+        לכל שורה: האם היא כבר בגיליון, לפי המזהה. קודם קוראים דלתא (בלי לבדוק תוקף),
+        כדי לראות גם שורות שנוספו הרגע. שורה בלי מזהה נחשבת כזו שלא נכתבה.
+        """
+        self.load([worksheet_name])
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            return [snap is not None and snap.row_of(snap.id_of([to_cell(v) for v in row])) is not None
+                    for row in rows]
+
+    def get_with_version(self, worksheet_name):
+        """(הטבלה, הגרסה שלה) מאותו רגע - למי שבונה מצב ומעדכן אותו אחר כך מאירועים"""
+        self.get(worksheet_name)
+        with self._lock:
+            snap = self._snapshots[worksheet_name]
+            return snap.frame.copy(), snap.version
+
+    # --- עדכון המטמון אחרי כתיבה שלנו (write-through) ---
+    # כך הרינדור הבא אחרי שמירה לא צריך לקרוא שוב מהגיליון.
+    # הכתיבה שלנו הזיזה את סימן השינוי; כשהסימן מקומי וזול קוראים אותו מיד, כדי
+    # שהבדיקה הבאה לא תחשוב שמישהו אחר ערך. (סימן של גוגל עולה קריאה - שם
+    # הבדיקה הבאה פשוט עושה דלתא.)
+
+    def _sync_token(self, worksheet_name, complete=False):
+        # complete: הטבלה במטמון היא בדיוק מה שכתבנו (apply_replace). אחרת מעדכנים רק
+        # תמונה שכבר אומתה מול סימן, כדי לא לכסות שינוי של מישהו אחר שעוד לא נקרא
+        if not (self.poll and self.backend.worksheet_tokens):
+            return
+        tokens = self.backend.change_tokens([worksheet_name])
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            if snap is not None and tokens and (complete or snap.token is not None):
+                snap.token = tokens.get(worksheet_name)
+
+    def apply_append(self, worksheet_name, rows):
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            if snap is None:
+                return
+            previous = snap.version
+            # שורה שקריאת דלתא כבר הביאה מהגיליון (לפי המזהה) לא נוספת פעם שנייה
+            rows = [[to_cell(v) for v in row] for row in rows]
+            added = snap.extend([row for row in rows if snap.row_of(snap.id_of(row)) is None])
+            if added is not None:
+                self._publish(worksheet_name, "append", previous, added=added)
+        self._sync_token(worksheet_name)
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        # כמו apply_changes של מנוע האחסון: קודם עריכות, אחר כך מחיקות
+        with self._lock:
+            snap = self._snapshots.get(worksheet_name)
+            if snap is None:
+                return
+            previous = snap.version
+            removed, added = [], []
+            for row_num, values in updates:
+                patched = snap.patch(int(row_num), [None if v is None else to_cell(v) for v in values])
+                if patched is not None:
+                    removed.append(patched[0])
+                    added.append(patched[1])
+            if deletes:
+                removed.append(snap.drop([int(r) for r in deletes]))
+            if removed:
+                self._publish(worksheet_name, "change", previous,
+                              added=schema.concat(added) if added else None,
+                              removed=schema.concat(removed))
+        self._sync_token(worksheet_name)
+
+    def apply_replace(self, worksheet_name, rows):
+        with self._lock:
+            self._replace_snapshot(worksheet_name, WorksheetSnapshot(
+                worksheet_name, [[to_cell(v) for v in row] for row in rows], time.monotonic()
+            ))
+        self._sync_token(worksheet_name, complete=True)
+
+    def invalidate(self, worksheet_name):
+        with self._lock:
+            previous = self.version(worksheet_name)
+            self._snapshots.pop(worksheet_name, None)
+            self._publish(worksheet_name, "reset", previous)
+
+    def clear(self):
+        with self._lock:
+            names = list(self._snapshots)
+            self._snapshots.clear()
+            for name in names:
+                self._publish(name, "reset", 0)
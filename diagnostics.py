@@ -0,0 +1,167 @@
+"""
+מדידות פנימיות: כמה זמן לוקח כל שלב, כמה פגיעות במטמון, וכמה קריאות לגוגל.
+
+כל הרכיבים (מנוע האחסון, SheetsCaller, המטמון והאפליקציה) כותבים לאותו
+מאגר משותף (REGISTRY), שחי כל עוד השרת רץ:
+- span: משך של שלב (סכום, מספר פעמים ומקסימום), למשל storage.read_many או render.chart,
+- count: מונים, למשל cache_hit / cache_miss לכל גיליון,
+- api_call: כל קריאה ל-Google Sheets API, כולל חלון של הדקה האחרונה מול המכסה.
+
+scope מוסיף תוויות (למשל tab="Training") לכל מה שנמדד בתוכו, כך שאפשר לראות
+איזה טאב צורך את המכסה. הכל ניתן לייצוא כ-JSON או כשורות טקסט בפורמט Prometheus.
+"""
+import contextlib
+import contextvars
+import json
+import re
+import threading
+import time
+from collections import deque
+
+_scope = contextvars.ContextVar("diagnostics_scope", default=())
+
+
+def _labels(labels):
+    # תוויות מה-scope + תוויות הקריאה, כמפתח קבוע וממוין
+    merged = dict(_scope.get())
+    merged.update({k: str(v) for k, v in labels.items() if v is not None})
+    return tuple(sorted(merged.items()))
+
+
+class Diagnostics:
+    def __init__(self, clock=time.monotonic, recent=200):
+        self.clock = clock
+        self.quota_per_minute = None
+        self._lock = threading.Lock()
+        self._spans = {}     # (שם, תוויות) -> [פעמים, סכום שניות, מקסימום]
+        self._counters = {}  # (שם, תוויות) -> ערך
+        self._api_times = deque()  # זמני הקריאות לגוגל בדקה האחרונה
+        self._recent = deque(maxlen=recent)
+        self._started = time.time()
+
+    # --- רישום ---
+    def observe(self, name, seconds, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            stats = self._spans.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            self._recent.append((time.time(), name, dict(key[1]), seconds))
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def count(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def api_call(self, method, **labels):
+        self.count("sheets_api_calls", method=method, **labels)
+        now = self.clock()
+        with self._lock:
+            self._api_times.append(now)
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._api_times and now - self._api_times[0] > 60:
+            self._api_times.popleft()
+
+    def api_calls_last_minute(self):
+        with self._lock:
+            self._trim(self.clock())
+            return len(self._api_times)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._api_times.clear()
+            self._recent.clear()
+            self._started = time.time()
+
+    # --- ייצוא ---
+    def snapshot(self, journals=None):
+        """
+        journals: אם נמסר, רק מדידות של היומנים האלה (ומדידות בלי תווית journal) -
+        כדי לא להציג לגולש של יומן אחד את השמות והפעילות של יומנים אחרים.
+        """
+        def visible(labels):
+            return journals is None or dict(labels).get("journal") in (None, *journals)
+
+        with self._lock:
+            spans = [{"name": name, "labels": dict(labels), "count": c,
+                      "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                     for (name, labels), (c, total, peak) in sorted(self._spans.items())
+                     if visible(labels)]
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items()) if visible(labels)]
+            recent = [{"time": t, "name": name, "labels": labels, "ms": round(s * 1000, 3)}
+                      for t, name, labels, s in self._recent if visible(labels)]
+            started = self._started
+        return {
+            "since": started,
+            "api_calls_last_minute": self.api_calls_last_minute(),
+            "quota_per_minute": self.quota_per_minute,
+            "spans": spans,
+            "counters": counters,
+            "recent": recent,
+        }
+
+    def to_json(self, journals=None):
+        return json.dumps(self.snapshot(journals), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix="maple", journals=None):
+        data = self.snapshot(journals)
+        lines = []
+        for span in data["spans"]:
+            metric = f"{prefix}_{_metric_name(span['name'])}_seconds"
+            labels = _prom_labels(span["labels"])
+            lines.append(f"{metric}_count{labels} {span['count']}")
+            lines.append(f"{metric}_sum{labels} {span['total_ms'] / 1000:.6f}")
+            lines.append(f"{metric}_max{labels} {span['max_ms'] / 1000:.6f}")
+        for counter in data["counters"]:
+            metric = f"{prefix}_{_metric_name(counter['name'])}_total"
+            lines.append(f"{metric}{_prom_labels(counter['labels'])} {counter['value']}")
+        lines.append(f"{prefix}_sheets_api_calls_last_minute {data['api_calls_last_minute']}")
+        if data["quota_per_minute"]:
+            lines.append(f"{prefix}_sheets_quota_per_minute {data['quota_per_minute']}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{_metric_name(k)}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+@contextlib.contextmanager
+def scope(**labels):
+    """תוויות לכל מה שנמדד בתוך הבלוק (באותו חוט), למשל scope(tab="Feeding")"""
+    token = _scope.set(tuple({**dict(_scope.get()), **labels}.items()))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+# המאגר המשותף של התהליך, וקיצורים אליו
+REGISTRY = Diagnostics()
+span = REGISTRY.span
+observe = REGISTRY.observe
+count = REGISTRY.count
+api_call = REGISTRY.api_call
@@ -0,0 +1,225 @@
+"""
+בניית הגרפים של היומן, בלי תלות ב-Streamlit.
+
+האפליקציה שומרת את הגרפים שנבנו לפי גרסת הנתונים במטמון (ראו cache.py),
+כך שכאן רק בונים - כל גרף נבנה פעם אחת לכל גרסה ולכל חלון תאריכים.
+
+כדי שהיסטוריה של כמה שנים תישאר מהירה (גם בטלפון):
+- נקודות האימונים וקו השיאים מצוירים ב-Scattergl (WebGL) ולא ב-SVG,
+- אפשר להציג רק חלון תאריכים אחרון (חודש, 3 חודשים, שנה),
+- קווים ארוכים מדוללים ב-LTTB ל-MAX_POINTS נקודות לכל היותר.
+  LTTB שומר את הנקודות שהכי משנות את צורת הקו, כך שהשיאים לא נעלמים.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import analytics
+
+# כמה ימים אחורה מהרשומה האחרונה (None = כל ההיסטוריה)
+WINDOWS = {
+    "חודש": 31,
+    "3 חודשים": 92,
+    "שנה": 365,
+    "הכל": None,
+}
+DEFAULT_WINDOW = "הכל"
+MAX_POINTS = 500
+
+
+# --- דילול ---
+
+def lttb_indices(x, y, threshold=MAX_POINTS):
+    """
+    Largest-Triangle-Three-Buckets: מחזיר את המיקומים של threshold נקודות מתוך הקו.
+    הראשונה והאחרונה תמיד נשמרות; מכל דלי נבחרת הנקודה שיוצרת את המשולש הגדול ביותר
+    עם הנקודה שנבחרה קודם ועם הממוצע של הדלי הבא.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def _as_numbers(dates):
+    # תאריכים -> מספרים (לחישוב השטחים של LTTB בלבד)
+    return pd.to_datetime(pd.Series(dates)).astype('int64').to_numpy(dtype=float)
+
+
+def downsample(frame, x_col, y_col, threshold=MAX_POINTS):
+    if len(frame) <= threshold:
+        return frame
+    idx = lttb_indices(_as_numbers(frame[x_col]), frame[y_col].to_numpy(dtype=float), threshold)
+    return frame.iloc[idx]
+
+
+def clip_window(frame, column, window):
+    """רק השורות מ-N הימים האחרונים (לפי הרשומה האחרונה ביומן)"""
+    days = WINDOWS.get(window)
+    if days is None or frame.empty:
+        return frame
+    dates = pd.to_datetime(frame[column], errors='coerce')
+    start = dates.max().normalize() - pd.Timedelta(days=days - 1)
+    return frame[dates >= start]
+
+
+# --- גרף האימונים ---
+
+def training_figure(df_all, window=DEFAULT_WINDOW, daily=None, name=None):
+    return training_state_figure(analytics.training_state(df_all, archived=daily), window, name=name)
+
+
+def training_state_figure(state, window=DEFAULT_WINDOW, name=None):
+    # name: שם הכלב של היומן, לכותרת
+    # העומס והאחוזונים מחושבים על כל ההיסטוריה (כולל הסיכום של הארכיון),
+    # כך שהצבעים לא משתנים בין חלונות
+    q33, q90 = state.bands
+    df_chart = clip_window(state.sessions, 'FullDate', window)
+    daily = downsample(clip_window(state.daily, 'Date', window), 'Date', 'Intensity')
+
+    y_actual = daily['Intensity']
+    y_blue = np.minimum(y_actual, q33)
+    y_green = np.minimum(y_actual, q90)
+
+    fig = go.Figure()
+
+    # --- שכבות הצבע תחת הגרף בלבד (לפי ימים) ---
+    fig.add_trace(go.Scatter(
+        x=daily['Date'], y=y_blue,
+        fill='tozeroy', fillcolor='rgba(33, 150, 243, 0.4)',  # כחול
+        mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=daily['Date'], y=y_green,
+        fill='tonexty', fillcolor='rgba(76, 175, 80, 0.4)',   # ירוק
+        mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=daily['Date'], y=y_actual,
+        fill='tonexty', fillcolor='rgba(244, 67, 54, 0.4)',   # אדום
+        mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip'
+    ))
+
+    # --- קו העצימות המרכזי ---
+    fig.add_trace(go.Scatter(
+        x=daily['Date'], y=daily['Intensity'],
+        mode='lines',
+        line=dict(color='#333333', width=3),
+        name='עצימות משוקללת'
+    ))
+
+    # --- קו מגמה מקוקו בין שיאים (משתמש ב-FullDate) ---
+    df_line = downsample(analytics.peak_sessions(df_chart), 'FullDate', 'Duration')
+    if not df_line.empty:
+        fig.add_trace(go.Scattergl(
+            x=df_line['FullDate'], y=df_line['Duration'],
+            mode='lines',
+            name='קו מגמה (שיאים)',
+            line=dict(color='rgba(80, 80, 80, 0.5)', width=2, dash='dot'),
+            hovertemplate="מגמת שיא: %{y} שעות<extra></extra>"
+        ))
+
+    # --- נקודות האימונים המדויקות (מופרדות לפי FullDate) ---
+    fig.add_trace(go.Scattergl(
+        x=df_chart['FullDate'], y=df_chart['Duration'],
+        mode='markers',
+        name='אימונים בודדים',
+        marker=dict(
+            size=10,
+            color=df_chart['Stress'],
+            colorscale=[[0, "#4CAF50"], [0.5, "#FFC107"], [1.0, "#FF5252"]],
+            cmin=1, cmax=5, line=dict(width=1, color='white')
+        ),
+        customdata=df_chart['Stress'],
+        hovertemplate="<b>תאריך ושעה:</b> %{x|%d/%m %H:%M}<br><b>זמן:</b> %{y} שעות<br><b>לחץ:</b> %{customdata}<extra></extra>"
+    ))
+
+    # --- עיצוב ---
+    fig.update_layout(
+        title=f"🐕 ניתוח עומס והתקדמות של {name}" if name else "🐕 ניתוח עומס והתקדמות",
+        yaxis_title="עומס משוקלל / זמן",
+        hovermode="closest", # חובה כדי שאפשר יהיה לבחור מתוך אימונים סמוכים
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=0, r=0, t=60, b=50),
+        height=500
+    )
+
+    fig.update_xaxes(
+        tickfont=dict(size=14),
+        automargin=True,
+        tickformat="%d/%m"
+    )
+    return fig
+
+
+# --- גרף האכלות ---
+
+def _daily_ticks(fig, window):
+    # תווית לכל יום רק בחלון של חודש; בטווח ארוך plotly בוחר בעצמו
+    if WINDOWS.get(window) is not None and WINDOWS[window] <= 31:
+        fig.update_xaxes(dtick="D1", tickformat="%d/%m")
+    else:
+        fig.update_xaxes(tickformat="%d/%m")
+
+
+def feeding_figure(df_food, window=DEFAULT_WINDOW, daily=None):
+    df_chart = df_food.assign(Amount=df_food['Amount'].fillna(0))[['Date', 'Finished', 'Amount']]
+    if daily is not None and not daily.empty:
+        # הימים שבארכיון מגיעים כבר מסוכמים - מצטרפים כמו עוד שורות
+        df_chart = pd.concat([daily[['Date', 'Finished', 'Amount']], df_chart], ignore_index=True)
+    df_chart = clip_window(df_chart, 'Date', window)
+
+    # קיבוץ גם לפי תאריך וגם לפי "האם סיימה" (כדי לפצל צבעים)
+    daily = df_chart.groupby(['Date', 'Finished'], observed=True)['Amount'].sum().reset_index()
+
+    # יצירת גרף עם צבעים מותאמים אישית
+    fig = px.bar(daily, x='Date', y='Amount', color='Finished',
+                 title="מעקב אכילה (ירוק=סיימה, אדום=לא סיימה)",
+                 # כאן המג'יק קורה: מיפוי צבעים
+                 color_discrete_map={
+                     "כן": "#4CAF50",  # ירוק
+                     "לא": "#FF5252"   # אדום בוהק
+                 },
+                 labels={'Date': 'תאריך', 'Amount': 'כמות', 'Finished': 'סיימה?'})
+    _daily_ticks(fig, window)
+    return fig
+
+
+# --- גרף המשימות ---
+
+def task_trend_figure(weekly, window=DEFAULT_WINDOW):
+    """
+    ממוצע הציונים השבועי של התרגילים שנבחרו (task_analytics.TaskProgress.weekly).
+    נקודה אחת לשבוע ולתרגיל במקום נקודה לכל רישום, כך שגם שנים של רישומים הן גרף קטן.
+    """
+    weekly = clip_window(weekly.dropna(subset=['Success']).sort_values('Week'), 'Week', window)
+    fig_task = px.line(weekly, x='Week', y='Success', color='TaskName', markers=True,
+                       title="ממוצע הצלחה שבועי לפי תרגיל",
+                       labels={'Success': 'ציון (1-5)', 'Week': 'שבוע', 'TaskName': 'תרגיל'},
+                       hover_data={'Logs': True}, render_mode='webgl')
+    # קובע שהציר יהיה תמיד מ-1 עד 5
+    fig_task.update_yaxes(range=[0.5, 5.5], dtick=1)
+    # נקודה לשבוע: תוויות של תאריך, בלי תווית לכל יום
+    fig_task.update_xaxes(tickformat="%d/%m/%y")
+    return fig_task
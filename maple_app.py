@@ -1,16 +1,30 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
-import plotly.express as px
-import time 
 import pytz # <--- חדש: ספרייה לאזורי זמן
+import functools
+import io
+import os
+import tempfile
+
+import bulk
+import diagnostics
+import figures
+import rowids
+import task_analytics
+from archive import AGGREGATES
+from sheet_diff import diff_frames
+from ratelimit import TokenBucket
+from tenants import Journal, JournalPool, JournalSettings
 
 # --- הגדרת שעון ישראל ---
 IL_TZ = pytz.timezone('Asia/Jerusalem')
 # --- הגדרות דף ---
-st.set_page_config(page_title="היומן של מייפל", page_icon="🐕", layout="wide")
+# הכותרת של הלשונית נקבעת אחרי שנבחר היומן (ראו למטה)
+st.set_page_config(page_title="היומן", page_icon="🐕", layout="wide")
 
 # ... (ה-CSS נשאר אותו דבר, אין צורך לשנות) ...
 st.markdown("""
@@ -29,147 +43,463 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- חיבור לגוגל שיטס ---
+# כתובת היומן כשאין [journals] ב-secrets (יומן יחיד, כמו פעם); ראו tenants.py
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1URUI3gpIa2wx_gQdEawCDRp8Tw4h20gun2zeegC-Oz8"
 
 @st.cache_resource
 def get_client():
+    # חשבון שירות אחד לכל היומנים (ולכן גם מכסה אחת, שמתחלקת ביניהם)
     scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
     creds_dict = dict(st.secrets["gcp_service_account"])
     creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
     return gspread.authorize(creds)
 
-def get_worksheet(worksheet_name):
-    # מנגנון ניסיון חוזר גם בחיבור לגיליון
-    for i in range(3):
-        try:
-            client = get_client()
-            sh = client.open_by_url(SHEET_URL)
-            return sh.worksheet(worksheet_name)
-        except Exception as e:
-            if "429" in str(e):
-                time.sleep(2) # חכה 2 שניות ונסה שוב
-                continue
-            else:
-                raise e
-
-# --- פונקציית קריאה חכמה (מונעת קריסות 429) ---
-@st.cache_data(ttl=60) # שומר בזיכרון ל-60 שניות כדי לא להציף את גוגל
+# --- יומנים: כמה כלבים בשרת אחד (ראו tenants.py) ---
+def get_storage_config():
+    # ההגדרות נקראות מ-[storage] בקובץ ה-secrets; בלי קובץ כזה עובדים מול גוגל שיטס
+    try:
+        return dict(st.secrets.get("storage", {}))
+    except Exception:
+        return {}
+
+@st.cache_resource
+def get_journal_settings():
+    try:
+        journals = {slug: dict(config) for slug, config in st.secrets.get("journals", {}).items()}
+    except Exception:
+        journals = {}
+    return JournalSettings(get_storage_config(), journals, SHEET_URL)
+
+@st.cache_resource
+def get_pool():
+    # מנוע אחסון, מטמון, תור כתיבה וחימום לכל יומן - עד max_journals יומנים ו-max_cache_mb זיכרון
+    settings = get_journal_settings()
+    shared_quota = TokenBucket(settings.quota)
+    diagnostics.REGISTRY.quota_per_minute = settings.quota
+
+    def open_journal(slug):
+        return Journal(slug, settings.config(slug), get_client, shared_quota)
+
+    return JournalPool(open_journal,
+                       max_journals=settings.storage.get("max_journals", 8),
+                       max_cache_bytes=int(settings.storage.get("max_cache_mb", 256)) * 2 ** 20)
+
+def current_user_email():
+    # רק כשהוגדרה התחברות ([auth] ב-secrets) והמשתמש מחובר
+    try:
+        return st.user.get("email") if st.user.get("is_logged_in") else None
+    except Exception:
+        return None
+
+def select_journal():
+    """היומן של הגולש: ?journal= בכתובת, אחרת לפי המשתמש המחובר, אחרת ברירת המחדל"""
+    settings = get_journal_settings()
+    email = current_user_email()
+    slug = settings.select(st.query_params.get("journal"), email)
+    if slug is None:
+        st.error("היומן המבוקש לא קיים - בדקו את הכתובת (?journal=...)")
+        st.stop()
+    if not settings.allows(slug, email):
+        st.warning("היומן הזה פרטי - צריך להתחבר עם משתמש שיש לו גישה.")
+        if email is None:
+            st.button("התחברות", on_click=st.login)
+        st.stop()
+    if st.session_state.get("journal") != slug:
+        # עברו ליומן אחר באותה לשונית: העמודים והטפסים השמורים שייכים ליומן הקודם
+        for key in list(st.session_state):
+            del st.session_state[key]
+        st.session_state["journal"] = slug
+    return slug
+
+def current_journal():
+    return get_pool().get(st.session_state["journal"])
+
+def get_backend():
+    return current_journal().backend
+
+def get_cache():
+    return current_journal().cache
+
+def get_write_queue():
+    return current_journal().queue
+
+def get_training_aggregator():
+    return current_journal().aggregator
+
+def get_warmup():
+    return current_journal().warmup
+
+@st.fragment(run_every=1)
+def show_loading():
+    # המסגרת כבר מוצגת; כשהחימום מסתיים מריצים את הדף מחדש והנתונים מופיעים
+    if get_warmup().is_done():
+        st.rerun()
+    st.info("⏳ מתחבר לגוגל שיטס וטוען את היומן...")
+
+# --- פונקציית קריאה חכמה (ההמתנה וניסיונות חוזרים ב-429 נעשים בתוך מנוע האחסון) ---
 def get_data(worksheet_name):
-    retries = 3
-    for n in range(retries):
+    try:
+        # כולל שורות שנשמרו וממתינות בתור, כדי שיופיעו מיד בגרפים
+        with diagnostics.span("render.get_data", worksheet=worksheet_name):
+            return get_cache().get(worksheet_name, get_write_queue().pending_rows(worksheet_name))
+    except Exception as e:
+        st.error(f"שגיאה בטעינת נתונים (נסה לרענן): {e}")
+        return pd.DataFrame()
+
+def data_version(worksheet_name):
+    """
+    גרסת הנתונים שהטאב מציג: גרסת הגיליון במטמון + מספר השורות שממתינות בתור.
+    קוראים לה לפני get_data - ראו WorksheetCache.version.
+    """
+    if not get_cache().version(worksheet_name):
+        get_data(worksheet_name)  # טעינה ראשונה, כדי שהגרף הראשון לא ייבנה תחת גרסה 0
+    version = get_cache().version(worksheet_name), len(get_write_queue().pending_rows(worksheet_name))
+    if archived_daily(worksheet_name) is not None:
+        version += (get_cache().version(AGGREGATES[worksheet_name]),)
+    return version
+
+def training_state(df_all):
+    """מצב גרף האימונים מהסיכום המצטבר, כולל שורות שעדיין ממתינות בתור"""
+    aggregator = get_training_aggregator()
+    archived = archived_daily("Training")
+    aggregator.sync(get_cache(), "Training", archived,
+                    get_cache().version(AGGREGATES["Training"]) if archived is not None else None)
+    pending = len(get_write_queue().pending_rows("Training"))
+    return aggregator.state(df_all.tail(pending) if pending else None)
+
+def archived_daily(worksheet_name):
+    """הסיכום היומי של מה שכבר עבר לארכיון (None כשהארכיון כבוי)"""
+    if current_journal().archiver is None or worksheet_name not in AGGREGATES:
+        return None
+    return get_data(AGGREGATES[worksheet_name])
+
+FIGURE_BUILDERS = {
+    "Training": figures.training_state_figure,
+    "Feeding": figures.feeding_figure,
+    "TaskLogs": figures.task_trend_figure,
+}
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cached_figure(journal, worksheet_name, version, window, _df, _daily=None, name=None):
+    # הטבלאות עצמן (_df, _daily) לא נכנסות למפתח - היומן והגרסה מייצגים אותן, ולא צריך לחשב hash על כל השורות
+    # name: שם הכלב לכותרת, לגרפים שמציגים אותו
+    with diagnostics.span("render.figure_build", worksheet=worksheet_name):
+        builder = FIGURE_BUILDERS[worksheet_name]
+        extra = {"daily": _daily} if _daily is not None else {}
+        if name is not None:
+            extra["name"] = name
+        return builder(_df, window, **extra)
+
+def show_chart(fig):
+    # st.plotly_chart ממיר את הגרף ל-JSON בכל ריצה - זה החלק שנמדד כאן
+    with diagnostics.span("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def window_selector(key):
+    # חלון תאריכים לגרף; בהיסטוריה ארוכה חלון קצר נטען ומצויר מהר יותר
+    window = st.segmented_control("טווח תאריכים", list(figures.WINDOWS),
+                                  default=figures.DEFAULT_WINDOW, key=key)
+    return window or figures.DEFAULT_WINDOW
+
+# --- עורך היסטוריה בעמודים ---
+PAGE_SIZE = 10
+
+def forget_page(state_key):
+    # העמוד ייקרא שוב מהגיליון בריצה הבאה (אחרי שמירה או מעבר עמוד)
+    st.session_state.pop(f"{state_key}_original", None)
+    st.session_state.pop(f"{state_key}_base", None)
+    # עורך חדש לכל טעינה: data_editor עם אותו key שומר את רשימת העריכות שלו
+    # גם כשהנתונים מתחלפים, ומחיל אותן שוב לפי מיקום על השורות החדשות
+    st.session_state[f"{state_key}_loads"] = st.session_state.get(f"{state_key}_loads", 0) + 1
+
+def editor_key(state_key):
+    page = st.session_state.get(f"{state_key}_page", 0)
+    return f"{state_key}_editor_{page}_{st.session_state.get(f'{state_key}_loads', 0)}"
+
+def _go_to_page(state_key, page):
+    st.session_state[f"{state_key}_page"] = page
+    forget_page(state_key)
+
+def history_page(worksheet_name, state_key, prepare=None):
+    """
+    עמוד מההיסטוריה לעורך (עמוד 0 = 10 האחרונים) + כפתורי דפדוף לעמודים ישנים יותר.
+    העמוד נקרא מהגיליון בקריאת טווח קטנה (ראו WorksheetCache.read_page) ונשמר
+    ב-session_state עד לשמירה או למעבר עמוד, כך שהקלדה בעורך לא שולחת בקשות לגוגל.
+    האינדקס הוא מספר השורה פחות 2 בזמן הקריאה; smart_update מאתר את השורות לפי
+    עמודת ID, כך שהן נכתבות נכון גם אם בינתיים נוספו או נמחקו שורות.
+    העמוד כפי שנקרא (לפני prepare) נשמר ב-{state_key}_base להשוואה בזמן השמירה.
+    שורות שעוד ממתינות בתור לא מופיעות כאן - אין להן שורה בגיליון.
+    """
+    page = st.session_state.get(f"{state_key}_page", 0)
+    if f"{state_key}_original" not in st.session_state:
         try:
-            sheet = get_worksheet(worksheet_name)
-            all_values = sheet.get_all_values()
-            
-            if not all_values: return pd.DataFrame()
-            
-            headers = all_values[0]
-            data = all_values[1:]
-            return pd.DataFrame(data, columns=headers)
-            
+            with diagnostics.span("render.history_page", worksheet=worksheet_name):
+                frame, pages = get_cache().read_page(worksheet_name, page, PAGE_SIZE)
         except Exception as e:
-            # אם השגיאה היא 429 (Quota exceeded)
-            if "429" in str(e):
-                if n < retries - 1: # אם נשארו ניסיונות
-                    time.sleep(2 ** (n + 1)) # המתנה מדורגת: 2 שניות, 4 שניות...
-                    continue
-            # אם זו שגיאה אחרת או שנגמרו הניסיונות
             st.error(f"שגיאה בטעינת נתונים (נסה לרענן): {e}")
             return pd.DataFrame()
-    return pd.DataFrame()
+        st.session_state[f"{state_key}_base"] = frame
+        st.session_state[f"{state_key}_original"] = prepare(frame) if prepare else frame
+        st.session_state[f"{state_key}_pages"] = pages
+        # אם הגיליון התקצר, העמוד האחרון הוא הישן ביותר שיש
+        page = st.session_state[f"{state_key}_page"] = min(page, pages - 1)
+    frame = st.session_state[f"{state_key}_original"]
+    pages = st.session_state[f"{state_key}_pages"]
+
+    if pages > 1:
+        c1, c2, c3 = st.columns([1, 2, 1])
+        with c1:
+            st.button("חדשים יותר", key=f"{state_key}_newer", disabled=page == 0,
+                      on_click=_go_to_page, args=(state_key, page - 1))
+        with c2:
+            rows = f" (שורות {frame.index.min() + 2}-{frame.index.max() + 2})" if len(frame) else ""
+            st.caption(f"עמוד {page + 1} מתוך {pages}{rows}")
+        with c3:
+            st.button("ישנים יותר", key=f"{state_key}_older", disabled=page >= pages - 1,
+                      on_click=_go_to_page, args=(state_key, page + 1))
+    return frame
 
 # --- פונקציית הוספה חכמה ---
 def append_row(worksheet_name, row_list):
+    # השורה נרשמת בתור המקומי וחוזרת מיד; השליחה לגוגל (כולל ניסיונות חוזרים) קורית ברקע
     try:
-        sheet = get_worksheet(worksheet_name)
-        sheet.append_row(row_list)
-        st.cache_data.clear() # מנקה את הזיכרון כדי שנראה את העדכון
+        # המזהה נקבע כבר עכשיו, כך שגם שורה שממתינה בתור מזוהה
+        get_write_queue().enqueue(worksheet_name, rowids.with_id(worksheet_name, row_list))
         return True
     except Exception as e:
-        if "429" in str(e):
-            st.warning("גוגל עמוס, מנסה שוב בעוד רגע...")
-            time.sleep(3)
-            try:
-                sheet.append_row(row_list)
-                st.cache_data.clear()
-                return True
-            except:
-                st.error("נכשלנו בשמירה עקב עומס. נסה שוב בעוד דקה.")
-                return False
         st.error(f"שגיאה בשמירה: {e}")
         return False
+
+def rerun_fragment():
+    # בתוך fragment מריצים מחדש רק אותו; אם הגענו מריצה מלאה של הדף - מריצים את כולו
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+@st.fragment(run_every=5)
+def show_write_queue_status():
+    # מתרענן לבד כל 5 שניות (קריאה מקומית בלבד), בלי להריץ מחדש את הטאבים
+    counts = get_write_queue().counts()
+    if counts["pending"]:
+        st.caption(f"⏳ {counts['pending']} רשומות ממתינות לשליחה לגוגל שיטס")
+    if counts["failed"]:
+        st.warning(f"⚠️ {counts['failed']} רשומות לא נשלחו לגוגל שיטס: {get_write_queue().last_error()}")
+        if st.button("נסה לשלוח שוב 🔁", key="retry_failed_writes"):
+            get_write_queue().retry_failed()
+            rerun_fragment()
         
 def update_data(worksheet_name, df):
     """פונקציה לעדכון הטבלה כולה (עריכה)"""
     try:
-        sheet = get_worksheet(worksheet_name)
-        sheet.clear() # מנקה את הגיליון
         # מכין את הנתונים לכתיבה מחדש
         data = [df.columns.tolist()] + df.astype(str).values.tolist()
-        sheet.update(data) 
-        st.cache_data.clear()
+        get_backend().replace_all(worksheet_name, data)
+        get_cache().apply_replace(worksheet_name, data)
         return True
     except Exception as e:
         st.error(f"שגיאה בעדכון: {e}")
         return False
 
-def smart_update(worksheet_name, original_df, edited_df):
+def smart_update(worksheet_name, original_df, edited_df, base_df=None):
     """
-    פונקציה חכמה שמעדכנת לפי האינדקס המקורי של השורה.
-    זה מאפשר לערוך את ה-10 שורות האחרונות בלי לדרוס את ההתחלה.
+    פונקציה חכמה שמעדכנת לפי המזהה של השורה (ראו rowids.py).
+    זה מאפשר לערוך את ה-10 שורות האחרונות בלי לדרוס את ההתחלה, גם אם בינתיים
+    נוספו או נמחקו שורות ממכשיר אחר. שורה שנערכה או נמחקה במכשיר אחר לא נדרסת.
+    כל העריכות והמחיקות נשלחות יחד בבקשה אחת, לא משנה כמה שורות השתנו.
     """
     try:
-        sheet = get_worksheet(worksheet_name)
-        
-        # 1. בדיקת מחיקה: האם מחקו שורות בטבלה הערוכה?
-        # אנו בודקים אילו אינדקסים היו במקור וחסרים עכשיו
-        missing_indices = original_df.index.difference(edited_df.index)
-        
-        if not missing_indices.empty:
-            # מחיקה מהסוף להתחלה כדי לא לשבש את המספרים
-            for idx in sorted(missing_indices, reverse=True):
-                # המרה מאינדקס (מתחיל ב-0) למספר שורה בשיטס (מתחיל ב-2)
-                row_num = idx + 2
-                sheet.delete_rows(int(row_num))
-                st.success(f"שורה {row_num} נמחקה!")
-            
-            st.cache_data.clear()
-            return True
-
-        # 2. בדיקת שינויים: האם התוכן השתנה?
-        # אנחנו רצים רק על האינדקסים שקיימים בטבלה שערכנו
-        for idx in edited_df.index:
-            # אם השורה הזו קיימת במקור, נשווה אותה
-            if idx in original_df.index:
-                # המרה לטקסט לצורך השוואה
-                original_row = original_df.loc[idx].astype(str)
-                edited_row = edited_df.loc[idx].astype(str)
-                
-                if not original_row.equals(edited_row):
-                    # נמצא שינוי!
-                    row_num = idx + 2  # חישוב השורה האמיתית בגוגל
-                    new_values = edited_row.tolist()
-                    
-                    # עדכון כירורגי של השורה הספציפית
-                    sheet.update(range_name=f"A{row_num}", values=[new_values])
-                    st.success(f"שורה {row_num} עודכנה!")
-                    st.cache_data.clear()
-                    return True
-            
-        st.info("לא זוהו שינויים.")
-        return False
+        if not diff_frames(original_df, edited_df):
+            st.info("לא זוהו שינויים.")
+            return False
+
+        diff, conflicts = rowids.keyed_diff(get_cache(), worksheet_name, original_df, edited_df, base_df)
+        for conflict in conflicts:
+            # toast נשאר על המסך גם אחרי שהעמוד נטען מחדש
+            st.toast(f"שורה {conflict.row_num} לא נשמרה: {conflict.reason}. העמוד נטען מחדש.", icon="⚠️")
+        if not diff:
+            return bool(conflicts)
+
+        get_backend().apply_changes(worksheet_name, diff.updates, diff.deletes)
+        get_cache().apply_changes(worksheet_name, diff.updates, diff.deletes)
+
+        if diff.updates:
+            st.success(f"עודכנו {len(diff.updates)} שורות ({', '.join(str(r) for r, _ in diff.updates)})")
+        if diff.deletes:
+            st.success(f"נמחקו {len(diff.deletes)} שורות ({', '.join(str(r) for r in diff.deletes)})")
+        return True
         
     except Exception as e:
         st.error(f"שגיאה בעדכון: {e}")
         return False
 
-# --- האפליקציה ---
-st.title("🐕 המעקב של מייפל")
+# --- מדידות (ראו diagnostics.py) ---
+def measured_tab(tab_name):
+    """מודד את הרינדור של טאב, ומתייג בשם הטאב כל מה שנמדד בתוכו - כולל קריאות לגוגל"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with diagnostics.scope(tab=tab_name), diagnostics.span("render.tab"):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+def diagnostics_enabled():
+    # הפאנל מוסתר; מופיע רק עם ?debug=1 בכתובת
+    return st.query_params.get("debug") == "1"
+
+def _labels_text(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+@st.fragment
+def visible_journals():
+    """היומנים שהגולש רשאי לראות (ראו JournalSettings.allows) - רק הם מוצגים באבחון"""
+    settings = get_journal_settings()
+    email = current_user_email()
+    return [slug for slug in settings.journals if settings.allows(slug, email)]
+
+def show_diagnostics():
+    with st.expander("🩺 אבחון ביצועים", expanded=False):
+        journals = visible_journals()
+        data = diagnostics.REGISTRY.snapshot(journals)
+        quota = data["quota_per_minute"] or 60
+        used = data["api_calls_last_minute"]
+        st.progress(min(1.0, used / quota), text=f"קריאות לגוגל שיטס בדקה האחרונה: {used} מתוך {quota}")
+
+        if data["spans"]:
+            spans = pd.DataFrame(data["spans"])
+            spans["labels"] = spans["labels"].map(_labels_text)
+            spans["avg_ms"] = (spans["total_ms"] / spans["count"]).round(2)
+            st.caption("⏱️ זמנים לפי שלב")
+            st.dataframe(spans.sort_values("total_ms", ascending=False), hide_index=True,
+                         use_container_width=True)
+        if data["counters"]:
+            counters = pd.DataFrame(data["counters"])
+            counters["labels"] = counters["labels"].map(_labels_text)
+            st.caption("🔢 מונים (פגיעות במטמון, קריאות לגוגל, שגיאות)")
+            st.dataframe(counters, hide_index=True, use_container_width=True)
+
+        pool = pd.DataFrame([row for row in get_pool().stats() if row[0] in journals],
+                            columns=["journal", "cache_bytes", "idle_seconds"])
+        st.caption("📚 יומנים פתוחים בשרת (מהאחרון בשימוש)")
+        st.dataframe(pool.round(1), hide_index=True, use_container_width=True)
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.download_button("JSON ⬇️", diagnostics.REGISTRY.to_json(journals),
+                               file_name="maple_diagnostics.json", mime="application/json")
+        with c2:
+            st.download_button("Prometheus ⬇️", diagnostics.REGISTRY.to_prometheus(journals=journals),
+                               file_name="maple_metrics.txt", mime="text/plain")
+        with c3:
+            if st.button("אפס מדידות", key="reset_diagnostics"):
+                diagnostics.REGISTRY.reset()
+                rerun_fragment()
+
+# --- ייבוא וייצוא בכמויות (ראו bulk.py) ---
+BULK_WORKSHEETS = ["Training", "Feeding", "TaskLogs", "Tasks"]
+
+def export_file(worksheet_name, kind):
+    # הגיליון נקרא בעמודים ונכתב לקובץ תוך כדי; חוזר כ-bytes להורדה
+    if kind == "csv":
+        out = io.StringIO()
+        bulk.export_csv(get_backend(), worksheet_name, out)
+        return out.getvalue().encode("utf-8-sig"), "text/csv"  # BOM כדי שאקסל יציג עברית
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{worksheet_name}.parquet")
+        bulk.export_parquet(get_backend(), worksheet_name, path)
+        with open(path, "rb") as f:
+            return f.read(), "application/octet-stream"
+
+def run_import(worksheet_name, rows, source):
+    folder = current_journal().config.get("import_progress_dir", "maple_imports")
+    os.makedirs(folder, exist_ok=True)
+    job = bulk.BulkImport(get_backend(), worksheet_name, rows, source,
+                          progress_path=os.path.join(folder, f"{worksheet_name}_{source[:12]}.json"),
+                          on_chunk=lambda chunk: get_cache().apply_append(worksheet_name, chunk))
+    bar = st.progress(0.0, text="מייבא...")
+    written = job.run(progress=lambda done, total: bar.progress(done / total, text=f"{done}/{total}"))
+    st.success(f"יובאו {written} שורות חדשות ל-{worksheet_name}")
+
+@st.fragment
+def show_bulk_tools():
+    with st.expander("📦 ייבוא וייצוא", expanded=False):
+        worksheet_name = st.selectbox("גיליון", BULK_WORKSHEETS, key="bulk_worksheet")
 
-tab1, tab2, tab3 = st.tabs(["🏃 הישארות לבד", "🦴 האכלות", "🎓 משימות"])
+        c1, c2 = st.columns(2)
+        for column, kind in ((c1, "csv"), (c2, "parquet")):
+            with column:
+                if st.button(f"הכן קובץ {kind.upper()}", key=f"bulk_export_{kind}"):
+                    try:
+                        data, mime = export_file(worksheet_name, kind)
+                        st.session_state["bulk_export"] = (f"{worksheet_name}.{kind}", data, mime)
+                    except Exception as e:
+                        st.error(f"שגיאה בייצוא: {e}")
+        if "bulk_export" in st.session_state:
+            file_name, data, mime = st.session_state["bulk_export"]
+            st.download_button(f"{file_name} ⬇️", data, file_name=file_name, mime=mime)
+
+        uploaded = st.file_uploader("ייבוא מקובץ CSV", type="csv", key="bulk_upload")
+        if uploaded is not None:
+            data = uploaded.getvalue()
+            frame = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+            source = bulk.source_id(data)
+            rows, errors = bulk.validate(worksheet_name, frame, source)
+            st.caption(f"{len(rows)} שורות תקינות, {len(errors)} שורות עם שגיאות (לא ייובאו)")
+            if errors:
+                st.dataframe([{"שורה בקובץ": e.line, "שגיאה": e.message} for e in errors[:200]],
+                             hide_index=True, use_container_width=True)
+            # ייבוא שנקטע ממשיך מאיפה שעצר, ושורות שכבר קיימות לא נכתבות שוב
+            if rows and st.button(f"ייבא ל-{worksheet_name}", key="bulk_import"):
+                try:
+                    run_import(worksheet_name, rows, source)
+                except Exception as e:
+                    st.error(f"הייבוא נעצר (אפשר ללחוץ שוב כדי להמשיך): {e}")
+
+# --- סיכומי התרגילים (ראו task_analytics.py) ---
+RAW_LOG_ROWS = 500
+TASK_TABLE_COLUMNS = ["TaskName", "Frequency", "DaysSince", "Streak", "Compliance",
+                      "RecentSuccess", "Success", "Logs", "Trend"]
+TASK_TABLE_CONFIG = {
+    "TaskName": st.column_config.TextColumn("תרגיל"),
+    "Frequency": st.column_config.TextColumn("תדירות"),
+    "DaysSince": st.column_config.NumberColumn("ימים מאז", format="%d"),
+    "Streak": st.column_config.TextColumn("רצף"),
+    "Compliance": st.column_config.ProgressColumn(
+        f"עמידה בתדירות ({task_analytics.COMPLIANCE_DAYS} יום)", min_value=0, max_value=1, format="percent"),
+    "RecentSuccess": st.column_config.NumberColumn(f"ציון ב-{task_analytics.RECENT_DAYS} יום", format="%.1f"),
+    "Success": st.column_config.NumberColumn("ציון כללי", format="%.1f"),
+    "Logs": st.column_config.NumberColumn("תרגולים"),
+    "Trend": st.column_config.LineChartColumn(f"מגמה ({task_analytics.TREND_WEEKS} שבועות)",
+                                              y_min=1, y_max=5),
+}
+STREAK_UNITS = {1: "ימים", 7: "שבועות", 14: "שבועיים", 30: "חודשים"}
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def cached_task_progress(journal, version, today, _tasks, _logs, _daily=None):
+    # כמו cached_figure: מחושב פעם אחת לכל גרסת נתונים (ולכל יום - "ימים מאז" תלוי בתאריך)
+    with diagnostics.span("render.task_progress"):
+        return task_analytics.task_progress(_tasks, _logs, _daily, today)
+
+def task_progress():
+    """(TaskProgress, גרסת הנתונים) - הגרסה משמשת גם כמפתח של הגרף"""
+    version = data_version("Tasks") + data_version("TaskLogs")
+    today = datetime.now(IL_TZ).date()
+    progress = cached_task_progress(current_journal().slug, version, today, get_data("Tasks"),
+                                    get_data("TaskLogs"), archived_daily("TaskLogs"))
+    return progress, version
+
+def task_table(view):
+    # מה שלא תורגל הכי הרבה זמן (או בכלל) למעלה
+    table = view.sort_values('DaysSince', ascending=False, na_position='first')
+    units = table['PeriodDays'].map(lambda days: STREAK_UNITS.get(days, f"תקופות של {days} ימים"))
+    return table.assign(Streak=table['Streak'].astype(str) + " " + units)
 
 # --- טאב 1: אימונים (Training) ---
-with tab1:
+# כל טאב הוא fragment: שמירה בטופס מריצה מחדש רק את הטאב הזה, לא את כל האפליקציה
+@st.fragment
+@measured_tab("Training")
+def training_tab():
     st.header("תיעוד חשיפה ונטישות")
     
 # --- טופס הזנה חכם: חישוב זמנים אוטומטי ---
@@ -206,7 +536,7 @@ with tab1:
             
             if append_row("Training", row):
                 st.success("האימון נשמר!")
-                st.rerun()
+                rerun_fragment()
 
     st.divider()
     
@@ -214,21 +544,16 @@ with tab1:
     # ה-expander יהיה סגור בברירת מחדל (expanded=False)
     with st.expander("✏️ לצפייה ועריכת היסטוריית אימונים", expanded=False):
         
+        version = data_version("Training")
         df_all = get_data("Training")
         
         if not df_all.empty:
-            # ניקוי פורמט השעה לתצוגה
-            if 'Time' in df_all.columns:
-                df_all['Time'] = df_all['Time'].astype(str).apply(lambda x: x[:5] if len(x) > 5 else x)
-            
-            # הכנת הנתונים לעריכה
-            stress_col = 'StressLevel' if 'StressLevel' in df_all.columns else 'Stress'
-            df_all['Duration'] = pd.to_numeric(df_all['Duration'], errors='coerce')
-            df_all[stress_col] = pd.to_numeric(df_all[stress_col], errors='coerce').fillna(3)
-
-            df_tail = df_all.tail(10)
-            if 'train_original' not in st.session_state:
-                 st.session_state['train_original'] = df_tail.copy()
+            # הטבלה כבר מוקלדת (ראו schema.py); רק משלימים מדד לחץ חסר לעריכה
+            def fill_stress(df):
+                if 'StressLevel' in df.columns:
+                    return df.assign(StressLevel=df['StressLevel'].fillna(3))
+                return df
+            df_tail = history_page("Training", "train", prepare=fill_stress)
 
             # הצגת הטבלה
             edited_df = st.data_editor(
@@ -236,162 +561,41 @@ with tab1:
                 num_rows="fixed", 
                 use_container_width=True, 
                 hide_index=True, 
-                key="train_editor",
+                key=editor_key("train"),
                 column_config={
-                    "Date": st.column_config.Column("📅 תאריך"),
+                    "Date": st.column_config.DateColumn("📅 תאריך", format="YYYY-MM-DD"),
                     "Time": st.column_config.Column("⏰ שעה"),
                     "Duration": st.column_config.NumberColumn("⏳ זמן (שעות)", format="%.2f", step=0.25),
-                    stress_col: st.column_config.NumberColumn("😰 מדד לחץ", min_value=1, max_value=5, step=1),
-                    "Notes": st.column_config.TextColumn("📝 הערות")
+                    "StressLevel": st.column_config.NumberColumn("😰 מדד לחץ", min_value=1, max_value=5, step=1),
+                    "Notes": st.column_config.TextColumn("📝 הערות"),
+                    "ID": None,  # מזהה פנימי, לא לעריכה
                 }
             )
             
             if st.button("שמור שינויים בטבלה 💾", key="save_tail_btn", use_container_width=True):
-                if smart_update("Training", st.session_state['train_original'], edited_df):
-                    del st.session_state['train_original']
-                    st.rerun()
+                if smart_update("Training", st.session_state.get('train_original', df_tail), edited_df,
+                                st.session_state.get('train_base')):
+                    forget_page("train")
+                    rerun_fragment()
 
         # --- הגרף המאוחד: גרסה מתוקנת עם זיהוי שעות מדויק ---
         st.divider()
         if 'Date' in df_all.columns and 'Duration' in df_all.columns:
-            import plotly.graph_objects as go
-            import numpy as np
-
-            df_chart = df_all.copy()
-            
-            # --- 1. סידור תאריכים ושעות בצורה חסינה לתקלות ---
-            # מחלצים רק את התאריך הנקי כטקסט (ללא תוספות של שעות איפוס)
-            df_chart['CleanDate'] = pd.to_datetime(df_chart['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-            
-            # פונקציה חכמה לניקוי השעה שמגיעה מגוגל שיטס
-            def parse_time(t):
-                t = str(t).strip().split('.')[0] # מסיר מילי-שניות (14:43:46.217 -> 14:43:46)
-                if t.lower() in ['nan', 'none', 'null', '']: return '12:00' # אם אין שעה
-                if len(t) >= 5 and ':' in t: return t[:5] # פורמט תקין (14:43)
-                if len(t) == 4 and t.isdigit(): return f"{t[:2]}:{t[2:]}" # פורמט רציף (1100 -> 11:00)
-                return '12:00' # ברירת מחדל לכל שגיאה אחרת
-            
-            # מחילים את ניקוי השעה רק אם העמודה קיימת בנתונים
-            if 'Time' in df_chart.columns:
-                time_series = df_chart['Time'].apply(parse_time)
-            else:
-                time_series = '12:00'
-                
-            # מרכיבים תאריך מלא אמיתי (תאריך + שעה) שיאפשר להפריד אימונים באותו יום
-            df_chart['FullDate'] = pd.to_datetime(df_chart['CleanDate'] + ' ' + time_series, errors='coerce')
-            df_chart['Date'] = pd.to_datetime(df_chart['CleanDate'], errors='coerce')
-            
-            # מסננים תקלות ומסדרים לפי סדר כרונולוגי
-            df_chart = df_chart.dropna(subset=['FullDate', 'Duration']).sort_values('FullDate')
-            
-            stress_col = 'StressLevel' if 'StressLevel' in df_all.columns else 'Stress'
-            df_chart['Weighted_Duration'] = df_chart['Duration'] * (pd.to_numeric(df_chart[stress_col], errors='coerce').fillna(3) / 3.0)
-            
-            # --- חישוב עצימות יומית (גרף השטח מחושב לפי ימים) ---
-            daily = df_chart.groupby('Date')['Weighted_Duration'].sum().reset_index()
-            daily.set_index('Date', inplace=True)
-            daily = daily.resample('D').sum().fillna(0)
-            
-            def calculate_intensity(window):
-                length = len(window)
-                weights = [0.5**(length - 1 - i) for i in range(length)]
-                return sum(w * val for w, val in zip(weights, window))
-            
-            daily['Intensity'] = daily['Weighted_Duration'].rolling(window=7, min_periods=1).apply(calculate_intensity)
-            daily = daily.reset_index()
-
-            # --- חישוב אחוזונים חכם ---
-            active_intensity = daily['Intensity'][daily['Intensity'] > 0.1]
-            if not active_intensity.empty:
-                q33 = active_intensity.quantile(0.33)
-                q90 = active_intensity.quantile(0.90)
-            else:
-                q33, q90 = 0.5, 2.0
-            
-            y_actual = daily['Intensity']
-            y_blue = np.minimum(y_actual, q33)          
-            y_green = np.minimum(y_actual, q90)         
-
-            fig = go.Figure()
-
-            # --- שכבות הצבע תחת הגרף בלבד (לפי ימים) ---
-            fig.add_trace(go.Scatter(
-                x=daily['Date'], y=y_blue,
-                fill='tozeroy', fillcolor='rgba(33, 150, 243, 0.4)',  # כחול
-                mode='lines', line=dict(width=0),
-                showlegend=False, hoverinfo='skip'
-            ))
-            fig.add_trace(go.Scatter(
-                x=daily['Date'], y=y_green,
-                fill='tonexty', fillcolor='rgba(76, 175, 80, 0.4)',   # ירוק
-                mode='lines', line=dict(width=0),
-                showlegend=False, hoverinfo='skip'
-            ))
-            fig.add_trace(go.Scatter(
-                x=daily['Date'], y=y_actual,
-                fill='tonexty', fillcolor='rgba(244, 67, 54, 0.4)',   # אדום
-                mode='lines', line=dict(width=0),
-                showlegend=False, hoverinfo='skip'
-            ))
-
-            # --- קו העצימות המרכזי ---
-            fig.add_trace(go.Scatter(
-                x=daily['Date'], y=daily['Intensity'],
-                mode='lines',
-                line=dict(color='#333333', width=3), 
-                name='עצימות משוקללת'
-            ))
-
-            # --- קו מגמה מקוקו בין שיאים (משתמש ב-FullDate) ---
-            df_line = df_chart[(df_chart['Duration'] > 0.5) | (pd.to_numeric(df_chart[stress_col], errors='coerce') >= 4)]
-            if not df_line.empty:
-                fig.add_trace(go.Scatter(
-                    x=df_line['FullDate'], y=df_line['Duration'],
-                    mode='lines',
-                    name='קו מגמה (שיאים)',
-                    line=dict(color='rgba(80, 80, 80, 0.5)', width=2, dash='dot'),
-                    hovertemplate="מגמת שיא: %{y} שעות<extra></extra>"
-                ))
-
-            # --- נקודות האימונים המדויקות (מופרדות לפי FullDate) ---
-            fig.add_trace(go.Scatter(
-                x=df_chart['FullDate'], y=df_chart['Duration'],
-                mode='markers',
-                name='אימונים בודדים',
-                marker=dict(
-                    size=10, 
-                    color=pd.to_numeric(df_chart[stress_col], errors='coerce').fillna(3),
-                    colorscale=[[0, "#4CAF50"], [0.5, "#FFC107"], [1.0, "#FF5252"]],
-                    cmin=1, cmax=5, line=dict(width=1, color='white')
-                ),
-                customdata=pd.to_numeric(df_chart[stress_col], errors='coerce').fillna(3),
-                hovertemplate="<b>תאריך ושעה:</b> %{x|%d/%m %H:%M}<br><b>זמן:</b> %{y} שעות<br><b>לחץ:</b> %{customdata}<extra></extra>"
-            ))
-
-            # --- עיצוב ---
-            fig.update_layout(
-                title="🐕 ניתוח עומס והתקדמות של מייפל",
-                yaxis_title="עומס משוקלל / זמן",
-                hovermode="closest", # חובה כדי שאפשר יהיה לבחור מתוך אימונים סמוכים
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                margin=dict(l=0, r=0, t=60, b=50),
-                height=500
-            )
-            
-            fig.update_xaxes(
-                tickfont=dict(size=14),
-                automargin=True,
-                tickformat="%d/%m"
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            st.link_button("פתח את הגיליון המלא בגוגל שיטס 📊", SHEET_URL, use_container_width=True)
+            # הגרף נבנה מחדש רק כשהנתונים או החלון השתנו (ראו figures.py)
+            window = window_selector("train_window")
+            fig = cached_figure(current_journal().slug, "Training", version, window, training_state(df_all),
+                                name=current_journal().name)
+            show_chart(fig)
+            if current_journal().sheet_url:  # ליומן מקומי בלבד (sqlite) אין גיליון לפתוח
+                st.link_button("פתח את הגיליון המלא בגוגל שיטס 📊", current_journal().sheet_url, use_container_width=True)
 
         else:
             st.info("אין מספיק נתונים להצגת הגרף המאוחד.")
 
 # --- טאב 2: האכלות (Feeding) - גרסה עם גרף צבעוני ---
-with tab2:
+@st.fragment
+@measured_tab("Feeding")
+def feeding_tab():
     st.header("יומן אכילה")
     
     # --- חלק א: הוספה חדשה ---
@@ -415,72 +619,52 @@ with tab2:
             
             if append_row("Feeding", row):
                 st.success("הארוחה נשמרה!")
-                st.rerun()
+                rerun_fragment()
 
     st.divider()
 
-    # --- חלק ב: עריכה חכמה (10 אחרונים) ---
-    st.subheader("✏️ עריכת היסטוריית האכלות (10 אחרונים)")
+    # --- חלק ב: עריכה חכמה (10 בכל עמוד, מהאחרונים אחורה) ---
+    st.subheader("✏️ עריכת היסטוריית האכלות")
     
+    version = data_version("Feeding")
     df_food = get_data("Feeding")
     
     if not df_food.empty:
-        # ניקוי נתונים
-        if 'Date' in df_food.columns:
-            df_food['Date'] = pd.to_datetime(df_food['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-        if 'Time' in df_food.columns:
-            df_food['Time'] = df_food['Time'].astype(str).apply(lambda x: x[:5] if len(x) > 5 else x)
-
-        # חיתוך ל-10 אחרונים ועורך
-        df_tail = df_food.tail(10)
-
-        if 'feed_original' not in st.session_state:
-            st.session_state['feed_original'] = df_tail.copy()
+        # רק העמוד המוצג נקרא מהגיליון
+        df_tail = history_page("Feeding", "feed")
 
         edited_feed = st.data_editor(
             df_tail, 
             num_rows="fixed", 
             use_container_width=True, 
-            key="feed_editor",
+            key=editor_key("feed"),
             column_config={
+                "Date": st.column_config.DateColumn("תאריך", format="YYYY-MM-DD"),
                 "Amount": st.column_config.NumberColumn("כמות (כוסות)", format="%.2f"),
                 "Finished": st.column_config.CheckboxColumn("סיימה?", default=True),
+                "ID": None,  # מזהה פנימי, לא לעריכה
             }
         )
         
         if st.button("שמור שינויים בטבלה 💾", key="save_feed_btn"):
-            if smart_update("Feeding", st.session_state['feed_original'], edited_feed):
-                del st.session_state['feed_original']
+            if smart_update("Feeding", st.session_state.get('feed_original', df_tail), edited_feed,
+                            st.session_state.get('feed_base')):
+                forget_page("feed")
                 st.success("הטבלה עודכנה!")
-                st.rerun()
+                rerun_fragment()
 
         # --- חלק ג: הגרף הצבעוני ---
         st.divider()
         if 'Amount' in df_food.columns and 'Finished' in df_food.columns:
-            df_chart = df_food.copy()
-            df_chart['Date'] = pd.to_datetime(df_chart['Date'], errors='coerce')
-            df_chart['Amount'] = pd.to_numeric(df_chart['Amount'], errors='coerce').fillna(0)
-            
-            # קיבוץ גם לפי תאריך וגם לפי "האם סיימה" (כדי לפצל צבעים)
-            daily = df_chart.groupby(['Date', 'Finished'])['Amount'].sum().reset_index()
-            
             st.caption("📊 כמות אוכל יומית (כוסות):")
-            
-            # יצירת גרף עם צבעים מותאמים אישית
-            fig = px.bar(daily, x='Date', y='Amount', color='Finished',
-                         title="מעקב אכילה (ירוק=סיימה, אדום=לא סיימה)",
-                         # כאן המג'יק קורה: מיפוי צבעים
-                         color_discrete_map={
-                             "כן": "#4CAF50",  # ירוק
-                             "לא": "#FF5252"   # אדום בוהק
-                         },
-                         labels={'Date': 'תאריך', 'Amount': 'כמות', 'Finished': 'סיימה?'})
-            
-            fig.update_xaxes(dtick="D1", tickformat="%d/%m")
-            st.plotly_chart(fig, use_container_width=True)
+            window = window_selector("feed_window")
+            fig = cached_figure(current_journal().slug, "Feeding", version, window, df_food, archived_daily("Feeding"))
+            show_chart(fig)
             
 # --- טאב 3: משימות (Tasks) ---
-with tab3:
+@st.fragment
+@measured_tab("Tasks")
+def tasks_tab():
     st.header("ניהול משימות")
     
     # טופס יצירת תרגיל חדש
@@ -494,17 +678,16 @@ with tab3:
             if sub_new_task and t_name:
                 if append_row("Tasks", [t_name, t_freq, t_desc, "Active"]):
                     st.success("התרגיל נוסף לרשימה!")
-                    st.rerun()
+                    rerun_fragment()
 
     st.divider()
     
     # טופס תיעוד ביצוע
     st.subheader("✅ תיעוד ביצוע תרגיל")
     
-    df_tasks = get_data("Tasks")
-    active_tasks = []
-    if not df_tasks.empty and 'TaskName' in df_tasks.columns:
-        active_tasks = df_tasks[df_tasks.get('Status', 'Active') == 'Active']['TaskName'].tolist()
+    progress, version = task_progress()
+    summary = progress.summary
+    active_tasks = summary.loc[summary['Status'] == 'Active', 'TaskName'].tolist()
     
     if active_tasks:
         with st.form("log_task_form", clear_on_submit=True):
@@ -523,47 +706,70 @@ with tab3:
             if sub_log:
                 if append_row("TaskLogs", [str(l_date), sel_task, l_score, l_note]):
                     st.success("הביצוע תועד בהצלחה!")
-                    st.rerun()
+                    rerun_fragment()
     else:
         st.info("אין תרגילים פעילים. צור תרגיל חדש למעלה.")
     
     st.divider()
-    st.subheader("📊 היסטוריית ביצועים")
-
-    # קריאת הנתונים מהגיליון TaskLogs
-    df_logs = get_data("TaskLogs")
-
-    if not df_logs.empty:
-        # המרה לפורמט תאריך ומספר כדי שהגרף יעבוד
-        if 'Date' in df_logs.columns:
-            df_logs['Date'] = pd.to_datetime(df_logs['Date'], errors='coerce')
-        if 'Success' in df_logs.columns:
-            df_logs['Success'] = pd.to_numeric(df_logs['Success'], errors='coerce')
-
-        # הצגת גרף נקודות (Scatter) - הכי מתאים לציונים בודדים
-        if 'Date' in df_logs.columns and 'Success' in df_logs.columns:
-            # מיון לפי תאריך
-            df_logs = df_logs.sort_values('Date')
-            
-            fig_task = px.scatter(df_logs, x='Date', y='Success', color='TaskName',
-                                  title="מעקב הצלחה לפי תרגיל",
-                                  labels={'Success': 'ציון (1-5)', 'Date': 'תאריך'})
-            # קובע שהציר יהיה תמיד מ-1 עד 5
-            fig_task.update_yaxes(range=[0.5, 5.5], dtick=1) 
-            # תיקון לציר ה-X שלא יראה שעות
-            fig_task.update_xaxes(dtick="D1", tickformat="%d/%m")
-            
-            st.plotly_chart(fig_task, use_container_width=True)
+    st.subheader("📊 התקדמות לפי תרגיל")
 
-        # הצגת הטבלה המלאה למטה
-        with st.expander("ראה טבלה מלאה"):
-            st.dataframe(df_logs, use_container_width=True)
-    else:
+    if summary.empty:
         st.info("עדיין אין נתונים ביומן הביצועים (TaskLogs).")
+        return
+
+    show_all = st.toggle("הצג גם תרגילים לא פעילים", key="tasks_show_inactive")
+    view = summary if show_all else summary[summary['Status'] == 'Active']
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("תרגילים פעילים", len(active_tasks))
+    c2.metric("תורגלו היום", int((view['DaysSince'] == 0).sum()))
+    c3.metric("עמידה בתדירות (ממוצע)",
+              f"{view['Compliance'].mean():.0%}" if view['Compliance'].notna().any() else "—")
+
+    # שורה לכל תרגיל במקום נקודה לכל רישום (ראו task_analytics.py)
+    st.dataframe(task_table(view), hide_index=True, use_container_width=True,
+                 column_order=TASK_TABLE_COLUMNS, column_config=TASK_TABLE_CONFIG)
+
+    # גרף: ממוצע שבועי לתרגילים שנבחרו (ברירת מחדל: חמשת האחרונים שתורגלו)
+    recent = view.dropna(subset=['LastDate']).nsmallest(5, 'DaysSince')['TaskName'].tolist()
+    selected = st.multiselect("תרגילים בגרף", view['TaskName'].tolist(), default=recent,
+                              key="tasks_chart_tasks")
+    if selected:
+        window = window_selector("tasks_window")
+        weekly = progress.weekly[progress.weekly['TaskName'].isin(selected)]
+        fig_task = cached_figure(current_journal().slug, "TaskLogs", version + (tuple(selected),),
+                                 window, weekly)
+        show_chart(fig_task)
+
+    # הרישומים עצמם: רק האחרונים, כדי שהטבלה לא תשלח לדפדפן שנים של שורות
+    with st.expander(f"ראה {RAW_LOG_ROWS} רישומים אחרונים"):
+        df_logs = get_data("TaskLogs")
+        st.dataframe(df_logs.tail(RAW_LOG_ROWS).iloc[::-1], use_container_width=True,
+                     column_config={"ID": None})
 
+# --- האפליקציה ---
+select_journal()
+st.set_page_config(page_title=f"היומן של {current_journal().name}")
+st.title(f"🐕 המעקב של {current_journal().name}")
+show_write_queue_status()
 
+# בשרת חם החימום כבר הסתיים; אחרי הפעלה מחדש מציגים את המסגרת בלי לחכות לגוגל
+data_ready = get_warmup().wait(timeout=0.3)
 
+# on_change="rerun" מפעיל מעקב אחרי הטאב הפתוח, כך שרק הוא נטען ומצויר
+tab1, tab2, tab3 = st.tabs(["🏃 הישארות לבד", "🦴 האכלות", "🎓 משימות"], key="active_tab", on_change="rerun")
 
+with tab1:
+    if tab1.open:
+        training_tab() if data_ready else show_loading()
+with tab2:
+    if tab2.open:
+        feeding_tab() if data_ready else show_loading()
+with tab3:
+    if tab3.open:
+        tasks_tab() if data_ready else show_loading()
 
+show_bulk_tools()
 
-
+if diagnostics_enabled():
+    show_diagnostics()
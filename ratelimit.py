@@ -0,0 +1,148 @@
+"""
+מגביל קצב ומדיניות ניסיונות חוזרים לכל הקריאות ל-Google Sheets API.
+
+גוגל מרשה בערך 60 בקשות בדקה למשתמש. במקום שכל פונקציה תחכה ותנסה שוב
+בדרך משלה, כל הקריאות עוברות דרך SheetsCaller אחד, שמשותף לכל הגולשים:
+- "דלי אסימונים" (token bucket) שמפזר את הבקשות כך שנישאר מתחת למכסה,
+- המתנה מדורגת עם רעש אקראי (jitter) בין ניסיונות, כדי שכמה גולשים לא ינסו שוב
+  בדיוק באותו רגע,
+- זיהוי שגיאות שכדאי לנסות שוב (429, 5xx, ניתוק רשת) לפי קוד התשובה ולא לפי הטקסט.
+"""
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+import diagnostics
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def status_code(error):
+    """קוד ה-HTTP של שגיאת gspread, או None אם זו לא שגיאת API"""
+    if isinstance(error, gspread.exceptions.APIError):
+        response = getattr(error, "response", None)
+        return getattr(response, "status_code", None) or getattr(error, "code", None)
+    return None
+
+
+def is_retryable(error, idempotent=True):
+    """
+    idempotent=False (הוספה, מחיקה): רק 429, שגוגל דוחה לפני שעשה משהו. אחרי ניתוק,
+    timeout או 5xx ייתכן שהבקשה כבר בוצעה, וניסיון נוסף היה מוסיף או מוחק פעמיים.
+    """
+    if not idempotent:
+        return status_code(error) == 429
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return status_code(error) in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    """
+    rate_per_minute אסימונים מתמלאים בהדרגה לאורך הדקה; כל בקשה צורכת אסימון.
+    burst הוא כמה בקשות מותר לשלוח ברצף כשהדלי מלא.
+    """
+
+    def __init__(self, rate_per_minute=60, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, rate_per_minute // 4)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """שומר אסימון ומחזיר כמה שניות צריך לחכות עד שמותר לשלוח"""
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def drain(self):
+        # גוגל החזיר 429 - כנראה שיש צרכנים נוספים במכסה, אז מרוקנים את הדלי
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens = min(self._tokens, 0.0)
+
+
+class SharedQuota:
+    """
+    מכסה של יומן אחד בתוך המכסה המשותפת של השרת (ראו tenants.py).
+    כל היומנים עובדים עם אותו חשבון שירות, והמכסה של גוגל היא לחשבון, לכן כל בקשה
+    צורכת אסימון גם מהדלי של היומן וגם מהדלי המשותף. הדלי של היומן קטן מהמשותף,
+    כך שיומן עמוס לא יכול לקחת את כל המכסה ולהשאיר את האחרים בלי.
+    """
+
+    def __init__(self, own, shared):
+        self.own = own
+        self.shared = shared
+
+    def acquire(self, tokens=1):
+        return self.own.acquire(tokens) + self.shared.acquire(tokens)
+
+    def drain(self):
+        # 429 אומר שהמכסה של החשבון נגמרה - לכל היומנים, לא רק לזה שקיבל אותו
+        self.shared.drain()
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=32.0, rng=random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+
+    def delay(self, attempt):
+        # "full jitter": זמן אקראי בין 0 לבין 1, 2, 4, 8... שניות
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+
+class SheetsCaller:
+    """
+    מריץ כל קריאה ל-API דרך מגביל הקצב, עם ניסיונות חוזרים לפי המדיניות.
+    כל ניסיון נספר ונמדד (sheets.<שם הפעולה>), וכך גם ההמתנות - ראו diagnostics.py.
+    labels: תוויות קבועות למונים (למשל journal=...), כדי לראות כמה כל יומן צורך.
+    """
+
+    def __init__(self, limiter=None, policy=None, sleep=time.sleep, labels=None):
+        self.limiter = limiter or TokenBucket()
+        self.policy = policy or RetryPolicy()
+        self.sleep = sleep
+        self.labels = dict(labels or {})
+
+    def call(self, fn, *args, idempotent=True, **kwargs):
+        """idempotent=False לכתיבות שאסור לשלוח פעמיים - ראו is_retryable"""
+        method = getattr(fn, "__name__", "call")
+        for attempt in range(self.policy.max_attempts):
+            waited = self.limiter.acquire()
+            if waited:
+                diagnostics.observe("sheets.rate_limit_wait", waited, method=method, **self.labels)
+            diagnostics.api_call(method, **self.labels)
+            try:
+                with diagnostics.span(f"sheets.{method}"):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                diagnostics.count("sheets_api_errors", method=method, status=status_code(e), **self.labels)
+                if not is_retryable(e, idempotent) or attempt == self.policy.max_attempts - 1:
+                    raise
+                if status_code(e) == 429:
+                    self.limiter.drain()
+                delay = self.policy.delay(attempt)
+                diagnostics.observe("sheets.retry_sleep", delay, method=method)
+                self.sleep(delay)
@@ -0,0 +1,172 @@
+"""
+מזהה קבוע לכל שורה ביומנים (עמודת ID), כדי שעריכה תגיע לשורה הנכונה.
+
+עד עכשיו עריכה בעורך נכתבה למספר השורה שהיה כשהעמוד נטען (אינדקס + 2).
+אם בינתיים נוספה או נמחקה שורה ממכשיר אחר, העריכה הייתה נכתבת לשורה אחרת.
+עכשיו:
+- כל שורה חדשה מקבלת מזהה כבר כשהיא נכנסת לתור הכתיבה (with_id),
+- שורות ישנות מקבלות מזהה פעם אחת בהפעלה (ensure_ids),
+- לפני שמירה בודקים את סימן השינוי של הגיליון (רענון זול של המטמון), ומוצאים
+  את המספר הנוכחי של כל שורה לפי המזהה באינדקס של המטמון,
+- בדיקה אופטימית: השורות עצמן נקראות מהגיליון בקריאת טווח אחת (לא מהמטמון,
+  שעלול לא לראות עריכה באמצע הגיליון). אם שורה השתנתה מאז שהעמוד נטען (נערכה
+  במכשיר אחר) או נמחקה - היא לא נכתבת, והמשתמש מקבל הודעה. אם במקום שהמטמון
+  מכיר כבר יש שורה אחרת, המטמון נקרא מחדש ובודקים שוב.
+"""
+import uuid
+
+import pandas as pd
+
+import schema
+from cache import _fit
+from schema import ID_COLUMN
+from sheet_diff import SheetDiff, diff_frames
+
+# גיליונות שנערכים לפי שורה (בעורכי ההיסטוריה) ולכן מקבלים מזהה
+KEYED = ("Training", "Feeding", "TaskLogs")
+
+
+def new_id():
+    return uuid.uuid4().hex[:12]
+
+
+def with_id(worksheet_name, row):
+    """שורה מטופס + מזהה חדש בעמודה האחרונה (לפי הסכמה)"""
+    row = list(row)
+    if worksheet_name not in KEYED:
+        return row
+    return _fit(row, len(schema.SCHEMAS[worksheet_name]) - 1) + [new_id()]
+
+
+def _missing_ids(frame):
+    """בטבלה מוקלדת (מהמטמון): חסרה עמודת ID, או שיש שורה עם תוכן ובלי מזהה"""
+    if not len(frame.columns):
+        return False
+    if ID_COLUMN not in frame.columns:
+        return True
+
+    def filled(column):
+        return column.notna() & (column.astype(str).str.strip() != "")
+
+    others = [filled(frame[name]) for name in frame.columns if name != ID_COLUMN]
+    if not others:
+        return False
+    content = pd.concat(others, axis=1).any(axis=1)
+    return bool((content & ~filled(frame[ID_COLUMN])).any())
+
+
+def ensure_ids(backend, worksheet_name, cache=None):
+    """
+    מוסיף עמודת ID (אם אין) ומזהה לכל שורה שאין לה. נכתבת רק עמודת המזהים,
+    בטווח אחד מהשורה הראשונה שחסר בה מזהה ועד האחרונה - שאר התאים לא נוגעים בהם.
+    מחזיר כמה תאים נכתבו (0 בהפעלות הבאות).
+    cache: מטמון שכבר נטען (prefetch). אם בטבלה שבו לכל השורות יש מזהה - וזה המצב
+    בכל הפעלה חוץ מהראשונה - לא קוראים את הגיליון בכלל. אחרי כתיבה הגיליון נקרא
+    למטמון מחדש, כדי שהאינדקס שלו יכיר את המזהים החדשים.
+    """
+    if cache is not None and not _missing_ids(cache.get(worksheet_name)):
+        return 0
+    written = _write_ids(backend, worksheet_name)
+    if written and cache is not None:
+        cache.reload(worksheet_name)
+    return written
+
+
+def _write_ids(backend, worksheet_name):
+    rows = backend.read_all(worksheet_name)
+    if not rows:
+        return 0
+    header = list(rows[0])
+    ids = {}
+    if ID_COLUMN not in header:
+        header.append(ID_COLUMN)
+        ids[1] = ID_COLUMN
+    column = header.index(ID_COLUMN)
+    for row_num, row in enumerate(rows[1:], start=2):
+        row = _fit(row, len(header))
+        if not row[column] and any(row):
+            ids[row_num] = new_id()
+    if not ids:
+        return 0
+    first, last = min(ids), max(ids)
+    # תאים בתוך הטווח שכבר יש בהם מזהה (או שורה ריקה) נכתבים שוב כמו שהם
+    values = [ids.get(row_num) or _fit(rows[row_num - 1], len(header))[column]
+              for row_num in range(first, last + 1)]
+    backend.update_column(worksheet_name, column + 1, first, values)
+    return len(ids)
+
+
+class Conflict:
+    def __init__(self, row_num, reason):
+        self.row_num = row_num  # המספר שהיה בעורך
+        self.reason = reason
+
+    def __repr__(self):
+        return f"Conflict({self.row_num}, {self.reason!r})"
+
+
+def keyed_diff(cache, worksheet_name, original_df, edited_df, base_df=None):
+    """
+    כמו diff_frames, אבל מספרי השורות מתורגמים למספרים הנוכחיים לפי המזהה.
+    base_df: העמוד כפי שנקרא מהגיליון, להשוואה האופטימית (ברירת מחדל: original_df).
+    מחזיר (SheetDiff, [Conflict...]); שורות עם התנגשות לא נכללות ב-diff.
+    """
+    diff = diff_frames(original_df, edited_df)
+    if not diff:
+        return diff, []
+    base_df = original_df if base_df is None else base_df
+
+    # קריאה זולה של סימן השינוי; קוראים שוב מהגיליון רק אם מישהו אחר כתב
+    cache.refresh([worksheet_name])
+
+    touched = [row_num for row_num, _ in diff.updates] + list(diff.deletes)
+    ids = {}
+    if ID_COLUMN in original_df.columns:
+        ids = {row_num: original_df.at[row_num - 2, ID_COLUMN] for row_num in touched}
+
+    result = _check(cache, worksheet_name, touched, ids, base_df)
+    if result is None:
+        # המטמון לא מכיר את המיקום הנוכחי של שורה (נוספו או נמחקו שורות שעוד לא נקראו)
+        cache.reload(worksheet_name)
+        result = _check(cache, worksheet_name, touched, ids, base_df, final=True)
+    current, conflicts = result
+
+    updates = sorted((current[row_num], values) for row_num, values in diff.updates
+                     if row_num in current)
+    deletes = sorted((current[row_num] for row_num in diff.deletes if row_num in current),
+                     reverse=True)
+    return SheetDiff(updates, deletes), conflicts
+
+
+def _check(cache, worksheet_name, row_nums, ids, base_df, final=False):
+    """
+    ({מספר בעורך: מספר עכשיו}, [Conflict...]) לפי השורות כפי שהן עכשיו בגיליון.
+    None (כש-final=False): שורה לא נמצאה במקום שהמטמון מכיר - צריך לקרוא אותו מחדש.
+    """
+    located = cache.locate(worksheet_name, [ids[row_num] for row_num in row_nums if ids.get(row_num)])
+    positions = {}
+    for row_num in row_nums:
+        row_id = ids.get(row_num)
+        # שורה ישנה בלי מזהה: נשארים במספר השורה, אבל עדיין בודקים שהיא לא השתנתה
+        positions[row_num] = (located.get(row_id) or (None,))[0] if row_id else row_num
+    known = [row for row in positions.values() if row is not None]
+    fresh = cache.read_rows(worksheet_name, min(known), max(known)) if known else None
+
+    current, conflicts = {}, []
+    for row_num in row_nums:
+        now_row, row_id = positions[row_num], ids.get(row_num)
+        there = now_row is not None and now_row - 2 in fresh.index
+        if there and row_id and ID_COLUMN in fresh.columns:
+            there = fresh.at[now_row - 2, ID_COLUMN] == row_id
+        if not there:
+            if not final:
+                return None
+            conflicts.append(Conflict(row_num, "השורה נמחקה במכשיר אחר"))
+            continue
+        cells = schema.to_cells(fresh.loc[now_row - 2])
+        width = len(cells)
+        if _fit(cells, width) != _fit(schema.to_cells(base_df.loc[row_num - 2]), width):
+            conflicts.append(Conflict(row_num, "השורה נערכה במכשיר אחר"))
+            continue
+        current[row_num] = now_row
+    return current, conflicts
@@ -0,0 +1,179 @@
+"""
+הסכמה של כל גיליון: איזה טיפוס יש לכל עמודה.
+
+מגוגל שיטס הכל מגיע כטקסט. כאן ממירים פעם אחת, בזמן הטעינה למטמון,
+לעמודות מוקלדות: תאריכים, מספרים, מספרים קטנים וקטגוריות (סוג ארוחה, סיימה?,
+שם תרגיל). גם שמות חלופיים של עמודות (Stress במקום StressLevel) מיושרים כאן,
+כך שהטאבים מקבלים טבלה נקייה וקומפקטית ולא צריכים לנקות אותה בכל ריצה.
+"""
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DATE = "date"
+TIME = "time"
+FLOAT = "float"
+SMALL_INT = "small_int"
+CATEGORY = "category"
+TEXT = "text"
+
+
+# מזהה קבוע של שורה ביומנים (ראו rowids.py) - תמיד העמודה האחרונה
+ID_COLUMN = "ID"
+
+
+class Column:
+    def __init__(self, name, kind, aliases=()):
+        self.name = name
+        self.kind = kind
+        self.aliases = aliases
+
+
+SCHEMAS = {
+    "Training": [
+        Column("Date", DATE),
+        Column("Time", TIME),
+        Column("Duration", FLOAT),
+        Column("StressLevel", SMALL_INT, aliases=("Stress",)),
+        Column("Notes", TEXT),
+        Column(ID_COLUMN, TEXT),
+    ],
+    "Feeding": [
+        Column("Date", DATE),
+        Column("Time", TIME),
+        Column("Type", CATEGORY, aliases=("MealType", "Meal")),
+        Column("Amount", FLOAT),
+        Column("Finished", CATEGORY),
+        Column("Notes", TEXT),
+        Column(ID_COLUMN, TEXT),
+    ],
+    "Tasks": [
+        Column("TaskName", CATEGORY),
+        Column("Frequency", TEXT),
+        Column("Description", TEXT),
+        Column("Status", CATEGORY),
+    ],
+    "TaskLogs": [
+        Column("Date", DATE),
+        Column("TaskName", CATEGORY),
+        Column("Success", SMALL_INT),
+        Column("Notes", TEXT),
+        Column(ID_COLUMN, TEXT),
+    ],
+    # סיכומים יומיים של שורות שהועברו לארכיון (ראו archive.py)
+    "Training_Daily": [
+        Column("Date", DATE),
+        Column("Sessions", FLOAT),
+        Column("Duration", FLOAT),
+        Column("Weighted_Duration", FLOAT),
+    ],
+    "Feeding_Daily": [
+        Column("Date", DATE),
+        Column("Finished", CATEGORY),
+        Column("Meals", FLOAT),
+        Column("Amount", FLOAT),
+    ],
+    "TaskLogs_Daily": [
+        Column("Date", DATE),
+        Column("TaskName", CATEGORY),
+        Column("Logs", FLOAT),
+        Column("Success", FLOAT),
+    ],
+}
+
+
+def resolve_aliases(worksheet_name, df):
+    """משנה שמות חלופיים לשם הקבוע (למשל Stress -> StressLevel)"""
+    renames = {}
+    for column in SCHEMAS.get(worksheet_name, []):
+        if column.name in df.columns:
+            continue
+        for alias in column.aliases:
+            if alias in df.columns:
+                renames[alias] = column.name
+                break
+    return df.rename(columns=renames) if renames else df
+
+
+def _convert(series, kind):
+    if kind == DATE:
+        # האפליקציה כותבת YYYY-MM-DD. בלי פורמט קבוע pandas מנחש אותו מהתא הראשון, ותאריך
+        # אחד שהוקלד ידנית (15/01/2025) בראש הגיליון היה מבטל את כל השאר. מה שלא ISO
+        # מפוענח תא-תא, יום קודם (כמו בישראל)
+        dates = pd.to_datetime(series, format='ISO8601', errors='coerce')
+        rest = dates.isna() & series.notna() & (series.astype(str).str.strip() != "")
+        if rest.any():
+            dates[rest] = pd.to_datetime(series[rest], format='mixed', dayfirst=True, errors='coerce')
+        return dates
+    if kind == TIME:
+        # HH:MM בלבד (בלי שניות ומילי-שניות)
+        return series.astype(str).str[:5]
+    if kind == FLOAT:
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    if kind == SMALL_INT:
+        # ערך שלא נכנס ב-Int8 (טעות הקלדה כמו 300) הופך לחסר, כמו טקסט שאינו מספר -
+        # אחרת ההמרה נכשלת ומפילה את טעינת כל הגיליונות
+        numbers = pd.to_numeric(series, errors='coerce').round()
+        return numbers.where(numbers.between(-128, 127)).astype('Int8')
+    if kind == CATEGORY:
+        return series.astype('category')
+    return series.astype(str)
+
+
+def normalize(worksheet_name, df):
+    """טבלת טקסט מהגיליון -> טבלה מוקלדת לפי הסכמה. עמודות שלא בסכמה נשארות כמו שהן"""
+    if df.empty and not len(df.columns):
+        return df
+    df = resolve_aliases(worksheet_name, df)
+    columns = {}
+    for column in SCHEMAS.get(worksheet_name, []):
+        if column.name in df.columns:
+            columns[column.name] = _convert(df[column.name], column.kind)
+    return df.assign(**columns) if columns else df
+
+
+def concat(frames):
+    """
+    חיבור טבלאות מוקלדות. pd.concat הופך קטגוריות עם ערכים שונים לטקסט,
+    לכן מאחדים את רשימות הקטגוריות לפני החיבור.
+    """
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    first = frames[0]
+    for name in first.columns:
+        if isinstance(first[name].dtype, pd.CategoricalDtype):
+            parts = [f[name].astype('category') for f in frames if name in f.columns]
+            categories = union_categoricals(parts, ignore_order=True).categories
+            frames = [f.assign(**{name: f[name].astype('category').cat.set_categories(categories)})
+                      if name in f.columns else f for f in frames]
+    return pd.concat(frames)
+
+
+def assign_row(frame, idx, typed_row):
+    """מחליף שורה אחת בטבלה מוקלדת (מוסיף קטגוריות חדשות אם צריך)"""
+    for name in frame.columns:
+        if name not in typed_row.columns:
+            continue
+        value = typed_row[name].iloc[0]
+        if isinstance(frame[name].dtype, pd.CategoricalDtype) and not pd.isna(value) \
+                and value not in frame[name].cat.categories:
+            frame[name] = frame[name].cat.add_categories([value])
+        frame.loc[idx, name] = value
+    return frame
+
+
+def to_cells(row):
+    """שורה מוקלדת -> טקסט כמו בגיליון (תאריך כ-YYYY-MM-DD, חסר כריק)"""
+    cells = []
+    for value in row.tolist():
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            cells.append("")
+        elif isinstance(value, pd.Timestamp):
+            cells.append(value.strftime('%Y-%m-%d'))
+        elif isinstance(value, float) and value.is_integer():
+            cells.append(str(int(value)))
+        else:
+            cells.append(str(value))
+    return cells
@@ -0,0 +1,58 @@
+"""
+השוואה בין הטבלה המקורית לטבלה שנערכה ב-data_editor.
+
+מוציאה את כל השינויים בבת אחת - כל השורות שנערכו וכל השורות שנמחקו -
+כדי שמנוע האחסון יוכל להחיל אותם בבקשה אחת (batch_update).
+האינדקס של הטבלה הוא "מספר השורה בגיליון פחות 2", כמו בשאר האפליקציה.
+"""
+import pandas as pd
+
+
+class SheetDiff:
+    def __init__(self, updates, deletes):
+        # [(מספר שורה, [ערכים]), ...] לפי סדר השורות; None = התא לא השתנה ולא נוגעים בו
+        self.updates = updates
+        self.deletes = deletes  # [מספר שורה, ...] מהגבוה לנמוך
+
+    def __bool__(self):
+        return bool(self.updates or self.deletes)
+
+    def __repr__(self):
+        return f"SheetDiff(updates={len(self.updates)}, deletes={len(self.deletes)})"
+
+
+def diff_frames(original_df, edited_df):
+    # שורות שהיו במקור וחסרות עכשיו נמחקו
+    deleted = original_df.index.difference(edited_df.index)
+
+    # משווים כטקסט, כמו קודם, אבל על כל הטבלה בבת אחת
+    common = original_df.index.intersection(edited_df.index)
+    columns = original_df.columns
+    before = original_df.loc[common, columns].astype(str).to_numpy()
+    after = edited_df.loc[common, columns].astype(str).to_numpy()
+    # חסר מול חסר זה אותו ערך (ב-pandas 3 ‏astype(str) משאיר חסרים כ-NaN, ו-NaN != NaN)
+    differs = (before != after) & ~(pd.isna(before) & pd.isna(after))
+    changed = differs.any(axis=1) if len(common) else []
+
+    # רק התאים שהשתנו נכתבים: תא שלא הצליח להתפרש (למשל תאריך שהוקלד ידנית בגיליון)
+    # מופיע בעורך כחסר, ולא נדרס בריק כשעורכים תא אחר באותה שורה
+    updates = [
+        (int(idx) + 2, [value if cell_changed else None
+                        for value, cell_changed in zip(_row_values(edited_df.loc[idx, columns]), row_differs)])
+        for idx, row_differs in sorted(zip(common[changed], differs[changed]))
+    ]
+    deletes = sorted((int(idx) + 2 for idx in deleted), reverse=True)
+    return SheetDiff(updates, deletes)
+
+
+def _row_values(row):
+    values = []
+    for value in row.tolist():
+        if isinstance(value, pd.Timestamp):
+            value = value.strftime("%Y-%m-%d")
+        elif value is pd.NA or value is pd.NaT:
+            value = ""
+        elif hasattr(value, "item"):  # numpy -> פייתון רגיל
+            value = value.item()
+        values.append(value)
+    return values
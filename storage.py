@@ -0,0 +1,744 @@
+"""
+שכבת אחסון ליומן של מייפל.
+
+כל קריאה וכתיבה של האפליקציה עוברת דרך "מנוע אחסון" (backend) אחד,
+כך שאפשר להחליף את גוגל שיטס במסד נתונים מקומי (SQLite) בלי לגעת בממשק.
+
+מספור השורות זהה בכל המנועים ומחקה את הגיליון:
+שורה 1 היא שורת הכותרות, והנתונים מתחילים משורה 2.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import gspread
+
+import diagnostics
+from ratelimit import SheetsCaller, TokenBucket, status_code
+
+log = logging.getLogger(__name__)
+
+
+def _cell_data(value):
+    # ערך בפורמט של updateCells ב-batch_update
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        if value != value:  # NaN
+            return {}
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": to_cell(value)}}
+
+
+def _merge_cells(current, values):
+    """הערכים החדשים מעל השורה הקיימת; None = משאירים את התא הקיים"""
+    current = list(current) + [""] * (len(values) - len(current))
+    return [old if new is None else new for old, new in zip(current, values)] + current[len(values):]
+
+
+def _cell_runs(values):
+    """[(עמודה ראשונה מ-0, [ערכים רצופים])] - רק התאים שאינם None"""
+    runs = []
+    for column, value in enumerate(values):
+        if value is None:
+            continue
+        if runs and runs[-1][0] + len(runs[-1][1]) == column:
+            runs[-1][1].append(value)
+        else:
+            runs.append((column, [value]))
+    return runs
+
+
+def _row_spans(row_nums):
+    """מספרי שורות -> טווחים רצופים (ראשונה, אחרונה), מהסוף להתחלה"""
+    spans = []
+    for row_num in sorted(set(int(r) for r in row_nums), reverse=True):
+        if spans and spans[-1][0] == row_num + 1:
+            spans[-1][0] = row_num
+        else:
+            spans.append([row_num, row_num])
+    return [tuple(span) for span in spans]
+
+
+def to_cell(value):
+    """ממיר ערך פייתון לטקסט כפי שהגיליון היה מחזיר אותו (1.0 -> '1')"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+class StorageBackend:
+    """
+    הממשק שכל מנוע אחסון צריך לממש.
+    הערכים חוזרים תמיד כרשימה של רשימות טקסט, בדיוק כמו get_all_values.
+    """
+    name = "base"
+    # True: change_tokens הוא סימן נפרד וזול (מקומי) לכל גיליון, כך שסימן שזז בלי
+    # שורות חדשות פירושו עריכה באותו גיליון. False: סימן אחד לכל הקובץ (modifiedTime)
+    worksheet_tokens = False
+
+    def read_all(self, worksheet_name):
+        raise NotImplementedError
+
+    def read_range(self, worksheet_name, start_row, end_row, width=None):
+        """השורות start_row עד end_row (כולל); width = מספר העמודות לקריאה"""
+        return self.read_all(worksheet_name)[start_row - 1:end_row]
+
+    def append_row(self, worksheet_name, row):
+        raise NotImplementedError
+
+    def append_rows(self, worksheet_name, rows):
+        for row in rows:
+            self.append_row(worksheet_name, row)
+
+    def update_row(self, worksheet_name, row_num, values):
+        raise NotImplementedError
+
+    def delete_row(self, worksheet_name, row_num):
+        raise NotImplementedError
+
+    def replace_all(self, worksheet_name, values):
+        raise NotImplementedError
+
+    def update_column(self, worksheet_name, column, first_row, values):
+        """
+        כותב values לעמודה אחת (column, מ-1) מהשורה first_row והלאה,
+        בלי לגעת בשאר התאים של השורות.
+        """
+        rows = self.read_range(worksheet_name, first_row, first_row + len(values) - 1)
+        updates = []
+        for row_num, (row, value) in enumerate(zip(rows, values), start=first_row):
+            row = list(row) + [""] * (column - len(row))
+            row[column - 1] = value
+            updates.append((row_num, row))
+        self.apply_changes(worksheet_name, updates, [])
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        """
+        מחיל עריכות ומחיקות יחד. updates הם (מספר שורה, ערכים) לפי המספור
+        שלפני המחיקה, ו-deletes הם מספרי שורות מהגבוה לנמוך.
+        ערך None בעריכה = התא לא משתנה (ראו sheet_diff).
+        """
+        for row_num, values in updates:
+            if any(v is None for v in values):
+                current = (self.read_range(worksheet_name, row_num, row_num) or [[]])[0]
+                values = _merge_cells(current, values)
+            self.update_row(worksheet_name, row_num, values)
+        for row_num in sorted(deletes, reverse=True):
+            self.delete_row(worksheet_name, row_num)
+
+    def warm_up(self):
+        """הכנות שכדאי לעשות מראש בהפעלה (חיבור, handles). ברירת מחדל: אין"""
+
+    def ensure_worksheet(self, worksheet_name, header):
+        """יוצר גיליון (עם שורת כותרות) אם הוא לא קיים או ריק"""
+        if not self.read_all(worksheet_name):
+            self.replace_all(worksheet_name, [header])
+
+    def client(self):
+        """הלקוח של gspread, אם המנוע מדבר עם גוגל וכבר התחבר (לרענון הטוקן)"""
+        return None
+
+    def change_tokens(self, worksheet_names):
+        """
+        סימן זול שמשתנה בכל כתיבה (שם גיליון -> ערך כלשהו), כדי לדעת אם צריך
+        לקרוא שוב בלי לקרוא את הנתונים עצמם. None = המנוע לא יודע, והמטמון עובד לפי זמן.
+        """
+        return None
+
+    def read_many(self, worksheet_names, start_rows=None):
+        """
+        קריאה של כמה גיליונות; מנועים שיודעים לאחד בקשות דורסים את זה.
+        start_rows (שם -> מספר שורה) מאפשר לקרוא רק מהשורה הזו והלאה.
+        """
+        start_rows = start_rows or {}
+        return {name: self.read_all(name)[start_rows.get(name, 1) - 1:]
+                for name in worksheet_names}
+
+
+# --- מנוע גוגל שיטס ---
+class SheetsBackend(StorageBackend):
+    """
+    כל קריאה ל-gspread עוברת דרך caller (ראו ratelimit.py),
+    שמשותף לכל הגולשים ושומר שנישאר מתחת למכסה של גוגל.
+    """
+    name = "sheets"
+
+    def __init__(self, client_factory, sheet_url, caller=None):
+        # client_factory היא פונקציה שמחזירה לקוח gspread מאומת (כמו get_client)
+        self.client_factory = client_factory
+        self.sheet_url = sheet_url
+        self.caller = caller or SheetsCaller()
+        self._lock = threading.Lock()
+        self._client = None
+        self._spreadsheet = None
+        self._worksheets = {}
+
+    def _call(self, fn, *args, **kwargs):
+        return self.caller.call(fn, *args, **kwargs)
+
+    def client(self):
+        return self._client
+
+    def spreadsheet(self):
+        # open_by_url עולה קריאת API - שומרים את ה-handle לכל חיי השרת
+        with self._lock:
+            if self._spreadsheet is None:
+                self._client = self.client_factory()
+                self._spreadsheet = self._call(self._client.open_by_url, self.sheet_url)
+            return self._spreadsheet
+
+    def _load_worksheets(self):
+        # קריאה אחת מביאה את כל הלשוניות, במקום קריאה נפרדת לכל worksheet()
+        handles = self._call(self.spreadsheet().worksheets)
+        with self._lock:
+            self._worksheets = {ws.title: ws for ws in handles}
+
+    def warm_up(self):
+        self._load_worksheets()
+
+    def worksheet(self, worksheet_name):
+        with self._lock:
+            handle = self._worksheets.get(worksheet_name)
+        if handle is not None:
+            return handle
+        self._load_worksheets()
+        with self._lock:
+            if worksheet_name not in self._worksheets:
+                raise gspread.exceptions.WorksheetNotFound(worksheet_name)
+            return self._worksheets[worksheet_name]
+
+    def read_all(self, worksheet_name):
+        return self._call(self.worksheet(worksheet_name).get_all_values)
+
+    def read_range(self, worksheet_name, start_row, end_row, width=None):
+        # רק הטווח שביקשו (למשל A2:F11), בלי להוריד את כל הגיליון
+        last_col = gspread.utils.rowcol_to_a1(1, width)[:-1] if width else "ZZZ"
+        return self._call(self.worksheet(worksheet_name).get_values,
+                          f"A{start_row}:{last_col}{end_row}")
+
+    def _titles(self):
+        with self._lock:
+            loaded = bool(self._worksheets)
+        if not loaded:
+            self._load_worksheets()
+        with self._lock:
+            return set(self._worksheets)
+
+    def read_many(self, worksheet_names, start_rows=None):
+        # בקשה אחת (values_batch_get) לכל הלשוניות יחד, מלאות או רק מהשורה שביקשו.
+        # לשונית שלא קיימת (למשל סיכום ארכיון שעוד לא נוצר) חוזרת ריקה ולא מפילה את כל הבקשה:
+        # אם כבר יש handles מסננים לפיהם, ואם לא - מנסים את כולן, ורק כשגוגל דוחה טווח
+        # (400) קוראים את רשימת הלשוניות. כך טעינה קרה עולה בקשה אחת ולא שתיים
+        start_rows = start_rows or {}
+        with self._lock:
+            titles = set(self._worksheets) if self._worksheets else None
+        if titles is None:
+            try:
+                return self._read_existing(worksheet_names, list(worksheet_names), start_rows)
+            except gspread.exceptions.APIError as e:
+                if status_code(e) != 400:
+                    raise
+            titles = self._titles()
+        existing = [name for name in worksheet_names if name in titles]
+        return self._read_existing(worksheet_names, existing, start_rows)
+
+    def _read_existing(self, worksheet_names, existing, start_rows):
+        ranges = []
+        for name in existing:
+            start = start_rows.get(name, 1)
+            ranges.append(f"'{name}'!A{start}:ZZZ" if start > 1 else f"'{name}'")
+        values = {name: [] for name in worksheet_names}
+        if not ranges:
+            return values
+        response = self._call(self.spreadsheet().values_batch_get, ranges)
+        for name, vr in zip(existing, response.get("valueRanges", [])):
+            values[name] = gspread.utils.fill_gaps(vr["values"]) if vr.get("values") else []
+        return values
+
+    def ensure_worksheet(self, worksheet_name, header):
+        if worksheet_name not in self._titles():
+            sheet = self._call(self.spreadsheet().add_worksheet, title=worksheet_name,
+                               rows=1000, cols=max(len(header), 1), idempotent=False)
+            with self._lock:
+                self._worksheets[worksheet_name] = sheet
+        sheet = self.worksheet(worksheet_name)
+        if not self._call(sheet.row_values, 1):
+            self._call(sheet.update, range_name="A1", values=[header])
+
+    def change_tokens(self, worksheet_names):
+        # modifiedTime של הקובץ ב-Drive: קריאה אחת קטנה לכל הגיליונות יחד. הסימן משותף
+        # לכל הקובץ: אם ישתנה גיליון אחד, כולם ייקראו שוב - אבל רק כדלתא מהשורה האחרונה
+        try:
+            modified = self._call(self.spreadsheet().get_lastUpdateTime)
+        except Exception as e:
+            log.warning("לא הצלחתי לקרוא את זמן העדכון מ-Drive, עובדים לפי זמן: %s", e)
+            return None
+        return {name: modified for name in worksheet_names}
+
+    def append_row(self, worksheet_name, row):
+        self._call(self.worksheet(worksheet_name).append_row, row, idempotent=False)
+
+    def append_rows(self, worksheet_name, rows):
+        # כל השורות בבקשה אחת
+        self._call(self.worksheet(worksheet_name).append_rows, rows, idempotent=False)
+
+    def update_row(self, worksheet_name, row_num, values):
+        self._call(self.worksheet(worksheet_name).update, range_name=f"A{row_num}", values=[values])
+
+    def delete_row(self, worksheet_name, row_num):
+        self._call(self.worksheet(worksheet_name).delete_rows, int(row_num), idempotent=False)
+
+    def update_column(self, worksheet_name, column, first_row, values):
+        # טווח אחד ברוחב עמודה (למשל E1:E500); ערכים כטקסט, כמו שהם
+        letter = gspread.utils.rowcol_to_a1(1, column)[:-1]
+        range_name = f"{letter}{first_row}:{letter}{first_row + len(values) - 1}"
+        self._call(self.worksheet(worksheet_name).update, range_name=range_name,
+                   values=[[value] for value in values])
+
+    def replace_all(self, worksheet_name, values):
+        # התוכן החדש נכתב מעל הישן, ורק אחר כך מנקים את מה שנשאר מתחתיו ומימינו.
+        # אין רגע שבו הגיליון ריק: אם הכתיבה נכשלת באמצע, הנתונים הישנים עדיין שם
+        sheet = self.worksheet(worksheet_name)
+        width = max((len(row) for row in values), default=0)
+        values = [(list(row) + [""] * width)[:width] for row in values]
+        if values:
+            self._call(sheet.update, range_name="A1", values=values)
+        leftovers = [f"A{len(values) + 1}:ZZZ"]
+        if values:
+            next_col = gspread.utils.rowcol_to_a1(1, width + 1)[:-1]
+            leftovers.append(f"{next_col}1:ZZZ{len(values)}")
+        self._call(sheet.batch_clear, leftovers)
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        # כל העריכות ואחריהן כל המחיקות (מהסוף להתחלה) בבקשת batch_update אחת.
+        # גוגל מבצע את הבקשות לפי הסדר, לכן מספרי השורות בעריכות עדיין נכונים.
+        sheet_id = self.worksheet(worksheet_name).id
+        # רק התאים שהשתנו: כל רצף של תאים סמוכים בשורה הוא updateCells משלו
+        requests = [
+            {"updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": row_num - 1, "columnIndex": column},
+                "rows": [{"values": [_cell_data(v) for v in run]}],
+                "fields": "userEnteredValue",
+            }}
+            for row_num, values in updates
+            for column, run in _cell_runs(values)
+        ]
+        # שורות רצופות נמחקות בטווח אחד (למשל העברה לארכיון של חודש שלם)
+        requests += [
+            {"deleteDimension": {"range": {
+                "sheetId": sheet_id, "dimension": "ROWS",
+                "startIndex": first - 1, "endIndex": last,
+            }}}
+            for first, last in _row_spans(deletes)
+        ]
+        if requests:
+            # עריכות בלבד אפשר לשלוח שוב; מחיקה שנשלחה פעמיים מוחקת שורות אחרות
+            self._call(self.spreadsheet().batch_update, {"requests": requests},
+                       idempotent=not deletes)
+
+
+# --- מנוע מקומי: SQLite ---
+class SQLiteBackend(StorageBackend):
+    """
+    כל גיליון נשמר כרצף שורות בטבלה אחת, לפי סדר ההכנסה.
+    שורת הכותרות היא השורה הראשונה של כל גיליון, כך שמספרי השורות
+    יוצאים זהים לגוגל שיטס.
+    path=":memory:" נותן מסד זמני לבדיקות ולמדידות ביצועים.
+    """
+    name = "sqlite"
+    worksheet_tokens = True
+
+    def __init__(self, path="maple.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_rows ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " worksheet TEXT NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sheet_rows_ws ON sheet_rows (worksheet, id)"
+        )
+        # מונה כתיבות לכל גיליון (ראו change_tokens); עולה בכל כתיבה, גם מתהליך אחר
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_versions ("
+            " worksheet TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _bump(self, worksheet_name):
+        # נקרא בתוך הטרנזקציה של הכתיבה עצמה
+        self._conn.execute(
+            "INSERT INTO sheet_versions (worksheet, version) VALUES (?, 1)"
+            " ON CONFLICT(worksheet) DO UPDATE SET version = version + 1",
+            (worksheet_name,),
+        )
+
+    def change_tokens(self, worksheet_names):
+        names = list(worksheet_names)
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT worksheet, version FROM sheet_versions"
+                f" WHERE worksheet IN ({','.join('?' * len(names))})", names
+            )
+            versions = dict(cur.fetchall())
+        return {name: versions.get(name, 0) for name in names}
+
+    def _row_id(self, worksheet_name, row_num):
+        # מספר שורה בסגנון גיליון (מתחיל ב-1) -> המזהה הפנימי של השורה
+        cur = self._conn.execute(
+            "SELECT id FROM sheet_rows WHERE worksheet = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (worksheet_name, int(row_num) - 1),
+        )
+        found = cur.fetchone()
+        if found is None:
+            raise IndexError(f"שורה {row_num} לא קיימת בגיליון {worksheet_name}")
+        return found[0]
+
+    def read_all(self, worksheet_name):
+        return self.read_from(worksheet_name, 1)
+
+    def read_from(self, worksheet_name, start_row):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM sheet_rows WHERE worksheet = ? ORDER BY id LIMIT -1 OFFSET ?",
+                (worksheet_name, int(start_row) - 1),
+            )
+            return [json.loads(data) for (data,) in cur]
+
+    def read_range(self, worksheet_name, start_row, end_row, width=None):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM sheet_rows WHERE worksheet = ? ORDER BY id LIMIT ? OFFSET ?",
+                (worksheet_name, max(0, int(end_row) - int(start_row) + 1), int(start_row) - 1),
+            )
+            rows = [json.loads(data) for (data,) in cur]
+        return [row[:width] for row in rows] if width else rows
+
+    def read_many(self, worksheet_names, start_rows=None):
+        start_rows = start_rows or {}
+        return {name: self.read_from(name, start_rows.get(name, 1)) for name in worksheet_names}
+
+    def append_row(self, worksheet_name, row):
+        self.append_rows(worksheet_name, [row])
+
+    def append_rows(self, worksheet_name, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO sheet_rows (worksheet, data) VALUES (?, ?)",
+                [(worksheet_name, json.dumps([to_cell(v) for v in row], ensure_ascii=False))
+                 for row in rows],
+            )
+            self._bump(worksheet_name)
+
+    def update_row(self, worksheet_name, row_num, values):
+        with self._lock, self._conn:
+            row_id = self._row_id(worksheet_name, row_num)
+            self._conn.execute(
+                "UPDATE sheet_rows SET data = ? WHERE id = ?",
+                (json.dumps([to_cell(v) for v in values], ensure_ascii=False), row_id),
+            )
+            self._bump(worksheet_name)
+
+    def delete_row(self, worksheet_name, row_num):
+        with self._lock, self._conn:
+            row_id = self._row_id(worksheet_name, row_num)
+            self._conn.execute("DELETE FROM sheet_rows WHERE id = ?", (row_id,))
+            self._bump(worksheet_name)
+
+    def update_column(self, worksheet_name, column, first_row, values):
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "SELECT id, data FROM sheet_rows WHERE worksheet = ? ORDER BY id LIMIT ? OFFSET ?",
+                (worksheet_name, len(values), int(first_row) - 1),
+            )
+            changed = []
+            for (row_id, data), value in zip(cur.fetchall(), values):
+                row = json.loads(data)
+                row += [""] * (column - len(row))
+                row[column - 1] = to_cell(value)
+                changed.append((json.dumps(row, ensure_ascii=False), row_id))
+            self._conn.executemany("UPDATE sheet_rows SET data = ? WHERE id = ?", changed)
+            self._bump(worksheet_name)
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        # הכל בטרנזקציה אחת; מזהים את כל השורות לפני שמוחקים משהו
+        with self._lock, self._conn:
+            for row_num, values in updates:
+                row_id = self._row_id(worksheet_name, row_num)
+                cells = [None if v is None else to_cell(v) for v in values]
+                if None in cells:
+                    (data,) = self._conn.execute("SELECT data FROM sheet_rows WHERE id = ?",
+                                                 (row_id,)).fetchone()
+                    cells = _merge_cells(json.loads(data), cells)
+                self._conn.execute(
+                    "UPDATE sheet_rows SET data = ? WHERE id = ?",
+                    (json.dumps(cells, ensure_ascii=False), row_id),
+                )
+            if deletes:
+                # כל המזהים בשאילתה אחת, ולא OFFSET נפרד לכל שורה
+                cur = self._conn.execute(
+                    "SELECT id FROM sheet_rows WHERE worksheet = ? ORDER BY id", (worksheet_name,)
+                )
+                all_ids = [row_id for (row_id,) in cur]
+                missing = [r for r in deletes if not 1 <= int(r) <= len(all_ids)]
+                if missing:
+                    raise IndexError(f"שורה {missing[0]} לא קיימת בגיליון {worksheet_name}")
+                self._conn.executemany("DELETE FROM sheet_rows WHERE id = ?",
+                                       [(all_ids[int(r) - 1],) for r in deletes])
+            if updates or deletes:
+                self._bump(worksheet_name)
+
+    def replace_all(self, worksheet_name, values):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sheet_rows WHERE worksheet = ?", (worksheet_name,))
+            self._conn.executemany(
+                "INSERT INTO sheet_rows (worksheet, data) VALUES (?, ?)",
+                [(worksheet_name, json.dumps([to_cell(v) for v in row], ensure_ascii=False))
+                 for row in values],
+            )
+            self._bump(worksheet_name)
+
+    def ensure_worksheet(self, worksheet_name, header):
+        # ב-SQLite גיליון הוא רק תווית; מספיק לכתוב את שורת הכותרות
+        if self.is_empty(worksheet_name):
+            self.append_rows(worksheet_name, [header])
+
+    def is_empty(self, worksheet_name):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT 1 FROM sheet_rows WHERE worksheet = ? LIMIT 1", (worksheet_name,)
+            )
+            return cur.fetchone() is None
+
+
+# --- מקומי + סנכרון לגוגל ---
+# גיליון פנימי במנוע המקומי: הגיליונות שהעותק שלהם בגוגל לא זהה למקומי
+DIVERGED_SHEET = "_mirror_diverged"
+
+
+class MirroredBackend(StorageBackend):
+    """
+    קריאות מגיעות מהמנוע המקומי (מהיר), וכל כתיבה נשלחת גם לגיליון בגוגל.
+    אם גוגל לא זמין, הנתון כבר שמור מקומית - אבל הגיליון בגוגל כבר לא זהה למקומי:
+    חסרה בו שורה או עריכה, ועריכה לפי מספר שורה הייתה נוחתת שם על שורה אחרת.
+    לכן גיליון שכתיבה אליו נכשלה מסומן (diverged, נשמר במנוע המקומי כך שהסימון
+    שורד הפעלה מחדש), ולא נשלחות אליו יותר כתיבות לפי מספר שורה. בכתיבה הבאה
+    אליו נשלח במקומה כל הגיליון המקומי (replace_all), ורק כשזה מצליח הסימון יורד.
+    """
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+        self.name = f"{local.name}+{remote.name}"
+        self.worksheet_tokens = local.worksheet_tokens  # הסימנים באים מהמנוע המקומי
+        self.diverged = {row[0] for row in local.read_all(DIVERGED_SHEET) if row}
+
+    def seed(self, worksheet_names):
+        # בהפעלה ראשונה: מעתיקים את הגיליון מגוגל למנוע המקומי
+        for name in worksheet_names:
+            if self.local.is_empty(name):
+                self.local.replace_all(name, self.remote.read_all(name))
+
+    def _mirror(self, action, worksheet_name, *args):
+        if worksheet_name in self.diverged:
+            self.resync(worksheet_name)
+            return
+        try:
+            getattr(self.remote, action)(worksheet_name, *args)
+        except Exception as e:
+            log.warning("סנכרון לגוגל שיטס נכשל (%s, %s), הגיליון יישלח מחדש בכתיבה הבאה: %s",
+                        action, worksheet_name, e)
+            diagnostics.count("mirror_diverged", worksheet=worksheet_name)
+            self._mark(worksheet_name, True)
+
+    def resync(self, worksheet_name):
+        """שולח לגוגל את כל הגיליון המקומי; מחזיר True אם הגיליון מסונכרן עכשיו"""
+        try:
+            self.remote.replace_all(worksheet_name, self.local.read_all(worksheet_name))
+        except Exception as e:
+            log.warning("הגיליון %s עדיין לא מסונכרן עם גוגל שיטס: %s", worksheet_name, e)
+            return False
+        self._mark(worksheet_name, False)
+        return True
+
+    def _mark(self, worksheet_name, diverged):
+        if (worksheet_name in self.diverged) == diverged:
+            return
+        if diverged:
+            self.diverged.add(worksheet_name)
+        else:
+            self.diverged.discard(worksheet_name)
+        self.local.replace_all(DIVERGED_SHEET, [[name] for name in sorted(self.diverged)])
+
+    def warm_up(self):
+        # הקריאות מקומיות, אבל הכתיבות הולכות לגוגל - מכינים את החיבור מראש
+        try:
+            self.remote.warm_up()
+        except Exception as e:
+            log.warning("החיבור לגוגל שיטס נכשל: %s", e)
+
+    def client(self):
+        return self.remote.client()
+
+    def ensure_worksheet(self, worksheet_name, header):
+        self.local.ensure_worksheet(worksheet_name, header)
+        self._mirror("ensure_worksheet", worksheet_name, header)
+
+    def change_tokens(self, worksheet_names):
+        # הקריאות מגיעות מהמקומי, אז גם סימן השינוי
+        return self.local.change_tokens(worksheet_names)
+
+    def read_all(self, worksheet_name):
+        return self.local.read_all(worksheet_name)
+
+    def read_range(self, worksheet_name, start_row, end_row, width=None):
+        return self.local.read_range(worksheet_name, start_row, end_row, width)
+
+    def read_many(self, worksheet_names, start_rows=None):
+        return self.local.read_many(worksheet_names, start_rows)
+
+    def append_row(self, worksheet_name, row):
+        self.local.append_row(worksheet_name, row)
+        self._mirror("append_row", worksheet_name, row)
+
+    def append_rows(self, worksheet_name, rows):
+        self.local.append_rows(worksheet_name, rows)
+        self._mirror("append_rows", worksheet_name, rows)
+
+    def update_row(self, worksheet_name, row_num, values):
+        self.local.update_row(worksheet_name, row_num, values)
+        self._mirror("update_row", worksheet_name, row_num, values)
+
+    def delete_row(self, worksheet_name, row_num):
+        self.local.delete_row(worksheet_name, row_num)
+        self._mirror("delete_row", worksheet_name, row_num)
+
+    def replace_all(self, worksheet_name, values):
+        self.local.replace_all(worksheet_name, values)
+        self._mirror("replace_all", worksheet_name, values)
+
+    def update_column(self, worksheet_name, column, first_row, values):
+        self.local.update_column(worksheet_name, column, first_row, values)
+        self._mirror("update_column", worksheet_name, column, first_row, values)
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        self.local.apply_changes(worksheet_name, updates, deletes)
+        self._mirror("apply_changes", worksheet_name, updates, deletes)
+
+
+# --- מדידת זמנים ---
+class InstrumentedBackend(StorageBackend):
+    """
+    עוטף מנוע אחסון ומודד כל קריאה (storage.<פעולה>, לפי גיליון) - ראו diagnostics.py.
+    כל השאר (seed, is_empty, worksheet...) מועבר כמו שהוא למנוע הפנימי.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.worksheet_tokens = inner.worksheet_tokens
+
+    def __getattr__(self, attr):
+        return getattr(self.inner, attr)
+
+    def _span(self, action, worksheet_name):
+        return diagnostics.span(f"storage.{action}", worksheet=worksheet_name, backend=self.name)
+
+    def warm_up(self):
+        with self._span("warm_up", None):
+            self.inner.warm_up()
+
+    def client(self):
+        return self.inner.client()
+
+    def ensure_worksheet(self, worksheet_name, header):
+        with self._span("ensure_worksheet", worksheet_name):
+            self.inner.ensure_worksheet(worksheet_name, header)
+
+    def change_tokens(self, worksheet_names):
+        with self._span("change_tokens", None):
+            return self.inner.change_tokens(worksheet_names)
+
+    def read_all(self, worksheet_name):
+        with self._span("read_all", worksheet_name):
+            return self.inner.read_all(worksheet_name)
+
+    def read_range(self, worksheet_name, start_row, end_row, width=None):
+        with self._span("read_range", worksheet_name):
+            return self.inner.read_range(worksheet_name, start_row, end_row, width)
+
+    def read_many(self, worksheet_names, start_rows=None):
+        with self._span("read_many", ",".join(worksheet_names)):
+            return self.inner.read_many(worksheet_names, start_rows)
+
+    def append_row(self, worksheet_name, row):
+        with self._span("append_row", worksheet_name):
+            self.inner.append_row(worksheet_name, row)
+
+    def append_rows(self, worksheet_name, rows):
+        with self._span("append_rows", worksheet_name):
+            self.inner.append_rows(worksheet_name, rows)
+
+    def update_row(self, worksheet_name, row_num, values):
+        with self._span("update_row", worksheet_name):
+            self.inner.update_row(worksheet_name, row_num, values)
+
+    def delete_row(self, worksheet_name, row_num):
+        with self._span("delete_row", worksheet_name):
+            self.inner.delete_row(worksheet_name, row_num)
+
+    def replace_all(self, worksheet_name, values):
+        with self._span("replace_all", worksheet_name):
+            self.inner.replace_all(worksheet_name, values)
+
+    def update_column(self, worksheet_name, column, first_row, values):
+        with self._span("update_column", worksheet_name):
+            self.inner.update_column(worksheet_name, column, first_row, values)
+
+    def apply_changes(self, worksheet_name, updates, deletes):
+        with self._span("apply_changes", worksheet_name):
+            self.inner.apply_changes(worksheet_name, updates, deletes)
+
+
+def create_backend(config, client_factory, sheet_url, worksheet_names=(), caller=None):
+    """
+    בוחר מנוע אחסון לפי ההגדרות (למשל מתוך st.secrets["storage"]):
+        backend = "sheets" | "sqlite"
+        path = "maple.db"           (עבור sqlite)
+        sync_to_sheets = true       (sqlite עם סנכרון לגוגל)
+        quota_per_minute = 60       (מכסת הבקשות לגוגל בדקה)
+    משתנה הסביבה MAPLE_STORAGE_BACKEND גובר על ההגדרה.
+    caller: SheetsCaller משלכם (למשל עם מכסה של יומן מתוך מכסה משותפת, ראו tenants.py);
+    בלעדיו נבנה אחד לפי quota_per_minute.
+    המנוע שחוזר עטוף ב-InstrumentedBackend, כך שכל קריאה נמדדת.
+    """
+    kind = os.environ.get("MAPLE_STORAGE_BACKEND", config.get("backend", "sheets"))
+    if caller is None:
+        quota = int(config.get("quota_per_minute", 60))
+        caller = SheetsCaller(TokenBucket(quota))
+        diagnostics.REGISTRY.quota_per_minute = quota
+    if kind == "sheets":
+        return InstrumentedBackend(SheetsBackend(client_factory, sheet_url, caller))
+    if kind == "sqlite":
+        path = os.environ.get("MAPLE_SQLITE_PATH", config.get("path", "maple.db"))
+        local = SQLiteBackend(path)
+        if not config.get("sync_to_sheets", False):
+            return InstrumentedBackend(local)
+        backend = MirroredBackend(local, SheetsBackend(client_factory, sheet_url, caller))
+        backend.seed(worksheet_names)
+        return InstrumentedBackend(backend)
+    raise ValueError(f"מנוע אחסון לא מוכר: {kind}")
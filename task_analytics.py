@@ -0,0 +1,238 @@
+"""
+סיכומי התקדמות לכל תרגיל (Tasks + TaskLogs), בלי תלות ב-Streamlit.
+
+במקום לצייר כל רישום ביומן כנקודה, כל תרגיל מקבל שורה אחת:
+- כמה פעמים תורגל, וכמה ימים עברו מאז הפעם האחרונה,
+- ממוצע הציונים הכללי ו"לאחרונה" (RECENT_DAYS הימים האחרונים),
+- רצף: כמה תקופות ברצף (ימים, שבועות...) עמדו בתדירות שנקבעה לתרגיל,
+- עמידה בתדירות: כמה תרגולים היו ב-COMPLIANCE_DAYS הימים האחרונים מתוך כמה שצריך,
+- מגמה: ממוצע שבועי ב-TREND_WEEKS השבועות האחרונים (לגרף קטן בטבלה).
+
+הכל מחושב מטבלה אחת של "יום ותרגיל" (כמה רישומים וסכום הציונים), עם groupby
+וקטורי - כך שגם מאות תרגילים ביום לאורך שנים הם כמה פעולות על טבלה, וגם
+הסיכום היומי של הארכיון (TaskLogs_Daily) מצטרף אליה כמו עוד שורות.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+RECENT_DAYS = 14
+COMPLIANCE_DAYS = 28
+TREND_WEEKS = 12
+WEEK_START = pd.Timestamp("1970-01-04")  # יום ראשון - השבועות (והתקופות) נספרים ממנו
+
+
+# --- תדירות ---
+
+# מילים שאומרות כמה פעמים (בלי ספרה)
+_COUNTS = {
+    "פעם": 1, "פעם אחת": 1, "פעמיים": 2,
+    "once": 1, "twice": 2,
+    **{f"{word} פעמים": n for word, n in (("שלוש", 3), ("שלושה", 3), ("ארבע", 4), ("ארבעה", 4),
+                                          ("חמש", 5), ("חמישה", 5), ("שש", 6), ("שישה", 6),
+                                          ("שבע", 7), ("שבעה", 7))},
+    **{f"{word} times": n for word, n in (("three", 3), ("four", 4), ("five", 5), ("six", 6),
+                                          ("seven", 7))},
+}
+# ספרה נחשבת לכמות רק ליד "פעמים"/times/x או ממש לפני התקופה ("3 בשבוע", "3/week"),
+# כדי ש"5 דקות ביום" או "10 חזרות פעמיים ביום" לא ייקראו כחמש או עשר פעמים
+_TIMES = re.compile(r"(\d+)\s*(?:פעמים|פעם|times|x(?![a-z]))"
+                    r"|(\d+)\s*(?:ב|ל|/|per |a )(?:יום|שבוע|חודש|day|week|month)")
+_PERIODS = (
+    (r"ביום|ליום|יומי|כל יום|daily|per day|a day|/day|day", 1),
+    (r"בשבוע|לשבוע|שבועי|weekly|per week|a week|/week|week", 7),
+    (r"בחודש|לחודש|חודשי|monthly|per month|a month|/month|month", 30),
+)
+_EVERY = (
+    (r"כל יומיים|ביומיים|every other day", 2),
+    (r"כל שבועיים|בשבועיים", 14),
+    (r"כל (\d+) ימים|every (\d+) days", None),
+)
+
+
+def parse_frequency(text):
+    """
+    טקסט חופשי מעמודת Frequency -> (כמה פעמים, בכמה ימים), או None אם לא הבנו.
+    למשל "פעמיים ביום" -> (2, 1), "3 פעמים בשבוע" -> (3, 7), "כל יומיים" -> (1, 2),
+    "פעמיים בשבועיים" -> (2, 14), "twice a day" -> (2, 1).
+    """
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return None
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    days = _period_days(text)
+    if days is None:
+        return None
+    number = _TIMES.search(text)
+    if number:
+        return max(1, int(number.group(1) or number.group(2))), days
+    # הביטוי הארוך קודם, כדי ש"פעם אחת" לא ייתפס כ"פעם"
+    for word in sorted(_COUNTS, key=len, reverse=True):
+        if word in text:
+            return _COUNTS[word], days
+    return 1, days
+
+
+def _period_days(text):
+    for pattern, days in _EVERY:
+        match = re.search(pattern, text)
+        if match:
+            return days or int(next(g for g in match.groups() if g))
+    for pattern, days in _PERIODS:
+        if re.search(pattern, text):
+            return days
+    return None
+
+
+# --- טבלת יום ותרגיל ---
+
+def task_days(logs, archived=None):
+    """
+    TaskLogs מוקלד (+ TaskLogs_Daily מהארכיון) -> TaskName, Date, Logs, Scored, SuccessSum
+    (שורה לכל יום ותרגיל; Scored = רישומים עם ציון, לממוצע).
+    """
+    parts = []
+    if archived is not None and not archived.empty:
+        done = archived.dropna(subset=['Date', 'TaskName'])
+        logs_count = done['Logs'].fillna(0)
+        scored = logs_count.where(done['Success'].notna(), 0)
+        parts.append(pd.DataFrame({'TaskName': done['TaskName'].astype(str), 'Date': done['Date'],
+                                   'Logs': logs_count, 'Scored': scored,
+                                   'SuccessSum': done['Success'].fillna(0) * scored}))
+    if logs is not None and not logs.empty and {'Date', 'TaskName'} <= set(logs.columns):
+        live = logs.dropna(subset=['Date', 'TaskName'])
+        success = pd.to_numeric(live['Success'], errors='coerce') if 'Success' in live.columns \
+            else pd.Series(np.nan, index=live.index)
+        parts.append(pd.DataFrame({'TaskName': live['TaskName'].astype(str), 'Date': live['Date'],
+                                   'Logs': 1.0, 'Scored': success.notna().astype(float),
+                                   'SuccessSum': success.fillna(0)}))
+    if not parts:
+        return pd.DataFrame({'TaskName': pd.Series(dtype=object), 'Date': pd.Series(dtype='datetime64[ns]'),
+                             **{c: pd.Series(dtype=float) for c in ('Logs', 'Scored', 'SuccessSum')}})
+    days = pd.concat(parts, ignore_index=True)
+    days['Date'] = pd.to_datetime(days['Date']).dt.normalize()
+    return days.groupby(['TaskName', 'Date'], as_index=False)[['Logs', 'Scored', 'SuccessSum']].sum()
+
+
+def _mean(frame):
+    return (frame['SuccessSum'] / frame['Scored']).where(frame['Scored'] > 0)
+
+
+# --- הסיכום ---
+
+TaskProgress = namedtuple("TaskProgress", "summary weekly")
+
+SUMMARY_COLUMNS = ['TaskName', 'Status', 'Frequency', 'Logs', 'LastDate', 'DaysSince',
+                   'Success', 'RecentSuccess', 'Streak', 'PeriodDays', 'Compliance', 'Trend']
+
+
+def task_progress(tasks, logs, archived=None, today=None):
+    """
+    tasks: Tasks מוקלד, logs: TaskLogs מוקלד, archived: TaskLogs_Daily (או None).
+    מחזיר TaskProgress: summary - שורה לכל תרגיל (SUMMARY_COLUMNS),
+    weekly - TaskName, Week, Success, Logs (ממוצע שבועי, לגרף המגמה).
+    """
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    days = task_days(logs, archived)
+    days = days[days['Date'] <= today]
+
+    # התרגילים: מה שבגיליון Tasks (ההגדרה האחרונה לכל שם) + מה שתורגל ולא מופיע שם
+    summary = pd.DataFrame(columns=['TaskName', 'Status', 'Frequency'])
+    if tasks is not None and not tasks.empty and 'TaskName' in tasks.columns:
+        defined = tasks.dropna(subset=['TaskName']).assign(TaskName=lambda t: t['TaskName'].astype(str))
+        summary = defined.reindex(columns=['TaskName', 'Status', 'Frequency']) \
+            .drop_duplicates('TaskName', keep='last')
+        summary['Status'] = summary['Status'].astype(object).where(summary['Status'].notna(), 'Active')
+    summary = summary.set_index('TaskName')
+    logged = pd.Index(days['TaskName'].unique())
+    summary = summary.reindex(summary.index.append(logged.difference(summary.index, sort=False)))
+    summary.index.name = 'TaskName'
+
+    per_task = days.groupby('TaskName')
+    totals = per_task[['Logs', 'Scored', 'SuccessSum']].sum()
+    summary['Logs'] = totals['Logs'].reindex(summary.index).fillna(0).astype(int)
+    summary['LastDate'] = per_task['Date'].max().reindex(summary.index)
+    summary['DaysSince'] = (today - summary['LastDate']).dt.days
+    summary['Success'] = _mean(totals).reindex(summary.index)
+    recent = days[days['Date'] > today - pd.Timedelta(days=RECENT_DAYS)]
+    summary['RecentSuccess'] = _mean(recent.groupby('TaskName')[['Scored', 'SuccessSum']].sum()) \
+        .reindex(summary.index)
+
+    # תדירות לכל תרגיל; בלי תדירות מובנת - הרצף נספר בימים ואין אחוז עמידה
+    parsed = summary['Frequency'].map(parse_frequency)
+    times = parsed.map(lambda f: f[0] if f else np.nan)
+    period = parsed.map(lambda f: f[1] if f else 1).astype(int)
+    summary['PeriodDays'] = period
+    summary['Streak'] = _streaks(days, period, times.fillna(1), today).reindex(summary.index).fillna(0).astype(int)
+    summary['Compliance'] = _compliance(days, per_task['Date'].min(), period, times, today) \
+        .reindex(summary.index)
+
+    weekly = _weekly(days)
+    summary['Trend'] = _trend(weekly, today).reindex(summary.index)
+    summary['Trend'] = summary['Trend'].map(lambda t: t if isinstance(t, list) else [])
+    return TaskProgress(summary.reset_index()[SUMMARY_COLUMNS], weekly)
+
+
+def _periods(dates, period_days):
+    return (dates - WEEK_START).dt.days // period_days
+
+
+def _streaks(days, period, times, today):
+    """
+    כמה תקופות ברצף, עד התקופה הנוכחית, היו בהן לפחות times תרגולים.
+    תקופה נוכחית שעוד לא הושלמה לא שוברת את הרצף - סופרים מהקודמת.
+    """
+    if days.empty:
+        return pd.Series(dtype=int)
+    frame = days[['TaskName', 'Date', 'Logs']].assign(P=days['TaskName'].map(period).fillna(1).astype(int))
+    frame['Period'] = _periods(frame['Date'], frame['P'])
+    counts = frame.groupby(['TaskName', 'Period'], as_index=False).agg(Logs=('Logs', 'sum'), P=('P', 'first'))
+    needed = np.ceil(counts['TaskName'].map(times).fillna(1))
+    met = counts[counts['Logs'] >= needed].sort_values(['TaskName', 'Period'], ascending=[True, False])
+    if met.empty:
+        return pd.Series(dtype=int)
+    current = (today - WEEK_START).days // met['P']
+    latest = met.groupby('TaskName')['Period'].transform('first')
+    rank = met.groupby('TaskName').cumcount()
+    in_run = (met['Period'] == latest - rank) & (latest >= current - 1)
+    return in_run.groupby(met['TaskName']).sum()
+
+
+def _compliance(days, first_dates, period, times, today):
+    """
+    תרגולים ב-COMPLIANCE_DAYS הימים האחרונים מתוך כמה שהתדירות דורשת (עד 100%).
+    תרגיל חדש נמדד רק מהיום שבו תורגל לראשונה.
+    """
+    recent = days[days['Date'] > today - pd.Timedelta(days=COMPLIANCE_DAYS)]
+    done = recent.groupby('TaskName')['Logs'].sum().reindex(times.index).fillna(0)
+    since_first = (today - first_dates.reindex(times.index)).dt.days + 1
+    window = since_first.clip(upper=COMPLIANCE_DAYS).fillna(COMPLIANCE_DAYS)
+    expected = times * window / period
+    return (done / expected).clip(upper=1.0)
+
+
+def _weekly(days):
+    if days.empty:
+        return pd.DataFrame(columns=['TaskName', 'Week', 'Success', 'Logs'])
+    week = days['Date'] - pd.to_timedelta((days['Date'] - WEEK_START).dt.days % 7, unit='D')
+    weekly = days.assign(Week=week).groupby(['TaskName', 'Week'], as_index=False)[
+        ['Logs', 'Scored', 'SuccessSum']].sum()
+    weekly['Success'] = _mean(weekly)
+    return weekly[['TaskName', 'Week', 'Success', 'Logs']]
+
+
+def _trend(weekly, today):
+    """TaskName -> רשימת הממוצעים של TREND_WEEKS השבועות האחרונים (None בשבוע בלי ציון)"""
+    if weekly.empty:
+        return pd.Series(dtype=object)
+    this_week = today - pd.Timedelta(days=(today - WEEK_START).days % 7)
+    weeks = pd.date_range(end=this_week, periods=TREND_WEEKS, freq='7D')
+    table = weekly[weekly['Week'] >= weeks[0]].pivot_table(index='TaskName', columns='Week',
+                                                          values='Success', aggfunc='mean')
+    table = table.reindex(columns=weeks)
+    values = table.to_numpy(dtype=float)
+    return pd.Series([[None if np.isnan(v) else round(float(v), 2) for v in row] for row in values],
+                     index=table.index)
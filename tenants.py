@@ -0,0 +1,295 @@
+"""
+כמה יומנים (כמה כלבים / משקי בית) בשרת אחד.
+
+עד עכשיו כתובת הגיליון הייתה קבועה בקוד, ומי שרצה יומן לכלב שלו היה צריך
+להעתיק את האפליקציה. עכשיו כל יומן מוגדר בקובץ ה-secrets:
+
+    [storage]                    # ברירות מחדל לכל היומנים
+    backend = "sheets"
+    quota_per_minute = 60        # המכסה של חשבון השירות - משותפת לכל היומנים
+    default_journal = "maple"
+    max_journals = 8             # כמה יומנים מוחזקים בזיכרון בבת אחת
+    max_cache_mb = 256           # כמה זיכרון מותר לטבלאות שבמטמון, בכל היומנים יחד
+
+    [journals.maple]
+    name = "מייפל"
+    sheet_url = "https://docs.google.com/spreadsheets/d/..."
+
+    [journals.rex]
+    name = "רקס"
+    sheet_url = "https://docs.google.com/spreadsheets/d/..."
+    users = ["owner@example.com"]  # רשות: רק המשתמשים האלה (אחרי התחברות) רואים את היומן
+
+היומן נבחר לפי ?journal=<slug> בכתובת, ואם אין - לפי המשתמש המחובר, ואם אין -
+default_journal. בלי [journals] בכלל יש יומן אחד, בדיוק כמו קודם.
+
+לכל יומן (Journal) יש מנוע אחסון, מטמון, תור כתיבה וחימום משלו. JournalPool מחזיק
+אותם לפי סדר שימוש אחרון (LRU): כשיש יותר מדי יומנים, או שהמטמונים יחד תופסים
+יותר מדי זיכרון, היומן שלא נגעו בו הכי הרבה זמן נסגר, ונבנה מחדש כשיפתחו אותו שוב.
+המכסה: לכל יומן דלי אסימונים משלו בתוך הדלי המשותף (ratelimit.SharedQuota).
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import diagnostics
+import rowids
+from aggregates import TrainingAggregator
+from archive import AGGREGATES, Archiver
+from cache import WorksheetCache
+from ratelimit import SheetsCaller, SharedQuota, TokenBucket
+from storage import create_backend
+from warmup import Warmup
+from write_queue import WriteQueue
+
+log = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL = "maple"
+WORKSHEETS = ["Training", "Feeding", "Tasks", "TaskLogs"]
+SLUG = re.compile(r"[a-z0-9][a-z0-9_-]{0,39}")
+
+# קבצים מקומיים שכל יומן צריך משלו; ביומן שאינו ברירת המחדל מוסיפים לשם את ה-slug
+LOCAL_PATHS = {
+    "path": "maple.db",
+    "queue_path": "maple_queue.db",
+    "import_progress_dir": "maple_imports",
+}
+
+
+def _with_slug(path, slug):
+    stem, dot, ext = path.rpartition(".")
+    if not dot or "/" in ext:
+        return f"{path}_{slug}"
+    return f"{stem}_{slug}.{ext}"
+
+
+# --- הגדרות ---
+
+class JournalSettings:
+    """
+    storage: [storage] מה-secrets, journals: [journals] (מילון slug -> הגדרות).
+    sheet_url: כתובת ברירת המחדל כשאין [journals] (התנהגות של יומן יחיד).
+    """
+
+    def __init__(self, storage, journals=None, sheet_url=None):
+        self.storage = dict(storage)
+        self.journals = {slug: dict(config) for slug, config in (journals or {}).items()}
+        if not self.journals:
+            self.journals = {DEFAULT_JOURNAL: {"sheet_url": self.storage.get("sheet_url", sheet_url)}}
+        self.default = self.storage.get("default_journal") or next(iter(self.journals))
+        if self.default not in self.journals:
+            raise ValueError(f"default_journal לא מוגדר ב-[journals]: {self.default}")
+
+    @property
+    def quota(self):
+        return int(self.storage.get("quota_per_minute", 60))
+
+    def is_known(self, slug):
+        return bool(slug) and SLUG.fullmatch(slug) is not None and slug in self.journals
+
+    def config(self, slug):
+        """ההגדרות של יומן: [storage] כברירת מחדל, ומעליהן [journals.<slug>]"""
+        own = self.journals[slug]
+        config = {**self.storage, **own}
+        config.setdefault("name", "מייפל" if slug == DEFAULT_JOURNAL else slug)
+        if slug != self.default:
+            # יומן נוסף לא חולק קבצים מקומיים עם יומן ברירת המחדל
+            for key, default in LOCAL_PATHS.items():
+                if key not in own:
+                    config[key] = _with_slug(self.storage.get(key, default), slug)
+        if "journal_quota_per_minute" not in config:
+            # יומן אחד לא לוקח יותר מחצי מהמכסה המשותפת (כשיש יותר מיומן אחד)
+            config["journal_quota_per_minute"] = self.quota if len(self.journals) == 1 \
+                else max(1, self.quota // 2)
+        return config
+
+    def allows(self, slug, email):
+        users = self.journals[slug].get("users")
+        return not users or (email is not None and email.lower() in {u.lower() for u in users})
+
+    def for_user(self, email):
+        """היומן הראשון שהמשתמש רשום בו (או None)"""
+        if email is None:
+            return None
+        for slug, config in self.journals.items():
+            if email.lower() in {u.lower() for u in config.get("users", ())}:
+                return slug
+        return None
+
+    def select(self, requested, email=None):
+        """?journal= מהכתובת, אחרת לפי המשתמש, אחרת ברירת המחדל. slug לא מוכר -> None"""
+        if requested:
+            return requested if self.is_known(requested) else None
+        return self.for_user(email) or self.default
+
+
+# --- יומן אחד ---
+
+class Journal:
+    """כל מה שהאפליקציה מחזיקה ליומן אחד (מה שהיה עד עכשיו st.cache_resource לכל השרת)"""
+
+    def __init__(self, slug, config, client_factory, shared_limiter):
+        self.slug = slug
+        self.config = config
+        self.name = config["name"]
+        self.sheet_url = config.get("sheet_url")
+        self.archive_horizon_days = config.get("archive_horizon_days")
+        # כשהארכיון פעיל, גם טבלאות הסיכום שלו נטענות למטמון יחד עם שאר הגיליונות
+        self.worksheets = WORKSHEETS + (list(AGGREGATES.values()) if self.archive_horizon_days else [])
+        self.last_used = time.monotonic()
+
+        limiter = SharedQuota(TokenBucket(int(config["journal_quota_per_minute"])), shared_limiter)
+        caller = SheetsCaller(limiter, labels={"journal": slug})
+        self.backend = create_backend(config, client_factory, self.sheet_url, self.worksheets, caller=caller)
+        # כל 10 שניות בודקים בקריאה קטנה אחת אם היומן השתנה (modifiedTime ב-Drive), ורק אז קוראים;
+        # בלי סימן שינוי שומרים בזיכרון ל-60 שניות
+        self.cache = WorksheetCache(self.backend, self.worksheets, ttl=60, poll=10)
+        # שמירות מהטפסים נרשמות ביומן מקומי ונשלחות לגוגל ברקע
+        self.queue = WriteQueue(config.get("queue_path", LOCAL_PATHS["queue_path"]), self.backend,
+                                on_flushed=self.cache.apply_append, already_written=self.cache.written)
+        # סיכומי האימונים מתעדכנים מאירועי המטמון, בלי לחשב מחדש את כל ההיסטוריה בכל שמירה
+        self.aggregator = TrainingAggregator()
+        self.cache.subscribe("Training", self.aggregator.on_cache_event)
+        self.archiver = Archiver(self.backend, self.archive_horizon_days, cache=self.cache) if self.archive_horizon_days else None
+        # הרשאה, handles וטעינת המטמון ברקע, אחריהם תחזוקה (מזהים, ארכיון) ורענון הטוקן
+        self.warmup = Warmup(self.backend, self.cache, self.worksheets, maintenance=self.maintain)
+
+    def start(self, maintain=True):
+        # maintain=False: התחזוקה כבר רצה בתהליך הזה (היומן נסגר ונפתח שוב), ואין
+        # טעם לקרוא שוב את כל הגיליונות בשבילה
+        if not maintain:
+            self.warmup.maintenance = None
+        self.queue.start()
+        self.warmup.start()
+        return self
+
+    def maintain(self):
+        # מזהים לשורות ישנות (ראו rowids.py), ואחר כך העברה לארכיון - כך גם שורות בארכיון נושאות מזהה.
+        # רצה אחרי טעינת המטמון: השורות בלי מזהה נמצאות מהקריאה המרוכזת שלו, בלי לקרוא שוב כל גיליון
+        for worksheet_name in rowids.KEYED:
+            rowids.ensure_ids(self.backend, worksheet_name, cache=self.cache)
+        if self.archiver is not None:
+            self.archiver.run()
+
+    def memory_bytes(self):
+        return self.cache.memory_bytes()
+
+    def close(self, timeout=30):
+        # שורות שממתינות בתור נשארות בקובץ המקומי ויישלחו כשהיומן ייפתח שוב.
+        # חוזר רק כשחוט התור באמת נעצר - ראו JournalPool._build
+        self.warmup.stop()
+        while not self.queue.stop(timeout):
+            log.warning("תור הכתיבה של היומן %s עוד לא נעצר, ממשיכים לחכות", self.slug)
+        self.cache.clear()
+
+
+# --- מאגר היומנים ---
+
+class JournalPool:
+    """
+    factory(slug) -> Journal שעוד לא הופעל. get מחזיר יומן פעיל ומסמן אותו כאחרון בשימוש.
+    הבדיקה של הזיכרון עולה משהו, ולכן נעשית לכל היותר פעם ב-check_interval שניות
+    (ומיד כשנפתח יומן חדש).
+    יומן שהוצא נסגר בחוט רקע, לא בבקשה של הגולש. אם פותחים אותו שוב לפני שהסגירה
+    הסתיימה, הבנייה מחכה לה: תור כתיבה חדש על אותו קובץ, לצד הישן שעוד רץ, היה
+    שולח את אותן שורות פעמיים.
+    """
+
+    def __init__(self, factory, max_journals=8, max_cache_bytes=256 * 2 ** 20, check_interval=5):
+        self.factory = factory
+        self.max_journals = max(1, int(max_journals))
+        self.max_cache_bytes = max_cache_bytes
+        self.check_interval = check_interval
+        self._journals = OrderedDict()  # slug -> Journal, מהישן לחדש
+        self._building = {}             # slug -> נעילה, כדי שיומן לא ייבנה פעמיים במקביל
+        self._closing = {}              # slug -> Event שנקבע כשהסגירה ברקע הסתיימה
+        self._maintained = set()        # יומנים שהתחזוקה שלהם כבר רצה בתהליך הזה
+        self._lock = threading.Lock()
+        self._checked = 0.0
+
+    def get(self, slug):
+        now = time.monotonic()
+        with self._lock:
+            journal = self._journals.get(slug)
+            if journal is not None:
+                self._journals.move_to_end(slug)
+                journal.last_used = now
+                due = now - self._checked >= self.check_interval
+                if due:
+                    self._checked = now
+            build_lock = self._building.setdefault(slug, threading.Lock()) if journal is None else None
+        if journal is None:
+            journal = self._build(slug, build_lock)
+            due = True
+        if due:
+            self._close(self._evict(keep=slug))
+        return journal
+
+    def _build(self, slug, build_lock):
+        # הבנייה (ולפעמים העתקה ראשונה מגוגל) נעשית מחוץ לנעילה הכללית, כדי לא לעכב יומנים אחרים
+        with build_lock:
+            with self._lock:
+                journal = self._journals.get(slug)
+                closing = self._closing.get(slug)
+                maintain = slug not in self._maintained
+            if journal is not None:
+                return journal
+            if closing is not None:
+                with diagnostics.span("tenants.wait_close", journal=slug):
+                    while not closing.wait(30):
+                        log.warning("מחכים שהיומן %s ייסגר לפני שפותחים אותו שוב", slug)
+            with diagnostics.span("tenants.open", journal=slug):
+                journal = self.factory(slug).start(maintain=maintain)
+            with self._lock:
+                self._journals[slug] = journal
+                self._building.pop(slug, None)
+                self._maintained.add(slug)
+            diagnostics.count("tenants_opened", journal=slug)
+            return journal
+
+    def _evict(self, keep):
+        """מוציא יומנים ישנים עד שחוזרים למגבלות; מחזיר אותם (הסגירה מחוץ לנעילה)"""
+        with self._lock:
+            journals = list(self._journals.items())
+        # המדידה נועלת את המטמון של כל יומן - לא מחזיקים בזמן הזה את הנעילה של המאגר
+        sizes = {slug: journal.memory_bytes() for slug, journal in journals}
+        total = sum(sizes.values())
+        evicted = []
+        with self._lock:
+            for slug in list(self._journals):
+                if len(self._journals) <= self.max_journals and total <= self.max_cache_bytes:
+                    break
+                if slug == keep:
+                    continue
+                evicted.append(self._journals.pop(slug))
+                # באותה נעילה: מי שיבקש את היומן עכשיו יחכה לסגירה
+                self._closing[slug] = threading.Event()
+                total -= sizes.get(slug, 0)
+        return evicted
+
+    def _close(self, journals):
+        if journals:
+            threading.Thread(target=self._close_all, args=(journals,),
+                             name="maple-journal-close", daemon=True).start()
+
+    def _close_all(self, journals):
+        for journal in journals:
+            log.info("היומן %s נסגר (לא היה בשימוש לאחרונה)", journal.slug)
+            diagnostics.count("tenants_evicted", journal=journal.slug)
+            try:
+                journal.close()
+            except Exception as e:
+                log.warning("סגירת היומן %s נכשלה: %s", journal.slug, e)
+            with self._lock:
+                closed = self._closing.pop(journal.slug, None)
+            if closed is not None:
+                closed.set()
+
+    def stats(self):
+        """[(slug, בתים במטמון, שניות מאז השימוש האחרון)], מהחדש לישן"""
+        now = time.monotonic()
+        with self._lock:
+            journals = list(self._journals.values())
+        return [(j.slug, j.memory_bytes(), now - j.last_used) for j in reversed(journals)]
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from cache import WorksheetCache  # noqa: E402
+from fake_gspread import FakeGoogle  # noqa: E402
+from ratelimit import RetryPolicy, SheetsCaller, TokenBucket  # noqa: E402
+from storage import SheetsBackend  # noqa: E402
+
+HEADER = ["Date", "TaskName", "Success", "Notes", "ID"]
+
+
+@pytest.fixture
+def google():
+    """גוגל מדומה (benchmarks/fake_gspread.py) עם TaskLogs של חמש שורות"""
+    rows = [HEADER] + [[f"2025-01-0{i}", "שב", "3", "", f"id{i}"] for i in range(1, 6)]
+    return FakeGoogle({"TaskLogs": rows})
+
+
+@pytest.fixture
+def backend(google):
+    caller = SheetsCaller(TokenBucket(rate_per_minute=60000), RetryPolicy(base_delay=0.0))
+    return SheetsBackend(google.client, "https://fake/spreadsheet", caller=caller)
+
+
+@pytest.fixture
+def make_cache(backend):
+    return lambda **kwargs: WorksheetCache(backend, ["TaskLogs"], **kwargs)
+
+
+def edit_middle_row(google, success="5"):
+    # עריכה ישירה בגיליון (כמו מהטלפון), לא דרך האפליקציה
+    google.sheets["TaskLogs"][3][2] = success
+    google.touch()
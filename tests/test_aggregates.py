@@ -0,0 +1,153 @@
+"""TrainingAggregator בהדרגה מול analytics.training_state שמחושב מכל הטבלה"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import schema
+from aggregates import TrainingAggregator
+from cache import WorksheetCache, rows_to_frame
+from storage import SQLiteBackend
+
+HEADER = ["Date", "Time", "Duration", "StressLevel", "Notes", "ID"]
+
+
+def training(rows):
+    """שורות (תאריך, שעה, משך, לחץ) -> טבלת Training מוקלדת"""
+    return schema.normalize("Training", rows_to_frame(
+        [HEADER] + [[d, t, str(duration), str(stress), "", f"id{i}"]
+                    for i, (d, t, duration, stress) in enumerate(rows)]))
+
+
+def sample(n, seed=0, start="2025-01-01", days=60):
+    rng = random.Random(seed)
+    first = pd.Timestamp(start)
+    return [((first + pd.Timedelta(days=rng.randrange(days))).strftime("%Y-%m-%d"),
+             f"{rng.randrange(6, 22):02d}:{rng.choice(['00', '30'])}",
+             rng.choice([0.25, 0.5, 1.0, 1.5]), rng.randrange(1, 6)) for _ in range(n)]
+
+
+def assert_same(state, rows, archived=None):
+    expected = analytics.training_state(training(rows), archived)
+    pd.testing.assert_series_equal(state.daily['Date'].reset_index(drop=True),
+                                   expected.daily['Date'].reset_index(drop=True), check_dtype=False)
+    np.testing.assert_allclose(state.daily['Weighted_Duration'], expected.daily['Weighted_Duration'],
+                               atol=1e-9)
+    np.testing.assert_allclose(state.daily['Intensity'], expected.daily['Intensity'], atol=1e-9)
+    np.testing.assert_allclose(state.bands, expected.bands, atol=1e-9)
+    # באותה דקה הסדר בין אימונים לא מוגדר (מיון לא יציב) - משווים אחרי מיון לפי כל העמודות
+    columns = ['FullDate', 'Duration', 'Stress']
+    pd.testing.assert_frame_equal(state.sessions[columns].sort_values(columns, ignore_index=True),
+                                  expected.sessions[columns].sort_values(columns, ignore_index=True),
+                                  check_dtype=False)
+    assert state.sessions['FullDate'].is_monotonic_increasing
+
+
+def built(rows, archived=None):
+    aggregator = TrainingAggregator()
+    aggregator.reset(training(rows), archived)
+    return aggregator
+
+
+def test_reset_matches_the_full_computation():
+    rows = sample(80)
+    assert_same(built(rows).state(), rows)
+
+
+def test_reset_with_archived_days():
+    archived = pd.DataFrame({'Date': pd.to_datetime(["2024-12-20", "2024-12-28"]),
+                             'Sessions': [2.0, 1.0], 'Duration': [1.0, 0.5],
+                             'Weighted_Duration': [1.2, 0.4]})
+    rows = sample(30)
+    assert_same(built(rows, archived).state(), rows, archived)
+
+
+def test_append_in_order():
+    rows = sample(40)
+    aggregator = built(rows)
+    new = [("2025-03-10", "09:00", 1.0, 4), ("2025-03-12", "18:30", 0.5, 2)]
+    aggregator.add(training(new))
+    assert_same(aggregator.state(), rows + new)
+
+
+def test_append_out_of_order():
+    # שורה שהוקלדה באיחור לתאריך ישן, וגם לפני היום הראשון ברצף
+    rows = sample(40, start="2025-02-01", days=30)
+    aggregator = built(rows)
+    new = [("2025-02-10", "07:00", 1.5, 5), ("2025-01-15", "12:00", 0.25, 1)]
+    aggregator.add(training(new))
+    assert_same(aggregator.state(), rows + new)
+
+
+@pytest.mark.parametrize("position", [0, 17, -1])
+def test_remove(position):
+    rows = sorted(sample(35), key=lambda row: (row[0], row[1]))
+    aggregator = built(rows)
+    removed = rows.pop(position)
+    aggregator.remove(training([removed]))
+    assert_same(aggregator.state(), rows)
+
+
+def test_edit_is_remove_then_add():
+    rows = sample(35)
+    aggregator = built(rows)
+    old, new = rows[5], (rows[5][0], rows[5][1], 2.0, 5)
+    aggregator.remove(training([old]))
+    aggregator.add(training([new]))
+    assert_same(aggregator.state(), rows[:5] + [new] + rows[6:])
+
+
+def test_removing_every_row_leaves_an_empty_state():
+    rows = sample(5)
+    aggregator = built(rows)
+    aggregator.remove(training(rows))
+    state = aggregator.state()
+    assert state.daily.empty and state.sessions.empty
+    assert state.bands == aggregator.defaults
+
+
+def test_pending_rows_are_included_but_not_kept():
+    rows = sample(40)
+    aggregator = built(rows)
+    pending = [("2025-03-05", "10:00", 1.0, 3), ("2025-01-20", "20:00", 0.5, 4)]
+    assert_same(aggregator.state(training(pending)), rows + pending)
+    assert_same(aggregator.state(), rows)
+
+
+def test_random_sequence_of_changes():
+    rng = random.Random(7)
+    rows = sample(20, seed=1)
+    aggregator = built(rows)
+    for step, new in enumerate(sample(60, seed=2, start="2024-12-15", days=90)):
+        if rows and rng.random() < 0.35:
+            removed = rows.pop(rng.randrange(len(rows)))
+            aggregator.remove(training([removed]))
+        else:
+            rows.append(new)
+            aggregator.add(training([new]))
+        if step % 10 == 0:
+            assert_same(aggregator.state(), rows)
+    assert_same(aggregator.state(), rows)
+
+
+def test_cache_events_keep_it_in_step():
+    # הדרך שבה האפליקציה משתמשת בו: אירועים מהמטמון אחרי כל כתיבה
+    rows = sample(30)
+    backend = SQLiteBackend(":memory:")
+    backend.replace_all("Training", [HEADER] + [[d, t, str(m), str(s), "", f"id{i}"]
+                                                for i, (d, t, m, s) in enumerate(rows)])
+    cache = WorksheetCache(backend, ["Training"], ttl=60)
+    aggregator = TrainingAggregator()
+    cache.subscribe("Training", aggregator.on_cache_event)
+    aggregator.sync(cache)
+
+    cache.apply_append("Training", [["2025-01-03", "06:00", "1.5", "5", "", "late"]])
+    cache.apply_changes("Training", [(5, ["2025-02-27", "08:00", "0.25", "1", "", "id3"])], [10])
+    version = aggregator.version
+    aggregator.sync(cache)
+    assert aggregator.version == version == cache.version("Training")
+    expected = analytics.training_state(cache.get("Training"))
+    np.testing.assert_allclose(aggregator.state().daily['Intensity'], expected.daily['Intensity'], atol=1e-9)
+    np.testing.assert_allclose(aggregator.state().bands, expected.bands, atol=1e-9)
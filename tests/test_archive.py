@@ -0,0 +1,59 @@
+"""העברה לארכיון בהפעלה: מחליטים מהמטמון, ולא קוראים את הגיליונות כשאין מה להעביר"""
+import threading
+
+from archive import Archiver
+from cache import WorksheetCache
+from storage import SQLiteBackend
+from warmup import Warmup
+
+HEADER = ["Date", "Time", "Duration", "StressLevel", "Notes", "ID"]
+NAMES = ["Training", "Training_Daily"]
+
+
+def make(dates):
+    backend = SQLiteBackend(":memory:")
+    backend.replace_all("Training", [HEADER] + [[d, "08:00", "10", "2", "", f"id{i}"]
+                                                for i, d in enumerate(dates)])
+    cache = WorksheetCache(backend, NAMES, ttl=60)
+    archiver = Archiver(backend, 30, worksheet_names=["Training"], today="2025-03-15", cache=cache)
+    return backend, cache, archiver
+
+
+def count_reads(backend, monkeypatch):
+    reads = []
+    read_all = backend.read_all
+    monkeypatch.setattr(backend, "read_all", lambda name: reads.append(name) or read_all(name))
+    return reads
+
+
+def test_nothing_older_than_the_cutoff_reads_nothing(monkeypatch):
+    backend, cache, archiver = make(["2025-02-01", "2025-03-01"])
+    backend.ensure_worksheet("Training_Daily", ["Date", "Sessions", "Duration", "Weighted_Duration"])
+    cache.prefetch()
+    reads = count_reads(backend, monkeypatch)
+    assert archiver.run() == {"Training": 0}
+    assert reads == []
+
+
+def test_old_rows_are_moved_and_the_cache_reloads():
+    backend, cache, archiver = make(["2024-12-20", "2025-02-01", "2025-03-01"])
+    cache.prefetch()
+    assert archiver.run() == {"Training": 1}
+    assert len(backend.read_all("Training_2024_12")) == 2
+    assert list(cache.get("Training")["ID"]) == ["id1", "id2"]
+    assert len(cache.get("Training_Daily")) == 1
+
+
+def test_maintenance_runs_after_the_warmup_is_done():
+    backend, cache, _ = make(["2025-03-01"])
+    done_before = []
+    finished = threading.Event()
+
+    def maintenance():
+        done_before.append(warmup.is_done())
+        finished.set()
+    warmup = Warmup(backend, cache, NAMES, maintenance=maintenance, maintenance_delay=0)
+    warmup.start()
+    assert finished.wait(5)
+    warmup.stop()
+    assert done_before == [True]
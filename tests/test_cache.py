@@ -0,0 +1,83 @@
+"""המטמון מול גוגל מדומה (benchmarks/fake_gspread.py): עריכות באמצע הגיליון לא נשארות ישנות"""
+from cache import WorksheetCache
+from conftest import edit_middle_row
+from storage import SQLiteBackend
+
+
+def test_delta_refresh_keeps_appends(google, make_cache):
+    cache = make_cache(ttl=0)
+    assert len(cache.get("TaskLogs")) == 5
+    google.sheets["TaskLogs"].append(["2025-01-06", "שב", "4", "", "id6"])
+    assert len(cache.get("TaskLogs")) == 6
+
+
+def test_periodic_full_reload_sees_middle_edit(google, make_cache):
+    cache = make_cache(ttl=0)
+    cache.get("TaskLogs")
+    edit_middle_row(google)
+    # בלי סימן שינוי, דלתא לבדה לא רואה את העריכה עד הקריאה המלאה הבאה
+    cache._snapshots["TaskLogs"].full_loaded_at -= cache.full_every
+    assert cache.get("TaskLogs").loc[2, "Success"] == 5
+
+
+def stale(cache, *names):
+    for name in names:
+        cache._snapshots[name].loaded_at -= cache.poll
+
+
+def test_file_token_after_own_append_is_only_a_delta(google, backend):
+    # modifiedTime זז בכל כתיבה לקובץ - גם של הארוחה שנשמרה עכשיו
+    google.sheets["Feeding"] = [["Date", "Amount", "Finished", "ID"], ["2025-01-01", "1", "TRUE", "f1"]]
+    cache = WorksheetCache(backend, ["TaskLogs", "Feeding"], ttl=0, poll=10)
+    cache.prefetch()
+    row = ["2025-01-02", "1", "TRUE", "f2"]
+    backend.append_rows("Feeding", [row])
+    cache.apply_append("Feeding", [row])
+    reads = google.calls["values_batch_get"]
+    stale(cache, "TaskLogs", "Feeding")
+    cache.prefetch()
+    # דלתא אחת לשתי הלשוניות יחד, בלי קריאה מלאה
+    assert google.calls["values_batch_get"] == reads + 1
+    assert len(cache.get("Feeding")) == 2 and len(cache.get("TaskLogs")) == 5
+
+
+def sqlite_journal(path):
+    backend = SQLiteBackend(str(path))
+    backend.replace_all("TaskLogs", [["Date", "TaskName", "Success", "Notes", "ID"]] +
+                        [[f"2025-01-0{i}", "שב", "3", "", f"id{i}"] for i in range(1, 6)])
+    return backend
+
+
+def count_reads(backend, monkeypatch):
+    reads = []
+    read_many = backend.read_many
+    monkeypatch.setattr(backend, "read_many", lambda *args: reads.append(args) or read_many(*args))
+    return reads
+
+
+def test_worksheet_token_without_new_rows_reloads_in_full(tmp_path, monkeypatch):
+    backend = sqlite_journal(tmp_path / "j.db")
+    cache = WorksheetCache(backend, ["TaskLogs"], ttl=0, poll=10)
+    cache.get("TaskLogs")
+    # תהליך אחר עורך שורה באמצע
+    SQLiteBackend(str(tmp_path / "j.db")).update_row("TaskLogs", 4, ["2025-01-03", "שב", "5", "", "id3"])
+    stale(cache, "TaskLogs")
+    assert cache.get("TaskLogs").loc[2, "Success"] == 5
+    # בלי שינוי נוסף לא קוראים שוב
+    reads = count_reads(backend, monkeypatch)
+    stale(cache, "TaskLogs")
+    cache.get("TaskLogs")
+    assert reads == []
+
+
+def test_own_write_refreshes_the_worksheet_token(tmp_path, monkeypatch):
+    backend = sqlite_journal(tmp_path / "j.db")
+    cache = WorksheetCache(backend, ["TaskLogs"], ttl=0, poll=10)
+    cache.get("TaskLogs")
+    row = ["2025-01-06", "שב", "4", "", "id6"]
+    backend.append_rows("TaskLogs", [row])
+    cache.apply_append("TaskLogs", [row])
+    reads = count_reads(backend, monkeypatch)
+    stale(cache, "TaskLogs")
+    assert len(cache.get("TaskLogs")) == 6
+    assert reads == []
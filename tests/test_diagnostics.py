@@ -0,0 +1,14 @@
+"""ייצוא המדידות: גולש של יומן אחד לא רואה מדידות של יומנים אחרים"""
+from diagnostics import Diagnostics
+
+
+def test_snapshot_keeps_only_the_given_journals():
+    registry = Diagnostics()
+    registry.api_call("get_values", journal="a")
+    registry.api_call("get_values", journal="secret")
+    registry.observe("cache.get", 0.01, worksheet="Training")
+    data = registry.snapshot(["a"])
+    assert [c["labels"].get("journal") for c in data["counters"]] == ["a"]
+    assert len(data["spans"]) == 1
+    assert "secret" not in registry.to_prometheus(journals=["a"])
+    assert "secret" in registry.to_json()
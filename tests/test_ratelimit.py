@@ -0,0 +1,44 @@
+"""ניסיונות חוזרים: כתיבות שאסור לשלוח פעמיים חוזרות רק על 429"""
+import pytest
+import requests
+from gspread.exceptions import APIError
+
+from fake_gspread import FakeResponse
+from ratelimit import RetryPolicy, SheetsCaller, TokenBucket
+
+
+def failing(*errors):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+def caller():
+    return SheetsCaller(TokenBucket(rate_per_minute=60000), RetryPolicy(base_delay=0.0),
+                        sleep=lambda seconds: None)
+
+
+@pytest.mark.parametrize("error", [APIError(FakeResponse(503, "backend error")),
+                                   requests.exceptions.Timeout()])
+def test_non_idempotent_write_is_not_retried_after_it_may_have_applied(error):
+    fn, calls = failing(error)
+    with pytest.raises(type(error)):
+        caller().call(fn, idempotent=False)
+    assert len(calls) == 1
+
+
+def test_non_idempotent_write_is_retried_on_429():
+    fn, calls = failing(APIError(FakeResponse(429, "quota")))
+    assert caller().call(fn, idempotent=False) == "ok"
+    assert len(calls) == 2
+
+
+def test_reads_are_retried_on_5xx():
+    fn, calls = failing(APIError(FakeResponse(503, "backend error")))
+    assert caller().call(fn) == "ok"
+    assert len(calls) == 2
@@ -0,0 +1,91 @@
+"""שמירה מהעורך לפי מזהה: מטמון ישן לא מייצר התנגשות, עריכה אמיתית כן"""
+import pytest
+
+from conftest import edit_middle_row
+from rowids import ensure_ids, keyed_diff
+from storage import SQLiteBackend
+
+
+def page_with_note(cache, note="טוב"):
+    base, _ = cache.read_page("TaskLogs", 0)
+    edited = base.copy()
+    edited.loc[2, "Notes"] = note
+    return base, edited
+
+
+def test_stale_cache_is_not_a_conflict(google, make_cache):
+    cache = make_cache(ttl=60)
+    cache.get("TaskLogs")
+    edit_middle_row(google)
+    # העמוד נקרא מהגיליון ורואה את העריכה; המטמון עוד לא
+    base, edited = page_with_note(cache)
+    diff, conflicts = keyed_diff(cache, "TaskLogs", base, edited)
+    assert conflicts == []
+    assert [row_num for row_num, _ in diff.updates] == [4]
+
+
+def test_edit_after_the_page_was_loaded_is_a_conflict(google, make_cache):
+    # modifiedTime לא אומר איזו שורה השתנתה - השורות עצמן נקראות מהגיליון
+    cache = make_cache(ttl=60, poll=10)
+    cache.get("TaskLogs")
+    base, edited = page_with_note(cache)
+    edit_middle_row(google)
+    diff, conflicts = keyed_diff(cache, "TaskLogs", base, edited)
+    assert [c.row_num for c in conflicts] == [4]
+    assert not diff.updates
+
+
+@pytest.mark.parametrize("kind", ["sheets", "sqlite"])
+def test_ensure_ids_writes_only_the_id_column(google, backend, kind):
+    rows = [["Date", "TaskName", "Success", "Notes"], ["2025-01-01", "שב", "3", "x"],
+            ["2025-01-02", "ארצה", "4"], ["2025-01-03", "שב", "5", ""]]
+    if kind == "sqlite":
+        backend = SQLiteBackend(":memory:")
+        backend.replace_all("TaskLogs", rows)
+    else:
+        google.sheets["TaskLogs"] = [list(row) for row in rows]
+    assert ensure_ids(backend, "TaskLogs") == 4
+    after = backend.read_all("TaskLogs")
+    assert after[0] == rows[0] + ["ID"]
+    for before, row in zip(rows[1:], after[1:]):
+        assert row[:len(before)] == before and len(row[4]) == 12
+    if kind == "sheets":
+        assert google.calls["update"] == 1 and not google.calls["batch_update"]
+    assert ensure_ids(backend, "TaskLogs") == 0
+
+
+def test_ensure_ids_fills_only_missing_ids(google, backend):
+    google.sheets["TaskLogs"][3][4] = ""
+    assert ensure_ids(backend, "TaskLogs") == 1
+    after = backend.read_all("TaskLogs")
+    assert [row[4] for row in after if row[4].startswith("id")] == ["id1", "id2", "id4", "id5"]
+
+
+def test_ensure_ids_reads_nothing_when_the_cache_has_every_id(google, make_cache):
+    cache = make_cache(ttl=60)
+    cache.prefetch()
+    before = sum(google.calls.values())
+    assert ensure_ids(cache.backend, "TaskLogs", cache=cache) == 0
+    assert sum(google.calls.values()) == before
+
+
+def test_ensure_ids_from_the_cache_writes_and_reloads(google, make_cache):
+    google.sheets["TaskLogs"][3][4] = ""
+    cache = make_cache(ttl=60)
+    cache.prefetch()
+    assert ensure_ids(cache.backend, "TaskLogs", cache=cache) == 1
+    new = google.sheets["TaskLogs"][3][4]
+    assert len(new) == 12
+    # המטמון נקרא מחדש ומכיר את המזהה החדש
+    assert list(cache.locate("TaskLogs", [new]).values())[0][0] == 4
+
+
+def test_rows_that_moved_are_found_after_a_reload(google, make_cache):
+    cache = make_cache(ttl=60)
+    cache.get("TaskLogs")
+    base, edited = page_with_note(cache)
+    # מכשיר אחר מחק את השורה הראשונה - כל השורות זזו אחת למעלה
+    del google.sheets["TaskLogs"][1]
+    diff, conflicts = keyed_diff(cache, "TaskLogs", base, edited)
+    assert conflicts == []
+    assert [row_num for row_num, _ in diff.updates] == [3]
@@ -0,0 +1,40 @@
+"""הקלדת הגיליונות: תא לא תקין הופך לחסר ולא מפיל את הטעינה"""
+import pandas as pd
+
+import schema
+
+
+def frame(header, *rows):
+    return pd.DataFrame([list(row) for row in rows], columns=header)
+
+
+def test_bad_and_out_of_range_small_ints_become_missing():
+    typed = schema.normalize("Training", frame(
+        ["Date", "Time", "Duration", "StressLevel", "Notes", "ID"],
+        ["2025-01-01", "10:00", "1", "3", "", "a"],
+        ["2025-01-02", "10:00", "1", "300", "", "b"],
+        ["2025-01-03", "10:00", "1", "-1000", "", "c"],
+        ["2025-01-04", "10:00", "1", "גבוה", "", "d"],
+        ["2025-01-05", "10:00", "1", "", "", "e"],
+        ["2025-01-06", "10:00", "1", "2.6", "", "f"],
+    ))
+    assert str(typed["StressLevel"].dtype) == "Int8"
+    assert typed["StressLevel"].tolist() == [3, pd.NA, pd.NA, pd.NA, pd.NA, 3]
+
+
+def test_bad_cells_in_other_columns():
+    typed = schema.normalize("TaskLogs", frame(
+        ["Date", "TaskName", "Success", "Notes", "ID"],
+        ["15/01/2025", "שב", "1000", "", "a"],
+        ["לא תאריך", "שב", "inf", "", "b"],
+        ["2025-01-03", "שב", "4", "", "c"],
+    ))
+    # תאריך שהוקלד ידנית בראש הגיליון לא מבטל את הפורמט של כל השאר
+    assert typed["Date"].tolist()[0] == pd.Timestamp("2025-01-15")
+    assert typed["Date"].isna().tolist() == [False, True, False]
+    assert typed["Success"].tolist() == [pd.NA, pd.NA, 4]
+
+
+def test_bad_cell_does_not_fail_the_cache_load(google, make_cache):
+    google.sheets["TaskLogs"][2][2] = "1000"
+    assert make_cache(ttl=60).get("TaskLogs")["Success"].isna().sum() == 1
@@ -0,0 +1,43 @@
+"""שמירה מהעורך: רק התאים שהשתנו נכתבים"""
+import pandas as pd
+import pytest
+
+import schema
+from cache import WorksheetCache
+from rowids import keyed_diff
+from sheet_diff import diff_frames
+from storage import SQLiteBackend
+
+HEADER = ["Date", "Time", "Duration", "StressLevel", "Notes", "ID"]
+
+
+def test_unchanged_and_missing_cells_are_not_written():
+    original = schema.normalize("Training", pd.DataFrame(
+        [["לא תאריך", "10:00", "1", "3", "", "id1"], ["2025-01-02", "10:00", "1", "", "", "id2"]],
+        columns=HEADER))
+    assert not diff_frames(original, original.copy())
+    edited = original.copy()
+    edited.loc[0, "Notes"] = "EDITED"
+    assert diff_frames(original, edited).updates == [(2, [None, None, None, None, "EDITED", None])]
+
+
+@pytest.mark.parametrize("kind", ["sheets", "sqlite"])
+def test_editing_a_row_keeps_a_date_that_did_not_parse(google, backend, kind):
+    rows = [HEADER, ["2025-01-01", "09:00", "1", "2", "", "id1"],
+            ["15-1-2025 בבוקר", "10:00", "1", "3", "", "id2"]]
+    if kind == "sqlite":
+        backend = SQLiteBackend(":memory:")
+        backend.replace_all("Training", rows)
+    else:
+        google.sheets["Training"] = [list(row) for row in rows]
+    cache = WorksheetCache(backend, ["Training"], ttl=60)
+    base, _ = cache.read_page("Training", 0)
+    assert pd.isna(base.loc[1, "Date"])
+    edited = base.copy()
+    edited.loc[1, "Notes"] = "EDITED"
+    diff, conflicts = keyed_diff(cache, "Training", base, edited)
+    assert conflicts == []
+    backend.apply_changes("Training", diff.updates, diff.deletes)
+    cache.apply_changes("Training", diff.updates, diff.deletes)
+    assert backend.read_all("Training")[2] == ["15-1-2025 בבוקר", "10:00", "1", "3", "EDITED", "id2"]
+    assert cache.get("Training").loc[1, "Notes"] == "EDITED"
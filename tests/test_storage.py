@@ -0,0 +1,47 @@
+"""SheetsBackend.read_many מול גוגל מדומה: כמה בקשות עולה טעינה קרה; סנכרון MirroredBackend"""
+from storage import MirroredBackend, SQLiteBackend
+
+
+def test_cold_read_many_is_one_request(google, backend):
+    values = backend.read_many(["TaskLogs"])
+    assert len(values["TaskLogs"]) == 6
+    assert google.calls["values_batch_get"] == 1
+    assert google.calls["worksheets"] == 0
+
+
+def test_missing_worksheet_reads_empty(google, backend):
+    values = backend.read_many(["TaskLogs", "TaskLogs_Daily"])
+    assert values["TaskLogs_Daily"] == [] and len(values["TaskLogs"]) == 6
+    # הרשימה נקראה פעם אחת, ומעכשיו מסננים לפי ה-handles בלי לנסות שוב
+    backend.read_many(["TaskLogs", "TaskLogs_Daily"])
+    assert google.calls["worksheets"] == 1
+    assert google.calls["values_batch_get"] == 3
+
+
+def make_mirrored(google, backend):
+    local = SQLiteBackend(":memory:")
+    mirrored = MirroredBackend(local, backend)
+    mirrored.seed(["TaskLogs"])
+    return mirrored, local
+
+
+def test_failed_mirror_write_stops_row_number_writes(google, backend, monkeypatch):
+    mirrored, local = make_mirrored(google, backend)
+
+    def offline(*args):
+        raise ConnectionError("offline")
+    monkeypatch.setattr(backend, "append_rows", offline)
+    mirrored.append_rows("TaskLogs", [["2025-01-06", "שב", "4", "", "id6"]])
+    assert mirrored.diverged == {"TaskLogs"}
+    # סימון שנשמר במנוע המקומי שורד הפעלה מחדש
+    assert MirroredBackend(local, backend).diverged == {"TaskLogs"}
+
+    monkeypatch.undo()
+    updates = []
+    monkeypatch.setattr(backend, "update_row", lambda *args: updates.append(args))
+    mirrored.update_row("TaskLogs", 7, ["2025-01-06", "שב", "5", "", "id6"])
+    # במקום כתיבה לשורה 7 (שבגוגל עוד לא קיימת) נשלח כל הגיליון
+    assert updates == []
+    assert google.sheets["TaskLogs"] == local.read_all("TaskLogs")
+    assert mirrored.diverged == set()
+    assert MirroredBackend(local, backend).diverged == set()
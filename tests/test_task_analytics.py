@@ -0,0 +1,37 @@
+"""פענוח עמודת Frequency של Tasks"""
+import pytest
+
+from task_analytics import parse_frequency
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("פעמיים ביום", (2, 1)),
+    ("3 פעמים בשבוע", (3, 7)),
+    ("3 בשבוע", (3, 7)),
+    ("שלוש פעמים בשבוע", (3, 7)),
+    ("פעם אחת בחודש", (1, 30)),
+    ("יומי", (1, 1)),
+    ("כל יומיים", (1, 2)),
+    ("כל 3 ימים", (1, 3)),
+    ("פעמיים בשבועיים", (2, 14)),
+    ("פעמיים כל 3 ימים", (2, 3)),
+    # ספרה שאינה כמות הפעמים
+    ("5 דקות ביום", (1, 1)),
+    ("10 חזרות פעמיים ביום", (2, 1)),
+    # אנגלית
+    ("twice a day", (2, 1)),
+    ("three times a week", (3, 7)),
+    ("once a month", (1, 30)),
+    ("3x a week", (3, 7)),
+    ("3/week", (3, 7)),
+    ("every 3 days", (1, 3)),
+    ("twice every 3 days", (2, 3)),
+    ("daily", (1, 1)),
+    # לא מובן
+    ("", None),
+    (None, None),
+    (float("nan"), None),
+    ("כשיש זמן", None),
+])
+def test_parse_frequency(text, expected):
+    assert parse_frequency(text) == expected
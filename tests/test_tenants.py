@@ -0,0 +1,60 @@
+"""JournalPool: סגירה ברקע, ופתיחה מחדש רק אחרי שהתור הישן נעצר"""
+import threading
+
+from tenants import JournalPool
+
+
+class StubJournal:
+    def __init__(self, slug, release):
+        self.slug = slug
+        self.release = release
+        self.maintain = None
+        self.closed = threading.Event()
+        self.last_used = 0
+
+    def start(self, maintain=True):
+        self.maintain = maintain
+        return self
+
+    def memory_bytes(self):
+        return 0
+
+    def close(self):
+        # כמו תור כתיבה שעוד באמצע סבב
+        self.release.wait(5)
+        self.closed.set()
+
+
+def make_pool():
+    release = threading.Event()
+    built = []
+
+    def factory(slug):
+        built.append(StubJournal(slug, release))
+        return built[-1]
+    return JournalPool(factory, max_journals=1, check_interval=0), built, release
+
+
+def test_eviction_does_not_block_the_request():
+    pool, built, release = make_pool()
+    pool.get("a")
+    assert pool.get("b").slug == "b"
+    assert not built[0].closed.is_set()
+    release.set()
+    assert built[0].closed.wait(5)
+
+
+def test_reopen_waits_for_the_old_journal_to_close():
+    pool, built, release = make_pool()
+    old = pool.get("a")
+    pool.get("b")
+    reopened = []
+    opener = threading.Thread(target=lambda: reopened.append(pool.get("a")))
+    opener.start()
+    opener.join(0.2)
+    assert opener.is_alive() and not reopened
+    release.set()
+    opener.join(5)
+    assert reopened[0] is not old and old.closed.is_set()
+    # התחזוקה רצה רק בפתיחה הראשונה
+    assert [journal.maintain for journal in built if journal.slug == "a"] == [True, False]
@@ -0,0 +1,84 @@
+"""תור הכתיבה: שליחה חוזרת אחרי כישלון לא מוסיפה שורות פעמיים"""
+import gspread
+import pytest
+import requests
+
+from fake_gspread import FakeResponse
+from write_queue import WriteQueue
+
+
+class FlakyBackend:
+    """נכשל פעם אחת: אחרי שהשורות כבר נוספו (after_write) או לפני"""
+
+    def __init__(self, inner, error, after_write=True):
+        self.inner = inner
+        self.error = error
+        self.after_write = after_write
+        self.appends = 0
+
+    def append_rows(self, worksheet_name, rows):
+        self.appends += 1
+        error, self.error = self.error, None
+        if error is not None and not self.after_write:
+            raise error
+        self.inner.append_rows(worksheet_name, rows)
+        if error is not None:
+            raise error
+
+
+@pytest.fixture
+def make_queue(tmp_path, backend):
+    def make(cache, error, after_write=True):
+        flaky = FlakyBackend(backend, error, after_write)
+        queue = WriteQueue(str(tmp_path / "queue.db"), flaky, on_flushed=cache.apply_append,
+                           already_written=cache.written)
+        return queue, flaky
+    return make
+
+
+def retry_now(queue):
+    with queue._conn:
+        queue._conn.execute("UPDATE pending_rows SET next_attempt = 0")
+
+
+def log_ids(google):
+    return [row[4] for row in google.sheets["TaskLogs"][1:]]
+
+
+def test_timeout_after_the_append_is_not_sent_twice(google, make_cache, make_queue):
+    cache = make_cache(ttl=60)
+    cache.prefetch()
+    queue, flaky = make_queue(cache, requests.exceptions.Timeout("read timed out"))
+    queue.enqueue("TaskLogs", ["2025-01-06", "שב", "4", "", "id6"])
+    assert queue.flush_once() == 0
+    retry_now(queue)
+    assert queue.flush_once() == 0
+    assert flaky.appends == 1
+    assert log_ids(google) == ["id1", "id2", "id3", "id4", "id5", "id6"]
+    assert list(cache.get("TaskLogs")["ID"]).count("id6") == 1
+    assert queue.counts() == {"pending": 0, "failed": 0}
+
+
+def test_rate_limited_rows_are_resent_without_a_check(google, make_cache, make_queue):
+    cache = make_cache(ttl=60)
+    cache.prefetch()
+    error = gspread.exceptions.APIError(FakeResponse(429, "quota"))
+    queue, flaky = make_queue(cache, error, after_write=False)
+    checked = []
+    queue.already_written = lambda name, rows: checked.append(rows) or [False] * len(rows)
+    queue.enqueue("TaskLogs", ["2025-01-06", "שב", "4", "", "id6"])
+    queue.flush_once()
+    retry_now(queue)
+    assert queue.flush_once() == 1
+    assert checked == []
+    assert log_ids(google)[-1] == "id6"
+
+
+def test_append_skips_rows_the_cache_already_read(google, make_cache):
+    cache = make_cache(ttl=60)
+    cache.prefetch()
+    row = ["2025-01-06", "שב", "4", "", "id6"]
+    google.sheets["TaskLogs"].append(row)
+    cache.load(["TaskLogs"])
+    cache.apply_append("TaskLogs", [row])
+    assert list(cache.get("TaskLogs")["ID"]).count("id6") == 1
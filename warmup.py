@@ -0,0 +1,145 @@
+"""
+חימום בהפעלה: הכנת החיבור לגוגל והמטמון ברקע, לפני שמישהו מחכה להם.
+
+בלי זה, הגולש הראשון אחרי הפעלה מחדש משלם על הכל לפי הסדר: הרשאה,
+open_by_url, רשימת הלשוניות וטעינת כל הגיליונות - ורק אז רואה משהו.
+Warmup עושה את אותם שלבים בחוט רקע, והאפליקציה מציגה את המסגרת מיד
+וממלאת את הנתונים כשהם מוכנים.
+
+אחרי החימום החוט נשאר ער ומרענן את טוקן ה-OAuth לפני שפג תוקפו, כדי
+שבקשה של גולש לא תיתקע באמצע על הרשאה מחדש. נתמכים גם אישורים של
+google-auth (מה ש-gspread 6 משתמש בו) וגם של oauth2client.
+"""
+import datetime
+import logging
+import threading
+import time
+
+import diagnostics
+
+log = logging.getLogger(__name__)
+
+
+# --- טוקן ---
+
+def credentials_of(client):
+    """האישורים שהלקוח של gspread משתמש בהם בפועל (או None)"""
+    http_client = getattr(client, "http_client", None)
+    return getattr(http_client, "auth", None) or getattr(client, "auth", None)
+
+
+def _is_oauth2client(credentials):
+    return "oauth2client" in type(credentials).__module__
+
+
+def seconds_until_expiry(credentials, now=None):
+    """כמה שניות נשארו לטוקן; None אם אין טוקן עדיין, 0 אם כבר פג"""
+    expiry = credentials.token_expiry if _is_oauth2client(credentials) \
+        else getattr(credentials, "expiry", None)
+    token = credentials.access_token if _is_oauth2client(credentials) \
+        else getattr(credentials, "token", None)
+    if not token:
+        return None
+    if expiry is None:
+        return float("inf")  # טוקן בלי תפוגה
+    now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return max(0.0, (expiry - now).total_seconds())
+
+
+def refresh_credentials(credentials):
+    if _is_oauth2client(credentials):
+        import httplib2
+        credentials.refresh(httplib2.Http())
+    else:
+        from google.auth.transport.requests import Request
+        credentials.refresh(Request())
+
+
+class Warmup:
+    """
+    השלבים רצים לפי הסדר בחוט אחד:
+    1. handles - הרשאה, open_by_url ורשימת הלשוניות (backend.warm_up),
+    2. cache - טעינת כל הגיליונות למטמון בבקשה אחת - ואז החימום נחשב גמור והעמוד מוצג,
+    3. maintenance - עבודת תחזוקה (מזהים, העברה לארכיון), אם נמסרה. עדיפות נמוכה:
+       מחכה maintenance_delay שניות, כדי שהבקשות של הגולש הראשון יעברו קודם,
+       ומחליטה מהנתונים שכבר במטמון אם יש בכלל מה לעשות,
+    ואחר כך בדיקה כל interval שניות אם צריך לרענן את הטוקן
+    (כשנשארו פחות מ-refresh_margin שניות).
+    """
+
+    def __init__(self, backend, cache, worksheet_names=None, interval=60, refresh_margin=300,
+                 maintenance=None, maintenance_delay=5):
+        self.backend = backend
+        self.cache = cache
+        self.worksheet_names = worksheet_names
+        self.maintenance = maintenance
+        self.maintenance_delay = maintenance_delay
+        self.interval = interval
+        self.refresh_margin = refresh_margin
+        self.error = None
+        self.timings = {}  # שלב -> שניות
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="maple-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_done(self):
+        """החימום הסתיים - בהצלחה או בשגיאה (ואז הטאבים פשוט טוענים בעצמם)"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _stage(self, name, fn):
+        start = time.perf_counter()
+        with diagnostics.span(f"warmup.{name}"):
+            fn()
+        self.timings[name] = time.perf_counter() - start
+
+    def _run(self):
+        try:
+            self._stage("handles", self.backend.warm_up)
+            self._stage("cache", lambda: self.cache.prefetch(self.worksheet_names))
+        except Exception as e:
+            self.error = e
+            log.warning("החימום נכשל, הנתונים ייטענו בבקשה הראשונה: %s", e)
+        finally:
+            self._done.set()
+
+        if self.maintenance is not None and not self._stop.wait(self.maintenance_delay):
+            self._maintain()
+        while not self._stop.wait(self.interval):
+            self.refresh_token()
+
+    def _maintain(self):
+        # תחזוקה שנכשלה לא מפילה את החימום - תנסה שוב בהפעלה הבאה
+        try:
+            self._stage("maintenance", self.maintenance)
+        except Exception as e:
+            log.warning("התחזוקה בהפעלה נכשלה: %s", e)
+
+    def refresh_token(self):
+        """מרענן את הטוקן אם הוא עומד לפוג; מחזיר True אם רוענן"""
+        client = self.backend.client()
+        credentials = credentials_of(client) if client is not None else None
+        if credentials is None:
+            return False
+        remaining = seconds_until_expiry(credentials)
+        if remaining is not None and remaining > self.refresh_margin:
+            return False
+        try:
+            with diagnostics.span("warmup.token_refresh"):
+                refresh_credentials(credentials)
+            return True
+        except Exception as e:
+            # לא נורא: gspread ירענן בעצמו בבקשה הבאה
+            log.warning("רענון הטוקן נכשל: %s", e)
+            return False
@@ -0,0 +1,211 @@
+"""
+תור כתיבה מקומי (write-behind) לטפסים של היומן.
+
+שמירה מטופס נרשמת קודם ביומן מקומי (SQLite) וחוזרת מיד, בלי לחכות לגוגל.
+חוט רקע אוסף את השורות הממתינות, מאחד אותן לפי גיליון ושולח כל גיליון
+בבקשת append_rows אחת. אם גוגל עמוס - מחכים ומנסים שוב מאוחר יותר,
+והשורות לא הולכות לאיבוד גם אם השרת עולה מחדש באמצע.
+
+הוספה שנכשלה בניתוק, timeout או 5xx אולי בכל זאת הגיעה לגיליון. שורות כאלה
+מסומנות uncertain, ולפני שליחה חוזרת בודקים (already_written, לפי המזהה) אם
+הן כבר שם - ורק את מה שלא נכתב שולחים שוב. 429 גוגל דוחה לפני שעשה משהו.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from ratelimit import is_retryable
+
+log = logging.getLogger(__name__)
+
+PENDING = "pending"
+FAILED = "failed"
+
+
+class WriteQueue:
+    def __init__(self, path, backend, on_flushed=None, interval=5, linger=1,
+                 batch_size=200, max_attempts=10, already_written=None):
+        self.backend = backend
+        # נקרא אחרי שליחה מוצלחת, למשל כדי להוסיף את השורות למטמון
+        self.on_flushed = on_flushed
+        # already_written(worksheet_name, rows) -> [bool] - ראו uncertain למעלה
+        self.already_written = already_written
+        self.interval = interval
+        self.linger = linger  # כמה לחכות אחרי שמירה, כדי שעוד שמירות יצטרפו לאותה בקשה
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending_rows ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " worksheet TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt REAL NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " uncertain INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pending_rows)")}
+        if "uncertain" not in columns:  # יומן מקומי מגרסה קודמת
+            self._conn.execute("ALTER TABLE pending_rows ADD COLUMN uncertain INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    # --- צד הטפסים ---
+    def enqueue(self, worksheet_name, row):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO pending_rows (worksheet, data, created_at) VALUES (?, ?, ?)",
+                (worksheet_name, json.dumps(list(row), ensure_ascii=False, default=str), time.time()),
+            )
+        self._wakeup.set()
+
+    def pending_rows(self, worksheet_name):
+        """שורות שנשמרו בטופס אבל עוד לא הגיעו לגיליון, לפי סדר ההכנסה"""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM pending_rows WHERE worksheet = ? AND status = ? ORDER BY id",
+                (worksheet_name, PENDING),
+            )
+            return [json.loads(data) for (data,) in cur]
+
+    def counts(self):
+        with self._lock:
+            cur = self._conn.execute("SELECT status, COUNT(*) FROM pending_rows GROUP BY status")
+            counts = dict(cur.fetchall())
+        return {PENDING: counts.get(PENDING, 0), FAILED: counts.get(FAILED, 0)}
+
+    def last_error(self):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT last_error FROM pending_rows WHERE last_error IS NOT NULL ORDER BY id DESC LIMIT 1"
+            )
+            found = cur.fetchone()
+        return found[0] if found else None
+
+    def retry_failed(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pending_rows SET status = ?, attempts = 0, next_attempt = 0 WHERE status = ?",
+                (PENDING, FAILED),
+            )
+        self._wakeup.set()
+
+    # --- צד השליחה ---
+    def _due(self, now):
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, worksheet, data, attempts, next_attempt, uncertain FROM pending_rows"
+                " WHERE status = ? ORDER BY id",
+                (PENDING,),
+            )
+            batches = {}
+            blocked = set()
+            for row_id, worksheet_name, data, attempts, next_attempt, uncertain in cur:
+                if worksheet_name in blocked:
+                    continue
+                if next_attempt > now:
+                    # שומרים על סדר השורות: לא שולחים שורה חדשה לפני שורה ישנה שממתינה לניסיון חוזר
+                    blocked.add(worksheet_name)
+                    continue
+                batch = batches.setdefault(worksheet_name, [])
+                if len(batch) < self.batch_size:
+                    batch.append((row_id, json.loads(data), attempts, uncertain))
+            return batches
+
+    def flush_once(self):
+        """שולח את כל מה שממתין, בקשה אחת לכל גיליון. מחזיר כמה שורות נשלחו"""
+        with self._flush_lock:
+            return self._flush_due()
+
+    def _flush_due(self):
+        sent = 0
+        for worksheet_name, batch in self._due(time.time()).items():
+            rows = [row for _, row, _, _ in batch]
+            try:
+                unsent = [row for row, written in zip(rows, self._written(worksheet_name, batch))
+                          if not written]
+                if unsent:
+                    self.backend.append_rows(worksheet_name, unsent)
+            except Exception as e:
+                self._record_failure(batch, e)
+                continue
+            # קודם מוחקים מהיומן המקומי: אם on_flushed ייכשל, השורות כבר בגיליון ולא יישלחו שוב
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM pending_rows WHERE id = ?",
+                                       [(row_id,) for row_id, _, _, _ in batch])
+            sent += len(unsent)
+            if self.on_flushed is not None:
+                try:
+                    self.on_flushed(worksheet_name, rows)
+                except Exception as e:
+                    log.warning("עדכון אחרי שליחה ל-%s נכשל: %s", worksheet_name, e)
+        return sent
+
+    def _written(self, worksheet_name, batch):
+        # רק שורות שניסיון קודם שלהן נכשל בלי לדעת אם הגיע נבדקות - זה עולה קריאה
+        rows = [row for _, row, _, uncertain in batch if uncertain]
+        if not rows or self.already_written is None:
+            return [False] * len(batch)
+        found = iter(self.already_written(worksheet_name, rows))
+        return [bool(next(found)) if uncertain else False for _, _, _, uncertain in batch]
+
+    def _record_failure(self, batch, error):
+        log.warning("שליחת %d שורות נכשלה: %s", len(batch), error)
+        now = time.time()
+        updates = []
+        # כל כישלון חוץ מ-429 אולי כן הגיע לגיליון - ראו uncertain למעלה
+        maybe_sent = not is_retryable(error, idempotent=False)
+        for row_id, _, attempts, uncertain in batch:
+            attempts += 1
+            status = FAILED if attempts >= self.max_attempts else PENDING
+            # המתנה מדורגת בין ניסיונות: 10 שניות, 20, 40... עד 5 דקות
+            next_attempt = now + min(300, 5 * 2 ** attempts)
+            updates.append((status, attempts, next_attempt, str(error), int(bool(uncertain) or maybe_sent),
+                            row_id))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE pending_rows SET status = ?, attempts = ?, next_attempt = ?, last_error = ?,"
+                " uncertain = ? WHERE id = ?",
+                updates,
+            )
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush_once()
+            except Exception as e:
+                log.exception("תור הכתיבה נתקל בשגיאה: %s", e)
+            if self._wakeup.wait(self.interval):
+                time.sleep(self.linger)
+            self._wakeup.clear()
+
+    def start(self):
+        # שורות שנשארו מהפעלה קודמת נשלחות כבר בסבב הראשון
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="maple-write-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=30):
+        """
+        עוצר את חוט הרקע אחרי הסבב הנוכחי. שורות שעוד ממתינות נשארות ביומן המקומי
+        ויישלחו בפעם הבאה שתור על אותו קובץ יופעל.
+        מחזיר True רק אם החוט באמת נעצר (False - עוד באמצע סבב כשנגמר ה-timeout);
+        עד אז אסור להפעיל תור אחר על אותו קובץ, כי שניהם ישלחו את אותן שורות.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()